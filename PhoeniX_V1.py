@@ -5,18 +5,2139 @@ PhoeniX Strategy for FreqTrader Bot
 
 from __future__ import annotations
 
+import hashlib
+import json
+import logging
+import os
+import shutil
+from bisect import bisect_left
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from time import monotonic, perf_counter
 
 import numpy as np
-import talib.abstract as ta
-from pandas import DataFrame
+import pyarrow as pa
+import pyarrow.feather as feather
+import talib
+from pandas import DataFrame, DatetimeIndex, Timestamp, concat
 
+from freqtrade.enums import TRADE_MODES, RunMode
+from freqtrade.exchange import timeframe_to_minutes, timeframe_to_prev_date, timeframe_to_seconds
 from freqtrade.persistence import Trade
 from freqtrade.strategy import IStrategy, stoploss_from_open, merge_informative_pair
 # Parameter classes moved in recent Freqtrade releases
 from freqtrade.strategy.parameters import IntParameter, DecimalParameter
 
 
+logger = logging.getLogger(__name__)
+
+# ---- Индикаторы базового таймфрейма ----------------------------------
+EMA_PERIOD = 200
+ATR_PERIOD = 14
+ADX_PERIOD = 14
+SLOPE_PERIOD = 96
+VOL_MA_PERIOD = 96
+CORR_PERIOD = 96
+
+# columns owned by the base-timeframe indicator block
+BASE_INDICATOR_COLUMNS = (
+    "ema_200",
+    "sma_40",
+    "adx",
+    "slowk",
+    "slowd",
+    "atr_pct",
+    "atr_ema",
+    "atr_ema_std",
+    "atr_z",
+    "ema200_lrs",
+    "vol_ma",
+)
+# inputs compared against the cache to detect rewritten history
+_ENGINE_INPUTS = ("high", "low", "close", "quoteVolume")
+# informative columns the strategy reads, per merge suffix; nothing else is attached
+INFORMATIVE_COLUMNS = {
+    "4h": ("close", "ema_200"),
+    "btc": ("close", "ema_200"),
+    "btc_fast": ("close", "volume", "quoteVolume"),
+    "btcd": ("close",),
+}
+# exchange OHLCV: kept at full precision by ``compact_features``, resampled
+# by ``_DerivedCandles``
+_RAW_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def _rolling_std(values: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    """
+    Population std of ``values`` over each trailing window, one column per window.
+
+    Sums come from one set of prefix sums (centred first to keep them well
+    conditioned) shared by all windows; windows that are not full of values
+    are NaN, as with ``rolling(window).std(ddof=0)``.
+    """
+    n = len(values)
+    out = np.full((n, len(windows)), np.nan)
+    valid = ~np.isnan(values)
+    centred = np.where(valid, values - (values[valid].mean() if valid.any() else 0.0), 0.0)
+    s1 = np.concatenate([[0.0], np.cumsum(centred)])
+    s2 = np.concatenate([[0.0], np.cumsum(centred * centred)])
+    count = np.concatenate([[0], np.cumsum(valid)])
+    for j, win in enumerate(int(w) for w in windows):
+        if win > n:
+            continue
+        mean = (s1[win:] - s1[:-win]) / win
+        var = (s2[win:] - s2[:-win]) / win - mean * mean
+        full = count[win:] - count[:-win] == win
+        out[win - 1:, j] = np.where(full, np.sqrt(np.maximum(var, 0.0)), np.nan)
+    return out
+
+
+def _rolling_mean(values: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    """``rolling(window, min_periods=min_periods).mean()`` from prefix sums."""
+    valid = ~np.isnan(values)
+    total = np.cumsum(np.where(valid, values, 0.0))
+    seen = np.cumsum(valid)
+    total[window:] -= total[:-window].copy()
+    seen[window:] -= seen[:-window].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(seen >= min_periods, total / seen, np.nan)
+
+
+def _returns(close: np.ndarray) -> np.ndarray:
+    """Close-to-close returns, NaN on the first candle (``pct_change()``)."""
+    out = np.empty(len(close))
+    out[:1] = np.nan
+    np.divide(close[1:], close[:-1], out=out[1:])
+    out[1:] -= 1.0
+    return out
+
+
+def _window_indicators(out: dict, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                       quote_volume: np.ndarray, win: int) -> None:
+    """Indicators that only depend on a bounded trailing window, written into ``out``."""
+    out["sma_40"][:] = talib.SMA(close, 40)
+    out["slowk"][:], out["slowd"][:] = talib.STOCH(high, low, close)
+    out["atr_ema_std"][:] = _rolling_std(out["atr_pct"], np.array([win]))[:, 0]
+    # EMA‑200 линейный наклон за сутки (96 свечей)
+    out["ema200_lrs"][:] = talib.LINEARREG_SLOPE(out["ema_200"], SLOPE_PERIOD)
+    out["vol_ma"][:] = _rolling_mean(quote_volume, VOL_MA_PERIOD, 30)
+
+
+def _indicator_kernel(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                      quote_volume: np.ndarray, win: int) -> np.ndarray:
+    """
+    The whole base-timeframe indicator block from the input arrays.
+
+    Every indicator is written into one preallocated
+    ``(len(BASE_INDICATOR_COLUMNS), candles)`` buffer; recursive indicators
+    run in TA-Lib on the raw arrays, windowed ones on prefix sums.
+    """
+    buf = np.empty((len(BASE_INDICATOR_COLUMNS), len(close)))
+    out = dict(zip(BASE_INDICATOR_COLUMNS, buf))
+    out["ema_200"][:] = talib.EMA(close, EMA_PERIOD)
+    out["adx"][:] = talib.ADX(high, low, close, ADX_PERIOD)
+
+    # ATR‑волатильность
+    atr_pct = out["atr_pct"]
+    np.divide(talib.ATR(high, low, close, ATR_PERIOD), close, out=atr_pct)
+    atr_pct *= 100
+    out["atr_ema"][:] = talib.EMA(atr_pct, win)
+
+    _window_indicators(out, high, low, close, quote_volume, win)
+    atr_z = out["atr_z"]
+    np.subtract(atr_pct, out["atr_ema"], out=atr_z)
+    atr_z /= out["atr_ema_std"] + 1e-9
+    return buf
+
+
+def _engine_inputs(df: DataFrame) -> dict[str, np.ndarray]:
+    return {col: df[col].to_numpy(dtype=float) for col in _ENGINE_INPUTS}
+
+
+def _set_columns(df: DataFrame, buf: np.ndarray,
+                 names: tuple[str, ...] = BASE_INDICATOR_COLUMNS) -> DataFrame:
+    """Attach the rows of ``buf`` as columns of ``df`` in one step, without copying."""
+    existing = [name for name in names if name in df.columns]
+    if existing:
+        df = df.drop(columns=existing)
+    return concat([df, DataFrame(buf.T, columns=list(names), index=df.index, copy=False)], axis=1)
+
+
+def _populate_base_indicators(df: DataFrame, win: int) -> DataFrame:
+    """Full recompute of the base-timeframe indicator block."""
+    inputs = _engine_inputs(df)
+    buf = _indicator_kernel(inputs["high"], inputs["low"], inputs["close"],
+                            inputs["quoteVolume"], win)
+    return _set_columns(df, buf)
+
+
+def _add_quote_volume(df: DataFrame) -> DataFrame:
+    if "quoteVolume" not in df.columns:
+        source = next((col for col in ("volume", "baseVolume") if col in df.columns), None)
+        if source is not None:
+            volume = df[source].to_numpy(dtype=float)
+            quote = volume * df["close"].to_numpy(dtype=float)
+            quote[volume == 0] = np.nan
+            df["quoteVolume"] = quote
+        else:
+            df["quoteVolume"] = np.nan
+    return df
+
+
+class _AlignmentCache:
+    """
+    Base-to-informative row mappings, shared by every pair.
+
+    ``merge_informative_pair`` shifts the informative dates by one informative
+    candle minus one base candle and forward-fills the last match; the row it
+    picks only depends on the two date ranges, so the mapping is computed
+    once per (shift, date ranges) and every merge is a NumPy ``take``.
+    """
+
+    def __init__(self, size: int = 64) -> None:
+        self.size = size
+        self.entries: dict[tuple, tuple[np.ndarray, np.ndarray, np.ndarray | None]] = {}
+
+    def rows(self, dates: np.ndarray, inf_dates: np.ndarray, shift: np.timedelta64,
+             ffill: bool) -> np.ndarray | None:
+        """Informative row of every base row (-1: none); ``None`` if the rows are the same."""
+        key = (shift, ffill, len(dates), dates[0], dates[-1],
+               len(inf_dates), inf_dates[0], inf_dates[-1])
+        entry = self.entries.get(key)
+        if (entry is not None and np.array_equal(entry[0], dates)
+                and np.array_equal(entry[1], inf_dates)):
+            return entry[2]
+        rows = self._rows(dates, inf_dates, shift, ffill)
+        if len(self.entries) >= self.size:
+            self.entries.clear()
+        self.entries[key] = (dates, inf_dates, rows)
+        return rows
+
+    @staticmethod
+    def _rows(dates: np.ndarray, inf_dates: np.ndarray, shift: np.timedelta64,
+              ffill: bool) -> np.ndarray | None:
+        n = len(dates)
+        merge_dates = inf_dates + shift
+        pos = np.searchsorted(merge_dates, dates)
+        hit = pos < len(merge_dates)
+        hit[hit] = merge_dates[pos[hit]] == dates[hit]
+        if hit.all() and n == len(inf_dates):
+            return None
+        if not ffill:
+            return np.where(hit, pos, -1)
+        last = np.where(hit, np.arange(n), -1)
+        np.maximum.accumulate(last, out=last)
+        rows = np.where(last >= 0, pos[last], -1)
+        if n > 1 and rows[0] < 0 and hit.any():
+            # like Freqtrade, rows before the first match take the candle preceding it
+            first = int(np.argmax(hit))
+            if rows[first] > 0:
+                rows[:first] = rows[first] - 1
+        return rows
+
+
+_ALIGNMENTS = _AlignmentCache()
+
+
+def _attach_informative(df: DataFrame, informative: DataFrame, columns: list[str],
+                        names: list[str], shift: np.timedelta64, ffill: bool) -> DataFrame:
+    """Attach ``informative[columns]`` as ``names`` through the shared row mapping."""
+    dates = df["date"].to_numpy(dtype="datetime64[ns]")
+    inf_dates = informative["date"].to_numpy(dtype="datetime64[ns]")
+    rows = _ALIGNMENTS.rows(dates, inf_dates, shift, ffill)
+    if rows is None:
+        # same candles: attach the informative arrays as they are
+        attached = DataFrame(
+            {name: informative[col].to_numpy() for col, name in zip(columns, names)},
+            index=df.index, copy=False,
+        )
+        return concat([df.drop(columns=[n for n in names if n in df.columns]), attached], axis=1)
+    buf = np.empty((len(columns), len(dates)))
+    missing = rows < 0
+    for out, col in zip(buf, columns):
+        np.take(informative[col].to_numpy(dtype=float), rows, out=out)
+        out[missing] = np.nan
+    return _set_columns(df, buf, tuple(names))
+
+
+def _merge_informative(df: DataFrame, informative: DataFrame, timeframe: str,
+                       timeframe_inf: str, suffix: str) -> DataFrame:
+    """
+    ``merge_informative_pair`` restricted to the :data:`INFORMATIVE_COLUMNS` of
+    ``suffix``, served from the shared alignment cache.
+    """
+    columns = [col for col in INFORMATIVE_COLUMNS[suffix] if col in informative.columns]
+    minutes, minutes_inf = timeframe_to_minutes(timeframe), timeframe_to_minutes(timeframe_inf)
+    inf_dates = informative["date"]
+    if (timeframe_inf == "1M" or minutes_inf < minutes or df.empty or informative.empty
+            or not inf_dates.is_monotonic_increasing or not inf_dates.is_unique):
+        merged = merge_informative_pair(
+            df,
+            informative[["date", *columns]],
+            timeframe,
+            timeframe_inf,
+            ffill=True,
+            append_timeframe=False,
+            suffix=suffix,
+        )
+        return merged.drop(columns=f"date_{suffix}")
+    shift = np.timedelta64(minutes_inf - minutes, "m")
+    return _attach_informative(df, informative, columns, [f"{col}_{suffix}" for col in columns],
+                               shift, ffill=True)
+
+
+def _merge_high_tf(df: DataFrame, htf_df: DataFrame | None, timeframe: str,
+                   high_tf: str) -> DataFrame:
+    """Attach the high-timeframe close and EMA‑200 (suffix ``4h``) without lookahead."""
+    if htf_df is None or len(htf_df) <= 20:
+        return df
+    if "ema_200" not in htf_df.columns:
+        htf_df = htf_df.assign(ema_200=talib.EMA(htf_df["close"].to_numpy(dtype=float), EMA_PERIOD))
+    return _merge_informative(df, htf_df, timeframe, high_tf, "4h")
+
+
+def _compact_features(df: DataFrame) -> DataFrame:
+    """Store derived float columns as float32; exchange OHLCV keeps float64."""
+    columns = {
+        col: np.float32 for col, dtype in df.dtypes.items()
+        if dtype == np.float64 and col not in _RAW_COLUMNS
+    }
+    return df.astype(columns) if columns else df
+
+
+def _base_indicators(df: DataFrame, win: int, engine: _IncrementalIndicators | None = None,
+                     pair: str | None = None, store: _FeatureStore | None = None,
+                     strict: bool = False) -> DataFrame:
+    """Base-timeframe block: incremental (optionally persisted) or a full recompute."""
+    if engine is None:
+        return _populate_base_indicators(df, win)
+    if store is not None:
+        store.seed(engine, pair, df, win, strict)
+    df = engine.update(pair, df, win)
+    if store is not None:
+        store.sync(engine, pair)
+        if strict:
+            # backtesting analyzes each pair once; keep only the file
+            engine.reset(pair)
+    return df
+
+
+def _pair_indicators(df: DataFrame, htf_df: DataFrame | None, win: int, timeframe: str,
+                     high_tf: str, engine: _IncrementalIndicators | None = None,
+                     pair: str | None = None, store: _FeatureStore | None = None) -> DataFrame:
+    """Per-pair block of ``populate_indicators``, as run by the prefetch workers."""
+    df = _base_indicators(_add_quote_volume(df), win, engine, pair, store)
+    return _merge_high_tf(df, htf_df, timeframe, high_tf)
+
+
+def _btc_correlation(df: DataFrame) -> np.ndarray:
+    """Корреляция с BTC за сутки на том же таймфрейме."""
+    btc = _returns(df["close_btc_fast"].to_numpy(dtype=float))
+    close = _returns(df["close"].to_numpy(dtype=float))
+    return _rolling_corr(btc, close[:, None], CORR_PERIOD)[:, 0]
+
+
+def _rolling_corr(x: np.ndarray, ys: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling Pearson correlation of ``x`` against every column of ``ys``.
+
+    Window sums are taken from prefix sums, so all columns are processed in a
+    single batched pass.  Windows with missing values or zero variance yield 0,
+    matching ``rolling(window).corr(...).fillna(0)``.
+    """
+    out = np.zeros(ys.shape)
+    if len(x) < window:
+        return out
+    valid = ~np.isnan(ys) & ~np.isnan(x)[:, None]
+    xs = np.where(valid, x[:, None], 0.0)
+    ys = np.where(valid, ys, 0.0)
+
+    def window_sum(a: np.ndarray) -> np.ndarray:
+        c = np.cumsum(a, axis=0)
+        c = np.concatenate([np.zeros((1, a.shape[1])), c])
+        return c[window:] - c[:-window]
+
+    sums = (window_sum(valid.astype(float)), window_sum(xs), window_sum(ys),
+            window_sum(xs * ys), window_sum(xs * xs), window_sum(ys * ys))
+    out[window - 1:] = _corr_from_sums(sums, window)
+    return out
+
+
+def _corr_terms(x: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Per-row terms of the window sums (count, Σx, Σy, Σxy, Σx², Σy²), shape ``(6, rows, pairs)``."""
+    valid = ~np.isnan(ys) & ~np.isnan(x)[:, None]
+    xs = np.where(valid, x[:, None], 0.0)
+    ys = np.where(valid, ys, 0.0)
+    return np.stack([valid.astype(float), xs, ys, xs * ys, xs * xs, ys * ys])
+
+
+def _corr_from_sums(sums, window: int) -> np.ndarray:
+    """Correlation from window sums; 0 for incomplete windows or zero variance."""
+    n, sx, sy, sxy, sxx, syy = sums
+    cov = sxy - sx * sy / window
+    var_x = sxx - sx * sx / window
+    var_y = syy - sy * sy / window
+    ok = (n == window) & (var_x > 0) & (var_y > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.sqrt(var_x * var_y)
+    return np.where(ok, np.clip(corr, -1.0, 1.0), 0.0)
+
+
+def _utc64(value) -> np.datetime64:
+    """Naive UTC ``datetime64[ns]`` for datetimes and pandas timestamps."""
+    return np.datetime64(Timestamp(value).value, "ns")
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class _AdxState:
+    """Wilder accumulators of TA-Lib's ADX, advanced one candle at a time."""
+
+    __slots__ = ("period", "plus_dm", "minus_dm", "tr", "adx", "high", "low", "close")
+
+    def __init__(self, period: int, high: float, low: float, close: float) -> None:
+        self.period = period
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.tr = 0.0
+        self.adx = np.nan
+        self.high, self.low, self.close = high, low, close
+
+    def _accumulate(self, high: float, low: float, close: float, smooth: bool) -> None:
+        diff_p = high - self.high
+        diff_m = self.low - low
+        if smooth:
+            self.minus_dm -= self.minus_dm / self.period
+            self.plus_dm -= self.plus_dm / self.period
+        if diff_m > 0 and diff_p < diff_m:
+            self.minus_dm += diff_m
+        elif diff_p > 0 and diff_p > diff_m:
+            self.plus_dm += diff_p
+        tr = _true_range(high, low, self.close)
+        self.tr = self.tr - self.tr / self.period + tr if smooth else self.tr + tr
+        self.high, self.low, self.close = high, low, close
+
+    def _dx(self) -> float:
+        # TA_IS_ZERO guards from the TA-Lib implementation
+        if abs(self.tr) < 1e-8:
+            return np.nan
+        minus_di = 100.0 * self.minus_dm / self.tr
+        plus_di = 100.0 * self.plus_dm / self.tr
+        total = minus_di + plus_di
+        if abs(total) < 1e-8:
+            return np.nan
+        return 100.0 * abs(minus_di - plus_di) / total
+
+    @classmethod
+    def from_arrays(cls, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                    period: int = ADX_PERIOD) -> "_AdxState" | None:
+        """Replay the full history; ``None`` if it is too short to seed ADX."""
+        if len(close) < 2 * period:
+            return None
+        state = cls(period, high[0], low[0], close[0])
+        for i in range(1, period):
+            state._accumulate(high[i], low[i], close[i], smooth=False)
+        sum_dx = 0.0
+        for i in range(period, 2 * period):
+            state._accumulate(high[i], low[i], close[i], smooth=True)
+            dx = state._dx()
+            if not np.isnan(dx):
+                sum_dx += dx
+        state.adx = sum_dx / period
+        for i in range(2 * period, len(close)):
+            state.step(high[i], low[i], close[i])
+        return state
+
+    def step(self, high: float, low: float, close: float) -> float:
+        self._accumulate(high, low, close, smooth=True)
+        dx = self._dx()
+        if not np.isnan(dx):
+            self.adx = (self.adx * (self.period - 1) + dx) / self.period
+        return self.adx
+
+
+class _PairIndicatorState:
+    """Cached indicator columns plus recursive accumulators for one pair."""
+
+    __slots__ = ("window", "dates", "inputs", "columns", "ema", "atr", "atr_ema", "adx")
+
+    def __init__(self, window: int, dates: np.ndarray, inputs: dict, columns: dict,
+                 adx: _AdxState) -> None:
+        self.window = window
+        self.dates = dates
+        self.inputs = inputs
+        self.columns = columns
+        self.ema = columns["ema_200"][-1]
+        self.atr = columns["atr_pct"][-1] * inputs["close"][-1] / 100
+        self.atr_ema = columns["atr_ema"][-1]
+        self.adx = adx
+
+    def is_seeded(self) -> bool:
+        return not np.isnan([self.ema, self.atr, self.atr_ema, self.adx.adx]).any()
+
+
+class _IncrementalIndicators:
+    """
+    Per-pair incremental engine for the base-timeframe indicator block.
+
+    EMA, ATR, the ATR EMA and ADX are advanced from their recursive state;
+    windowed indicators are recomputed on the trailing window only.  Any
+    rewritten candle, gap or change of ``atr_window`` triggers a full
+    recompute through :func:`_populate_base_indicators`.
+    """
+
+    def __init__(self, timeframe: str) -> None:
+        self.candle = np.timedelta64(timeframe_to_seconds(timeframe), "s")
+        self.states: dict[str, _PairIndicatorState] = {}
+
+    def reset(self, pair: str | None = None) -> None:
+        if pair is None:
+            self.states.clear()
+        else:
+            self.states.pop(pair, None)
+
+    def update(self, pair: str, df: DataFrame, win: int) -> DataFrame:
+        dates = df["date"].to_numpy(dtype="datetime64[ns]")
+        inputs = _engine_inputs(df)
+        state = self.states.get(pair)
+        buf = self._extend(state, dates, inputs, win) if state is not None else None
+        if buf is None:
+            buf = self._full(pair, dates, inputs, win)
+        return _set_columns(df, buf)
+
+    def _align(self, cached_dates: np.ndarray, cached_inputs: dict, dates: np.ndarray,
+               inputs: dict) -> tuple[int, int] | None:
+        """
+        Locate ``dates`` inside the cached window.
+
+        Returns ``(start, overlap)``: the cached row matching ``dates[0]`` and
+        the number of rows shared with the cache.  ``None`` when the history
+        was rewritten, extended backwards or continues after a gap.
+        """
+        if len(dates) == 0:
+            return None
+        start = int(np.searchsorted(cached_dates, dates[0]))
+        if start >= len(cached_dates) or cached_dates[start] != dates[0]:
+            return None
+        overlap = len(cached_dates) - start
+        if overlap > len(dates) or dates[overlap - 1] != cached_dates[-1]:
+            return None
+        for col, values in inputs.items():
+            if not np.array_equal(values[:overlap], cached_inputs[col][start:], equal_nan=True):
+                return None
+        if overlap < len(dates) and (np.diff(dates[overlap - 1:]) != self.candle).any():
+            return None
+        return start, overlap
+
+    def _full(self, pair: str, dates: np.ndarray, inputs: dict, win: int) -> np.ndarray:
+        buf = _indicator_kernel(inputs["high"], inputs["low"], inputs["close"],
+                                inputs["quoteVolume"], win)
+        columns = dict(zip(BASE_INDICATOR_COLUMNS, buf))
+        adx = _AdxState.from_arrays(inputs["high"], inputs["low"], inputs["close"])
+        state = None
+        if adx is not None:
+            state = _PairIndicatorState(win, dates, inputs, columns, adx)
+        if state is not None and state.is_seeded():
+            self.states[pair] = state
+        else:
+            self.states.pop(pair, None)
+        return buf
+
+    def _extend(self, state: _PairIndicatorState, dates: np.ndarray, inputs: dict,
+                win: int) -> np.ndarray | None:
+        """Return the updated column buffer, or ``None`` when a full recompute is needed."""
+        if state.window != win:
+            return None
+        aligned = self._align(state.dates, state.inputs, dates, inputs)
+        if aligned is None:
+            return None
+        start, overlap = aligned
+        new = len(dates) - overlap
+
+        high, low, close = inputs["high"], inputs["low"], inputs["close"]
+        ema_k = 2.0 / (EMA_PERIOD + 1)
+        atr_k = 2.0 / (win + 1)
+        rec = {col: np.empty(new) for col in ("ema_200", "atr_pct", "atr_ema", "adx")}
+        for j, i in enumerate(range(overlap, len(dates))):
+            state.ema += (close[i] - state.ema) * ema_k
+            tr = _true_range(high[i], low[i], close[i - 1])
+            state.atr = (state.atr * (ATR_PERIOD - 1) + tr) / ATR_PERIOD
+            atr_pct = state.atr / close[i] * 100
+            state.atr_ema += (atr_pct - state.atr_ema) * atr_k
+            rec["ema_200"][j] = state.ema
+            rec["atr_pct"][j] = atr_pct
+            rec["atr_ema"][j] = state.atr_ema
+            rec["adx"][j] = state.adx.step(high[i], low[i], close[i])
+
+        buf = np.empty((len(BASE_INDICATOR_COLUMNS), len(dates)))
+        columns = dict(zip(BASE_INDICATOR_COLUMNS, buf))
+        for col, values in columns.items():
+            values[:overlap] = state.columns[col][start:]
+            values[overlap:] = rec[col] if col in rec else np.nan
+        if new:
+            # windowed indicators: recompute the trailing window plus the new rows
+            tail = min(len(dates), max(SLOPE_PERIOD, VOL_MA_PERIOD, win) + new)
+            window = dict(zip(BASE_INDICATOR_COLUMNS, np.empty((len(columns), tail))))
+            window["ema_200"][:] = columns["ema_200"][-tail:]
+            window["atr_pct"][:] = columns["atr_pct"][-tail:]
+            _window_indicators(window, high[-tail:], low[-tail:], close[-tail:],
+                               inputs["quoteVolume"][-tail:], win)
+            for col in ("sma_40", "slowk", "slowd", "atr_ema_std", "ema200_lrs", "vol_ma"):
+                columns[col][-new:] = window[col][-new:]
+            columns["atr_z"][-new:] = (
+                (columns["atr_pct"][-new:] - columns["atr_ema"][-new:])
+                / (columns["atr_ema_std"][-new:] + 1e-9)
+            )
+
+        state.dates = dates
+        state.inputs = inputs
+        state.columns = columns
+        return buf
+
+
+# bump when the stored columns or their computation change
+FEATURE_CACHE_VERSION = 1
+# segments per pair before they are compacted into one file
+FEATURE_CACHE_SEGMENTS = 32
+
+
+class _StoredFeatures:
+    """What the feature cache holds for one pair."""
+
+    __slots__ = ("path", "last", "segments", "state")
+
+    def __init__(self, path: str, last: np.datetime64, segments: int,
+                 state: _PairIndicatorState) -> None:
+        self.path = path
+        self.last = last
+        self.segments = segments
+        self.state = state
+
+
+class _FeatureStore:
+    """
+    On-disk cache of the base-timeframe indicator block, per pair.
+
+    Each ``(pair, timeframe, parameter hash)`` owns a directory of Feather
+    segments named by their last candle date; the engine inputs and
+    :data:`BASE_INDICATOR_COLUMNS` are stored, and the schema metadata of each
+    segment carries the recursive EMA/ATR/ADX state at its last row.
+    ``seed()`` memory-maps the segments into the incremental engine, so only
+    candles after the cached ones are computed; ``sync()`` appends those
+    candles as a new segment, or rewrites the directory after the engine fell
+    back to a full recompute.  Directories of other parameter hashes are
+    removed when a pair is first loaded.
+    """
+
+    def __init__(self, root: str, timeframe: str) -> None:
+        self.root = root
+        self.timeframe = timeframe
+        self.entries: dict[str, _StoredFeatures] = {}
+        self.loaded: set[str] = set()
+
+    @staticmethod
+    def param_hash(win: int) -> str:
+        params = {
+            "version": FEATURE_CACHE_VERSION,
+            "window": win,
+            "periods": [EMA_PERIOD, ATR_PERIOD, ADX_PERIOD, SLOPE_PERIOD, VOL_MA_PERIOD],
+            "inputs": _ENGINE_INPUTS,
+            "columns": BASE_INDICATOR_COLUMNS,
+        }
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+    def _prefix(self, pair: str) -> str:
+        return f"{pair.replace('/', '_').replace(':', '_')}-{self.timeframe}-"
+
+    def _path(self, pair: str, win: int) -> str:
+        return os.path.join(self.root, self._prefix(pair) + self.param_hash(win))
+
+    def _drop_stale(self, pair: str, keep: str) -> None:
+        if not os.path.isdir(self.root):
+            return
+        prefix = self._prefix(pair)
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(prefix) and path != keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def seed(self, engine: _IncrementalIndicators, pair: str, df: DataFrame, win: int,
+             strict: bool = False) -> None:
+        """
+        Load the cached state of ``pair`` into ``engine`` once per process.
+
+        ``strict`` (backtesting) only accepts a cache starting at the first
+        candle of ``df``, so results do not depend on earlier runs.
+        """
+        if pair in self.loaded or pair in engine.states:
+            return
+        self.loaded.add(pair)
+        path = self._path(pair, win)
+        self._drop_stale(pair, path)
+        try:
+            names = sorted(n for n in os.listdir(path) if n.endswith(".feather"))
+        except OSError:
+            return
+        if not names:
+            return
+        try:
+            tables = [feather.read_table(os.path.join(path, n), memory_map=True) for n in names]
+            arrays = {
+                name: np.concatenate([t.column(name).to_numpy() for t in tables])
+                if len(tables) > 1 else tables[0].column(name).to_numpy()
+                for name in ("date", *_ENGINE_INPUTS, *BASE_INDICATOR_COLUMNS)
+            }
+            meta = json.loads(tables[-1].schema.metadata[b"phoenix_state"])
+        except (OSError, KeyError, ValueError, pa.ArrowException) as e:
+            logger.warning("Dropping unreadable feature cache %s: %s", path, e)
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        dates = arrays["date"].astype("datetime64[ns]")
+        if strict and dates[0] != _utc64(df["date"].iloc[0]):
+            return
+        inputs = {col: arrays[col] for col in _ENGINE_INPUTS}
+        columns = {col: arrays[col] for col in BASE_INDICATOR_COLUMNS}
+        adx = _AdxState(ADX_PERIOD, inputs["high"][-1], inputs["low"][-1], inputs["close"][-1])
+        adx.plus_dm, adx.minus_dm, adx.tr, adx.adx = meta["adx"]
+        state = _PairIndicatorState(win, dates, inputs, columns, adx)
+        state.ema, state.atr, state.atr_ema = meta["ema"], meta["atr"], meta["atr_ema"]
+        engine.states[pair] = state
+        self.entries[pair] = _StoredFeatures(path, dates[-1], len(names), state)
+
+    def sync(self, engine: _IncrementalIndicators, pair: str) -> None:
+        """Persist the candles ``engine`` added for ``pair`` since the last sync."""
+        state = engine.states.get(pair)
+        if state is None:
+            return
+        entry = self.entries.get(pair)
+        start = 0
+        if entry is not None and entry.state is state:
+            if state.dates[-1] <= entry.last:
+                return
+            start = int(np.searchsorted(state.dates, entry.last, side="right"))
+            if start == 0 or state.dates[start - 1] != entry.last:
+                start = 0
+            elif entry.segments >= FEATURE_CACHE_SEGMENTS:
+                # compact the directory together with the new candles
+                start = 0
+        path = self._path(pair, state.window)
+        try:
+            if start == 0:
+                self._drop_stale(pair, "")
+            os.makedirs(path, exist_ok=True)
+            self._write(path, state, start)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("Could not write feature cache %s: %s", path, e)
+            self.entries.pop(pair, None)
+            return
+        segments = 1 if start == 0 else entry.segments + 1
+        self.entries[pair] = _StoredFeatures(path, state.dates[-1], segments, state)
+
+    @staticmethod
+    def _write(path: str, state: _PairIndicatorState, start: int) -> None:
+        adx = state.adx
+        meta = {
+            "ema": state.ema,
+            "atr": state.atr,
+            "atr_ema": state.atr_ema,
+            "adx": [adx.plus_dm, adx.minus_dm, adx.tr, adx.adx],
+        }
+        data = {"date": pa.array(state.dates[start:], type=pa.timestamp("ns"))}
+        data.update({col: state.inputs[col][start:] for col in _ENGINE_INPUTS})
+        data.update({col: state.columns[col][start:] for col in BASE_INDICATOR_COLUMNS})
+        table = pa.table(data).replace_schema_metadata({"phoenix_state": json.dumps(meta)})
+        name = Timestamp(state.dates[-1]).strftime("%Y%m%dT%H%M%S") + ".feather"
+        tmp = os.path.join(path, name + ".tmp")
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, os.path.join(path, name))
+
+
+def _frame_key(df: DataFrame, win: int) -> tuple:
+    """Identify the candles (and ``atr_window``) a frame was analyzed from."""
+    dates = df["date"]
+    return len(df), dates.iloc[0], dates.iloc[-1], win
+
+
+class _IndicatorPrefetch:
+    """
+    Per-pair indicator block for the whole whitelist, computed on a pool.
+
+    ``submit()`` fans the pairs out to ``workers`` threads or processes and
+    ``collect()`` waits for them; ``populate_indicators`` then takes a frame
+    only if it was built from the same candles and ``atr_window``.  Threads
+    share the incremental engine (TA-Lib releases the GIL in its kernels),
+    processes recompute the full history.  A failed pair, or a pool that
+    cannot start, leaves the analysis to the serial path.
+    """
+
+    def __init__(self, workers: int, executor: str = "thread") -> None:
+        self.workers = workers
+        self.executor = executor
+        self.pool = None
+        self.keys: dict[str, tuple] = {}
+        self.frames: dict[str, tuple[tuple, DataFrame]] = {}
+        self.pending: dict = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 1
+
+    def is_current(self, pair: str, key: tuple) -> bool:
+        return self.keys.get(pair) == key
+
+    def submit(self, jobs: dict[str, tuple[tuple, tuple]]) -> None:
+        """Start ``jobs``: ``pair -> (frame key, _pair_indicators arguments)``."""
+        try:
+            if self.pool is None:
+                cls = ProcessPoolExecutor if self.executor == "process" else ThreadPoolExecutor
+                self.pool = cls(max_workers=self.workers)
+            for pair, (key, args) in jobs.items():
+                self.pending[self.pool.submit(_pair_indicators, *args)] = (pair, key)
+                self.keys[pair] = key
+        except (BrokenExecutor, OSError, RuntimeError) as e:
+            logger.warning("Indicator prefetch unavailable, analyzing serially: %s", e)
+            self.close()
+
+    def collect(self) -> None:
+        for future, (pair, key) in self.pending.items():
+            try:
+                self.frames[pair] = (key, future.result())
+            except Exception as e:  # the serial path retries the pair
+                logger.warning("Indicator prefetch failed for %s, analyzing serially: %s",
+                               pair, e)
+                if isinstance(e, BrokenExecutor):
+                    self.close()
+        self.pending = {}
+
+    def take(self, pair: str, key: tuple) -> DataFrame | None:
+        entry = self.frames.pop(pair, None)
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1]
+
+    def close(self, wait: bool = False) -> None:
+        """Stop the pool; ``wait`` also waits for the workers that are still running."""
+        if self.pool is not None:
+            self.pool.shutdown(wait=wait, cancel_futures=True)
+        self.pool = None
+        self.pending = {}
+        self.keys.clear()
+
+
+# ---- Warm-up и ограниченная история ----------------------------------
+class _Warmup:
+    """History one indicator needs on its own timeframe before it is trusted."""
+
+    __slots__ = ("name", "timeframe", "lookback", "settle")
+
+    def __init__(self, name: str, timeframe: str, lookback: int, settle: int = 0) -> None:
+        self.name = name
+        self.timeframe = timeframe
+        # candles before the first value, then candles until the seed has faded
+        self.lookback = lookback
+        self.settle = settle
+
+    @property
+    def candles(self) -> int:
+        return self.lookback + self.settle
+
+
+def _settle(alpha: float, tolerance: float) -> int:
+    """Candles until a recursive smoother keeps less than ``tolerance`` weight on its seed."""
+    return int(np.ceil(np.log(tolerance) / np.log(1.0 - alpha)))
+
+
+class _WarmupPlan:
+    """
+    Minimal history of every indicator, per timeframe.
+
+    Recursive indicators (EMA, Wilder's ATR and ADX) need their TA-Lib
+    lookback plus the candles after which the seed's weight falls below
+    ``tolerance``; windowed ones only their window.  Chained indicators add
+    up.  Informative timeframes are converted to base candles, including the
+    candle the merge shifts them by, to give ``startup_candle_count``.
+    """
+
+    def __init__(self, timeframe: str, items: list[_Warmup], tolerance: float) -> None:
+        self.timeframe = timeframe
+        self.items = items
+        self.tolerance = tolerance
+
+    def candles(self, timeframe: str) -> int:
+        """Candles of ``timeframe`` to keep so its indicators are converged."""
+        return max((item.candles for item in self.items if item.timeframe == timeframe), default=0)
+
+    def timeframes(self) -> set[str]:
+        return {item.timeframe for item in self.items}
+
+    def _ratio(self, item: _Warmup) -> int:
+        return max(1, timeframe_to_minutes(item.timeframe) // timeframe_to_minutes(self.timeframe))
+
+    def base_candles(self, item: _Warmup) -> int:
+        ratio = self._ratio(item)
+        return item.candles if ratio == 1 else (item.candles + 1) * ratio
+
+    def startup_candles(self, limit: int | None = None) -> int:
+        need = max(self.base_candles(item) for item in self.items)
+        return need if limit is None else min(need, limit)
+
+    def base_need(self, timeframe: str) -> int:
+        """Base candles that converge the indicators of ``timeframe``."""
+        return max((self.base_candles(item) for item in self.items if item.timeframe == timeframe),
+                   default=0)
+
+    def timeframe_candles(self, limit: int | None = None) -> int:
+        """Startup when every timeframe is fetched with its own candles (live, dry-run)."""
+        need = max(item.candles + (self._ratio(item) > 1) for item in self.items)
+        return need if limit is None else min(need, limit)
+
+    def unconverged(self, startup: int) -> list[tuple[str, int, float]]:
+        """``(name, candles needed, seed weight left)`` of indicators ``startup`` cannot settle."""
+        out = []
+        for item in self.items:
+            need = self.base_candles(item)
+            if need <= startup:
+                continue
+            ratio = self._ratio(item)
+            own = startup if ratio == 1 else startup // ratio - 1
+            settled = own - item.lookback
+            weight = 1.0
+            if item.settle and settled > 0:
+                weight = self.tolerance ** (settled / item.settle)
+            out.append((item.name, need, weight))
+        return out
+
+
+def _plan_warmup(timeframe: str, high_tf: str, informative_tf: str, max_window: int,
+                 tolerance: float, btcd_lookback: int | None = None) -> _WarmupPlan:
+    """Warm-up of every indicator of the strategy for ``atr_window`` up to ``max_window``."""
+    ema = _settle(2.0 / (EMA_PERIOD + 1), tolerance)
+    atr = _settle(1.0 / ATR_PERIOD, tolerance)
+    atr_ema = _settle(2.0 / (max_window + 1), tolerance)
+    # ADX smooths DM/TR and then DX with Wilder's factor
+    adx = 2 * _settle(1.0 / ADX_PERIOD, tolerance)
+    items = [
+        _Warmup("ema_200", timeframe, EMA_PERIOD - 1, ema),
+        _Warmup("ema200_lrs", timeframe, EMA_PERIOD + SLOPE_PERIOD - 2, ema),
+        _Warmup("adx", timeframe, 2 * ADX_PERIOD - 1, adx),
+        _Warmup("atr_pct", timeframe, ATR_PERIOD, atr),
+        _Warmup("atr_z", timeframe, ATR_PERIOD + max_window - 1, atr + atr_ema),
+        _Warmup("slowk", timeframe, 17),
+        _Warmup("sma_40", timeframe, 39),
+        _Warmup("vol_ma", timeframe, VOL_MA_PERIOD - 1),
+        _Warmup("corr_btc_fast", timeframe, CORR_PERIOD),
+        _Warmup("ema_200_4h", high_tf, EMA_PERIOD - 1, ema),
+        _Warmup("ema_200_btc", informative_tf, EMA_PERIOD - 1, ema),
+    ]
+    if btcd_lookback:
+        items.append(_Warmup("close_btcd", informative_tf, btcd_lookback))
+    return _WarmupPlan(timeframe, items, tolerance)
+
+
+class _RingBuffer:
+    """
+    The last ``capacity`` candles of one pair and timeframe.
+
+    Every row is written twice, ``capacity`` slots apart, so the newest
+    candles are always one contiguous slice and appending never moves or
+    reallocates the history.
+    """
+
+    def __init__(self, capacity: int, columns: tuple[str, ...]) -> None:
+        self.capacity = capacity
+        self.columns = columns
+        self.dates = np.empty(2 * capacity, dtype="datetime64[ns]")
+        self.values = np.empty((len(columns), 2 * capacity))
+        self.size = 0
+        self.head = 0
+
+    def clear(self) -> None:
+        self.size = 0
+        self.head = 0
+
+    def append(self, dates: np.ndarray, values: np.ndarray) -> None:
+        """Append ``values`` of shape ``(len(columns), len(dates))``."""
+        if len(dates) >= self.capacity:
+            dates = dates[-self.capacity:]
+            values = values[:, -self.capacity:]
+            self.clear()
+        slots = (self.head + np.arange(len(dates))) % self.capacity
+        for offset in (0, self.capacity):
+            self.dates[slots + offset] = dates
+            self.values[:, slots + offset] = values
+        self.head = (self.head + len(dates)) % self.capacity
+        self.size = min(self.size + len(dates), self.capacity)
+
+    def view(self) -> tuple[np.ndarray, np.ndarray]:
+        """Dates and values, oldest first.  Only valid until the next ``append``."""
+        start = self.head + self.capacity - self.size
+        end = self.head + self.capacity
+        return self.dates[start:end], self.values[:, start:end]
+
+
+class _LiveHistory:
+    """
+    Bounded per-pair history analyzed in live and dry-run.
+
+    Freqtrade hands over its whole cached frame on every candle; only the
+    candles after the last buffered one are appended to a ring of the
+    planned size per timeframe.  Rewritten candles or gaps refill the ring
+    from the frame.
+    """
+
+    def __init__(self, capacities: dict[str, int]) -> None:
+        self.capacities = capacities
+        self.candles = {tf: np.timedelta64(timeframe_to_seconds(tf), "s") for tf in capacities}
+        self.rings: dict[tuple[str, str], _RingBuffer] = {}
+
+    def frame(self, pair: str, timeframe: str, df: DataFrame | None) -> DataFrame | None:
+        capacity = self.capacities.get(timeframe)
+        if capacity is None or df is None or len(df) <= capacity:
+            return df
+        columns = tuple(col for col in df.columns if col != "date")
+        ring = self.rings.get((pair, timeframe))
+        if ring is None or ring.columns != columns:
+            ring = self.rings[(pair, timeframe)] = _RingBuffer(capacity, columns)
+        dates = df["date"].to_numpy(dtype="datetime64[ns]")
+        start = self._resume(ring, timeframe, dates, df)
+        if start is None:
+            ring.clear()
+            start = 0
+        if start < len(dates):
+            new = np.stack([df[col].to_numpy(dtype=float)[start:] for col in columns])
+            ring.append(dates[start:], new)
+        ring_dates, values = ring.view()
+        out = DataFrame(values.T.copy(), columns=list(columns), copy=False)
+        date = DatetimeIndex(ring_dates)
+        if df["date"].dt.tz is not None:
+            date = date.tz_localize("UTC").tz_convert(df["date"].dt.tz)
+        out.insert(0, "date", date.as_unit(df["date"].dt.unit))
+        return out
+
+    def _resume(self, ring: _RingBuffer, timeframe: str, dates: np.ndarray,
+                df: DataFrame) -> int | None:
+        """First row of ``df`` after the buffered candles; ``None`` when they do not match."""
+        if ring.size == 0:
+            return None
+        ring_dates, values = ring.view()
+        last = int(np.searchsorted(dates, ring_dates[-1]))
+        if last >= len(dates) or dates[last] != ring_dates[-1]:
+            return None
+        overlap = min(ring.size, last + 1)
+        if not np.array_equal(dates[last + 1 - overlap:last + 1], ring_dates[-overlap:]):
+            return None
+        for col, row in zip(ring.columns, values):
+            cur = df[col].to_numpy(dtype=float)[last + 1 - overlap:last + 1]
+            if not np.array_equal(cur, row[-overlap:], equal_nan=True):
+                return None
+        if (np.diff(dates[last:]) != self.candles[timeframe]).any():
+            return None
+        return last + 1
+
+
+def _expand_history(full: DataFrame, df: DataFrame) -> DataFrame:
+    """Attach the columns computed on the bounded tail ``df`` to ``full``; older rows are NaN."""
+    if len(df) == len(full):
+        return df
+    names = tuple(col for col in df.columns if col not in full.columns)
+    values = df[list(names)].to_numpy()
+    dtype = values.dtype if values.dtype.kind == "f" else np.float64
+    buf = np.full((len(names), len(full)), np.nan, dtype=dtype)
+    buf[:, len(full) - len(df):] = values.T
+    return _set_columns(full, buf, names)
+
+
+# ---- Таймфреймы из базовых свечей ----------------------------------
+def _resample_ohlcv(dates: np.ndarray, values: np.ndarray, base: np.timedelta64,
+                    step: np.timedelta64) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Complete ``step`` candles from base candles; ``values`` rows are ``_RAW_COLUMNS``.
+
+    Buckets are aligned to the epoch like exchange candles.  A bucket is
+    only emitted when both its first and its last base candle are present,
+    so the still-forming candle (and a partial one at the start of the
+    history) never leaks into the merge.
+    """
+    if len(dates) == 0:
+        return dates[:0], values[:, :0]
+    bucket = dates.astype("datetime64[ns]").view("i8") // step.astype("timedelta64[ns]").astype("i8")
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    ends = np.append(starts[1:], len(dates)) - 1
+    bucket_dates = (bucket[starts] * step.astype("timedelta64[ns]").astype("i8")).view("datetime64[ns]")
+    complete = (dates[starts] == bucket_dates) & (dates[ends] == bucket_dates + step - base)
+    open_, high, low, close, volume = values
+    out = np.stack([
+        open_[starts],
+        np.maximum.reduceat(high, starts),
+        np.minimum.reduceat(low, starts),
+        close[ends],
+        np.add.reduceat(volume, starts),
+    ])
+    return bucket_dates[complete], out[:, complete]
+
+
+class _ResampleState:
+    """Derived candles of one pair and timeframe, and the base candle they end at."""
+
+    __slots__ = ("dates", "values", "last", "last_close", "frame")
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray, last: np.datetime64,
+                 last_close: float) -> None:
+        self.dates = dates
+        self.values = values
+        self.last = last
+        self.last_close = last_close
+        self.frame: DataFrame | None = None
+
+
+class _DerivedCandles:
+    """
+    DataProvider view that builds higher timeframes from the base candles.
+
+    ``get_pair_dataframe`` resamples the base feed instead of asking the
+    exchange for every timeframe.  Only base candles after the last complete
+    derived candle are aggregated on later calls; a rewritten or shorter
+    history starts over.  Up to ``keep`` derived candles per timeframe are
+    kept beyond the base history.  Every other request goes to ``dp``.
+    """
+
+    def __init__(self, timeframe: str, timeframes: tuple[str, ...],
+                 keep: dict[str, int] | None = None) -> None:
+        self.timeframe = timeframe
+        self.base = np.timedelta64(timeframe_to_seconds(timeframe), "s")
+        self.timeframes = timeframes
+        self.keep = keep or {}
+        self.dp = None
+        self.states: dict[tuple[str, str], _ResampleState] = {}
+
+    def bind(self, dp) -> _DerivedCandles:
+        self.dp = dp
+        return self
+
+    def get_pair_dataframe(self, pair: str, timeframe: str | None = None,
+                           candle_type: str = "") -> DataFrame:
+        if timeframe not in self.timeframes:
+            return self.dp.get_pair_dataframe(pair=pair, timeframe=timeframe)
+        base = self.dp.get_pair_dataframe(pair=pair, timeframe=self.timeframe)
+        if base is None or base.empty:
+            return DataFrame(columns=["date", *_RAW_COLUMNS])
+        state = self._update(pair, timeframe, base)
+        if state.frame is None:
+            frame = DataFrame(state.values.T.copy(), columns=list(_RAW_COLUMNS), copy=False)
+            date = DatetimeIndex(state.dates)
+            if base["date"].dt.tz is not None:
+                date = date.tz_localize("UTC").tz_convert(base["date"].dt.tz)
+            frame.insert(0, "date", date.as_unit(base["date"].dt.unit))
+            state.frame = frame
+        return state.frame
+
+    def _update(self, pair: str, timeframe: str, base: DataFrame) -> _ResampleState:
+        step = np.timedelta64(timeframe_to_seconds(timeframe), "s")
+        dates = base["date"].to_numpy(dtype="datetime64[ns]")
+        close = base["close"].to_numpy(dtype=float)
+        state = self.states.get((pair, timeframe))
+        start = 0
+        if state is not None:
+            pos = int(np.searchsorted(dates, state.last))
+            if pos < len(dates) and dates[pos] == state.last and close[pos] == state.last_close:
+                start = pos + 1
+            else:
+                state = None
+        if state is not None and start == len(dates):
+            return state
+        values = np.stack([base[col].to_numpy(dtype=float)[start:] for col in _RAW_COLUMNS])
+        new_dates, new_values = _resample_ohlcv(dates[start:], values, self.base, step)
+        if state is not None:
+            if not len(new_dates):
+                return state
+            new_dates = np.concatenate((state.dates, new_dates))
+            new_values = np.concatenate((state.values, new_values), axis=1)
+            # older derived candles than the base history, up to ``keep``
+            first = int(np.searchsorted(new_dates, dates[0]))
+            first = min(first, max(len(new_dates) - self.keep.get(timeframe, 0), 0))
+            new_dates, new_values = new_dates[first:], new_values[:, first:]
+        if len(new_dates):
+            last = new_dates[-1] + step - self.base
+            pos = int(np.searchsorted(dates, last))
+            state = _ResampleState(new_dates, new_values, last, close[pos])
+        else:
+            # nothing complete yet: start over on the next call
+            state = _ResampleState(new_dates, new_values, np.datetime64("NaT"), np.nan)
+        self.states[(pair, timeframe)] = state
+        return state
+
+
+# ---- BTC/USDT informative features ---------------------------------
+class _BtcRow:
+    """BTC features of one closed candle, as read by the trade callbacks."""
+
+    __slots__ = ("close", "ema_200", "drop3h", "drop30m", "vol_spike", "crash")
+
+    def __init__(self, close: float, ema_200: float, drop3h: float, drop30m: float,
+                 vol_spike: bool) -> None:
+        self.close = close
+        self.ema_200 = ema_200
+        self.drop3h = drop3h
+        self.drop30m = drop30m
+        self.vol_spike = vol_spike
+        # BTC protection that fires whatever the pair's volatility
+        self.crash = False
+
+    def set_crash(self, drop3h_exit: float, drop30m_exit: float) -> None:
+        self.crash = bool(
+            self.close < self.ema_200
+            or self.drop3h < drop3h_exit
+            or (self.drop30m < drop30m_exit and self.vol_spike)
+        )
+
+    def protects(self, dynamic_drop: float) -> bool:
+        """``btc_protect`` for a pair whose ATR allows drops down to ``dynamic_drop``."""
+        return self.crash or self.drop3h < dynamic_drop or (
+            self.drop30m < dynamic_drop / 2 and self.vol_spike
+        )
+
+
+class _BtcFeatureCache:
+    """
+    BTC/USDT informative features, built once per candle and shared read-only.
+
+    The 1h frame (with EMA‑200) and the fast frame are merged onto the BTC
+    ``btc_fast_tf`` timeline a single time; every pair then attaches the
+    result with a plain date join and the callbacks look rows up by time.
+    """
+
+    def __init__(self, pair: str, timeframe: str, hour_tf: str, fast_tf: str) -> None:
+        self.pair = pair
+        self.timeframe = timeframe
+        self.hour_tf = hour_tf
+        self.fast_tf = fast_tf
+        self.candle = np.timedelta64(timeframe_to_seconds(timeframe), "s")
+        self.key = None
+        self.frame: DataFrame | None = None
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.values: dict[str, np.ndarray] = {}
+
+    def refresh(self, dp, last_date) -> DataFrame | None:
+        """Rebuild when a newer candle than the cached one is requested."""
+        if self.key is None or last_date > self.key:
+            self.key = last_date
+            self._build(dp)
+        return self.frame
+
+    def _build(self, dp) -> None:
+        self.frame = None
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.values = {}
+        btc_fast = dp.get_pair_dataframe(pair=self.pair, timeframe=self.fast_tf)
+        if btc_fast is None or len(btc_fast) <= 3:
+            return
+        frame = btc_fast[["date"]]
+        btc_hour = dp.get_pair_dataframe(pair=self.pair, timeframe=self.hour_tf)
+        if btc_hour is not None and len(btc_hour) > 20:
+            if "ema_200" not in btc_hour.columns:
+                btc_hour = btc_hour.assign(
+                    ema_200=talib.EMA(btc_hour["close"].to_numpy(dtype=float), EMA_PERIOD)
+                )
+            frame = _merge_informative(frame, btc_hour, self.timeframe, self.hour_tf, "btc")
+        frame = _merge_informative(frame, btc_fast, self.timeframe, self.fast_tf, "btc_fast")
+
+        features = {}
+        if "close_btc" in frame.columns:
+            features["btc_drop3h"] = frame["close_btc"] / frame["close_btc"].shift(3) - 1
+            features["btc_drop30m"] = frame["close_btc"] / frame["close_btc_fast"].shift(2) - 1
+        vol = None
+        if "volume_btc_fast" in frame.columns:
+            vol = frame["volume_btc_fast"]
+        elif "quoteVolume_btc_fast" in frame.columns:
+            vol = frame["quoteVolume_btc_fast"]
+        if vol is not None:
+            vol = vol.fillna(0)
+            features["btc_volume"] = vol
+            features["btc_vol_ma"] = vol.rolling(8).mean()
+            features["btc_vol_spike"] = vol > features["btc_vol_ma"] * 3
+
+        self.dates = frame["date"].to_numpy(dtype="datetime64[ns]")
+        self.values = {
+            col: frame[col].to_numpy(dtype=float)
+            for col in ("close_btc", "ema_200_btc", "close_btc_fast")
+            if col in frame.columns
+        }
+        self.values.update({col: ser.to_numpy(dtype=float) for col, ser in features.items()})
+        self.frame = frame
+
+    def attach(self, df: DataFrame) -> DataFrame:
+        """
+        Join the shared columns onto ``df`` by date; zero-copy for the same
+        candles.  A missing BTC candle repeats the previous one, as the
+        forward-filled informative merge did.
+        """
+        columns = [col for col in self.frame.columns if col != "date"]
+        return _attach_informative(df, self.frame, columns, columns,
+                                   np.timedelta64(0, "m"), ffill=True)
+
+    def index(self, current_time: datetime) -> int:
+        """Row of the last candle closed at ``current_time``; -1 when there is none."""
+        when = _utc64(current_time) - self.candle
+        return int(np.searchsorted(self.dates, when, side="right")) - 1
+
+    def at(self, current_time: datetime) -> _BtcRow | None:
+        """Features of the last candle closed at ``current_time``, if complete."""
+        if not {"ema_200_btc", "btc_drop3h"}.issubset(self.values):
+            return None
+        idx = self.index(current_time)
+        if idx < 0:
+            return None
+        row = {col: arr[idx] for col, arr in self.values.items()}
+        if np.isnan([row["close_btc"], row["ema_200_btc"], row["close_btc_fast"],
+                     row["btc_drop3h"], row["btc_drop30m"]]).any():
+            return None
+        return _BtcRow(
+            row["close_btc"],
+            row["ema_200_btc"],
+            row["btc_drop3h"],
+            row["btc_drop30m"],
+            bool(row.get("btc_vol_spike", 0.0)),
+        )
+
+
+class _BtcMonitor:
+    """
+    BTC crash state, evaluated once per bot loop and read by every trade.
+
+    The closed-candle features come from :class:`_BtcFeatureCache`.  In live
+    and dry-run ``update`` may also get the latest BTC price and the volume
+    traded so far in the forming candle.  The price is then treated as the
+    close of the forming candle: its drops and volume spike are computed
+    like the closed ones and the worse of the two is kept.  A crash then
+    shows within one throttle cycle instead of at the next candle close.
+    Live callbacks reuse that state for at most ``max_age`` and never past
+    the close of its base candle; an older one is rebuilt from the closed
+    candles.
+    """
+
+    def __init__(self, features: _BtcFeatureCache, max_age: timedelta) -> None:
+        self.features = features
+        self.max_age = max_age
+        self.time: datetime | None = None
+        self.row: _BtcRow | None = None
+
+    def update(self, current_time: datetime, drop3h_exit: float, drop30m_exit: float,
+               price: float | None = None, volume: float | None = None) -> _BtcRow | None:
+        row = self.features.at(current_time)
+        if row is not None and price is not None and price > 0:
+            self._forming(row, self.features.index(current_time), price, volume)
+        if row is not None:
+            row.set_crash(drop3h_exit, drop30m_exit)
+        self.time = current_time
+        self.row = row
+        return row
+
+    def get(self, current_time: datetime, drop3h_exit: float, drop30m_exit: float,
+            live: bool) -> _BtcRow | None:
+        """The published state; live callbacks run after the loop's update."""
+        if current_time == self.time or (live and self._fresh(current_time)):
+            return self.row
+        return self.update(current_time, drop3h_exit, drop30m_exit)
+
+    def _fresh(self, current_time: datetime) -> bool:
+        if self.time is None or current_time - self.time > self.max_age:
+            return False
+        timeframe = self.features.timeframe
+        return (timeframe_to_prev_date(timeframe, current_time)
+                == timeframe_to_prev_date(timeframe, self.time))
+
+    def _forming(self, row: _BtcRow, idx: int, price: float, volume: float | None) -> None:
+        values = self.features.values
+        # the forming candle is row ``idx + 1``: shift(3) and shift(2) of it
+        if idx >= 2:
+            row.drop3h = min(row.drop3h, price / values["close_btc"][idx - 2] - 1)
+        if idx >= 1:
+            row.drop30m = min(row.drop30m, price / values["close_btc_fast"][idx - 1] - 1)
+        row.close = min(row.close, price)
+        closed = values.get("btc_volume")
+        if volume is not None and closed is not None and idx >= 6:
+            # spike once the forming volume alone exceeds 3x the 8-candle mean
+            mean = (np.nansum(closed[idx - 6:idx + 1]) + volume) / 8
+            row.vol_spike = row.vol_spike or volume > mean * 3
+
+
+class _RowBuffer:
+    """
+    The newest rows of a growing array, at least ``keep`` of them.
+
+    Rows are appended at the end of the storage; once it is full the last
+    ``keep`` rows move to the start of storage twice that size, so appends
+    cost O(row) amortized and ``view()`` is always one contiguous slice.
+    """
+
+    def __init__(self, values: np.ndarray, keep: int) -> None:
+        self.data = values
+        self.size = len(values)
+        self.keep = keep
+
+    def append(self, rows: np.ndarray) -> None:
+        if self.size + len(rows) > len(self.data):
+            keep = min(self.size, self.keep)
+            data = np.empty((max(2 * self.keep, keep + len(rows)), *self.data.shape[1:]),
+                            dtype=self.data.dtype)
+            data[:keep] = self.data[self.size - keep:self.size]
+            self.data, self.size = data, keep
+        self.data[self.size:self.size + len(rows)] = rows
+        self.size += len(rows)
+
+    def view(self) -> np.ndarray:
+        """The buffered rows, oldest first.  Only valid until the next ``append``."""
+        return self.data[:self.size]
+
+
+def _close_tail(dp, pair: str, timeframe: str, rows: int | None = None
+                ) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Dates and closes of the last ``rows`` candles of ``pair`` (all if None).
+
+    Live and dry-run read Freqtrade's cached frame without the copy
+    ``get_pair_dataframe`` makes.
+    """
+    if dp.runmode in (RunMode.LIVE, RunMode.DRY_RUN) and hasattr(dp, "ohlcv"):
+        df = dp.ohlcv(pair, timeframe, copy=False)
+    else:
+        df = dp.get_pair_dataframe(pair=pair, timeframe=timeframe)
+    if df is None or len(df) == 0:
+        return None
+    if rows is not None:
+        df = df.iloc[-rows:]
+    return df["date"].to_numpy(dtype="datetime64[ns]"), df["close"].to_numpy(dtype=float)
+
+
+class _CorrelationMatrix:
+    """
+    Rolling correlations of the whole whitelist against BTC/USDT.
+
+    Close returns of every whitelisted pair are aligned onto the BTC timeline
+    and buffered as a ``(candles, pairs)`` matrix next to the BTC returns and
+    the correlations, as far back as the BTC history goes.  The window sums
+    of every pair (count, Σx, Σy, Σxy, Σx², Σy²) are kept too: a new BTC
+    candle adds its row, drops the row leaving the window and costs
+    O(pairs).  A changed whitelist or rewritten candles rebuild everything
+    with one batched :func:`_rolling_corr` pass.  Pair‑vs‑pair correlations
+    are derived from the buffered returns on demand.
+    """
+
+    def __init__(self, timeframe: str, window: int = CORR_PERIOD) -> None:
+        self.timeframe = timeframe
+        self.window = window
+        self.candle = np.timedelta64(timeframe_to_seconds(timeframe), "s")
+        self.key = None
+        self.whitelist: tuple[str, ...] = ()
+        self.pairs: dict[str, int] = {}
+        # last candle (date, close) seen of BTC and of every pair, to detect rewrites
+        self.btc_last: tuple[np.datetime64, float] | None = None
+        self.last: dict[str, tuple[np.datetime64, float]] = {}
+        self.sums = np.zeros((6, 0))
+        self._dates: _RowBuffer | None = None
+        # column 0 holds the BTC returns, then one column per pair
+        self._returns: _RowBuffer | None = None
+        self._corr: _RowBuffer | None = None
+
+    @property
+    def dates(self) -> np.ndarray:
+        if self._dates is None:
+            return np.array([], dtype="datetime64[ns]")
+        return self._dates.view()
+
+    @property
+    def returns(self) -> np.ndarray:
+        if self._returns is None:
+            return np.empty((0, 0))
+        return self._returns.view()[:, 1:]
+
+    @property
+    def btc(self) -> np.ndarray:
+        if self._corr is None:
+            return np.empty((0, 0))
+        return self._corr.view()
+
+    def refresh(self, dp, btc: _BtcFeatureCache) -> None:
+        """Advance to a new BTC candle; rebuild for a changed whitelist or history."""
+        whitelist = tuple(dp.current_whitelist())
+        key = (btc.key, whitelist)
+        if key == self.key:
+            return
+        self.key = key
+        if btc.frame is None or len(btc.dates) == 0:
+            self.pairs = {}
+            self.last = {}
+            self.btc_last = None
+            self._dates = self._returns = self._corr = None
+            return
+        if whitelist != self.whitelist or not self._advance(dp, btc):
+            self._rebuild(dp, btc, whitelist)
+
+    def _rebuild(self, dp, btc: _BtcFeatureCache, whitelist: tuple[str, ...]) -> None:
+        self.whitelist = whitelist
+        self.pairs = {}
+        self.last = {}
+        dates = btc.dates
+        btc_close = btc.values["close_btc_fast"]
+        self.btc_last = (dates[-1], btc_close[-1])
+        columns = [_returns(btc_close)]
+        for pair in whitelist:
+            closes = _close_tail(dp, pair, self.timeframe)
+            if closes is None:
+                continue
+            self.pairs[pair] = len(columns) - 1
+            self.last[pair] = (closes[0][-1], closes[1][-1])
+            columns.append(self._align(dates, closes[0], _returns(closes[1])))
+        returns = np.column_stack(columns)
+        corr = _rolling_corr(returns[:, 0], returns[:, 1:], self.window)
+        tail = returns[-self.window:]
+        self.sums = _corr_terms(tail[:, 0], tail[:, 1:]).sum(axis=1)
+        keep = max(len(dates), self.window)
+        self._dates = _RowBuffer(dates.copy(), keep)
+        self._returns = _RowBuffer(returns, keep)
+        self._corr = _RowBuffer(corr, keep)
+
+    def _advance(self, dp, btc: _BtcFeatureCache) -> bool:
+        """Append the BTC candles after the buffered ones; False when a rebuild is needed."""
+        if self._dates is None:
+            return False
+        last_date, last_close = self.btc_last
+        dates = btc.dates
+        btc_close = btc.values["close_btc_fast"]
+        pos = int(np.searchsorted(dates, last_date, side="right"))
+        if pos == 0 or dates[pos - 1] != last_date or btc_close[pos - 1] != last_close:
+            return False
+        new_dates = dates[pos:]
+        new = len(new_dates)
+        if new == 0:
+            return True
+        if new > self.window:
+            return False
+
+        rows = np.full((new, len(self.pairs) + 1), np.nan)
+        rows[:, 0] = btc_close[pos:] / btc_close[pos - 1:-1] - 1
+        for pair, idx in self.pairs.items():
+            # the pair's new candles plus the one its next return starts from
+            closes = _close_tail(dp, pair, self.timeframe, new + 3)
+            if closes is None:
+                return False
+            pair_dates, close = closes
+            seen, seen_close = self.last[pair]
+            at = int(np.searchsorted(pair_dates, seen))
+            if at == len(pair_dates) or pair_dates[at] != seen or close[at] != seen_close:
+                return False
+            self.last[pair] = (pair_dates[-1], close[-1])
+            rows[:, idx + 1] = self._align(new_dates, pair_dates[1:], close[1:] / close[:-1] - 1)
+        for pair in self.whitelist:
+            if pair not in self.pairs and _close_tail(dp, pair, self.timeframe, 1) is not None:
+                return False
+
+        # rows leaving the window; missing ones (short history) add nothing
+        old = self._returns.view()
+        leaving = np.full((new, old.shape[1]), np.nan)
+        first = len(old) - self.window
+        src = np.arange(first, first + new)
+        ok = (src >= 0) & (src < len(old))
+        leaving[ok] = old[src[ok]]
+        added = _corr_terms(rows[:, 0], rows[:, 1:])
+        removed = _corr_terms(leaving[:, 0], leaving[:, 1:])
+        sums = self.sums[:, None] + np.cumsum(added - removed, axis=1)
+        self.sums = sums[:, -1]
+
+        self.btc_last = (dates[-1], btc_close[-1])
+        self._dates.append(new_dates)
+        self._returns.append(rows)
+        self._corr.append(_corr_from_sums(sums, self.window))
+        return True
+
+    @staticmethod
+    def _align(timeline: np.ndarray, dates: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Place ``values`` on ``timeline``; missing candles are NaN."""
+        out = np.full(len(timeline), np.nan)
+        pos = np.searchsorted(timeline, dates)
+        hit = pos < len(timeline)
+        hit[hit] = timeline[pos[hit]] == dates[hit]
+        out[pos[hit]] = values[hit]
+        return out
+
+    def _row(self, when: np.datetime64) -> int:
+        return int(np.searchsorted(self.dates, when, side="right")) - 1
+
+    def column(self, pair: str, dates) -> np.ndarray | None:
+        """BTC correlation of ``pair`` on its own ``dates``; ``None`` if not tracked."""
+        idx = self.pairs.get(pair)
+        if idx is None:
+            return None
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        timeline = self.dates
+        out = np.zeros(len(dates))
+        pos = np.searchsorted(timeline, dates)
+        hit = pos < len(timeline)
+        hit[hit] = timeline[pos[hit]] == dates[hit]
+        out[hit] = self.btc[pos[hit], idx]
+        return out
+
+    def pair_matrix(self, current_time: datetime) -> tuple[list[str], np.ndarray]:
+        """Pair‑vs‑pair correlations over the window closed at ``current_time``."""
+        pairs = list(self.pairs)
+        when = _utc64(current_time) - self.candle
+        end = self._row(when) + 1
+        if end < self.window or not pairs:
+            return pairs, np.zeros((len(pairs), len(pairs)))
+        block = self.returns[end - self.window:end]
+        complete = ~np.isnan(block).any(axis=0)
+        block = block - np.nanmean(block, axis=0)
+        block[:, ~complete] = 0.0
+        cov = block.T @ block
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        return pairs, np.nan_to_num(corr, nan=0.0, posinf=0.0, neginf=0.0)
+
+    def correlated_with(self, pair: str, others: list[str], current_time: datetime,
+                        threshold: float) -> int:
+        """Number of ``others`` correlated with ``pair`` above ``threshold``."""
+        pairs, corr = self.pair_matrix(current_time)
+        if pair not in self.pairs:
+            return 0
+        row = corr[pairs.index(pair)]
+        return sum(1 for other in others if other in self.pairs
+                   and other != pair and row[pairs.index(other)] > threshold)
+
+
+# ---- Стаканы и тикеры -------------------------------------------------
+def _book_levels(levels) -> np.ndarray:
+    """``[[price, amount, ...], ...]`` as a ``(levels, 2)`` float array."""
+    if not levels:
+        return np.empty((0, 2))
+    return np.array([level[:2] for level in levels], dtype=float)
+
+
+class _BookSnapshot:
+    """Last price and the top of the order book of one pair, fetched at ``time``."""
+
+    __slots__ = ("time", "last", "bids", "asks")
+
+    def __init__(self, time: float, last: float | None, bids: np.ndarray,
+                 asks: np.ndarray) -> None:
+        self.time = time
+        self.last = last
+        self.bids = bids
+        self.asks = asks
+
+    def depth(self, side: str, band: float) -> float:
+        """Quote notional on ``side`` ("bids" or "asks") within ``band`` of the best price."""
+        levels = self.asks if side == "asks" else self.bids
+        if not len(levels):
+            return 0.0
+        price, amount = levels[:, 0], levels[:, 1]
+        if side == "asks":
+            within = price <= price[0] * (1 + band)
+        else:
+            within = price >= price[0] * (1 - band)
+        return float(price[within] @ amount[within])
+
+
+class _MarketSnapshots:
+    """
+    Tickers and top-``depth`` order books of the pairs with open trades.
+
+    ``refresh()`` runs once per bot loop and fetches every pair whose snapshot
+    is older than ``ttl`` seconds in one concurrent step on ``workers``
+    threads, so the callbacks never wait on the exchange.  ``source`` is
+    anything with the DataProvider's ``ticker(pair)`` and
+    ``orderbook(pair, maximum)``: the bot's DataProvider, or a local stub.
+    A pair whose fetch fails has no snapshot until the next successful one.
+    """
+
+    def __init__(self, depth: int, ttl: float, workers: int) -> None:
+        self.depth = depth
+        self.ttl = ttl
+        self.workers = workers
+        self.pool = None
+        self.books: dict[str, _BookSnapshot] = {}
+
+    def refresh(self, source, pairs, now: float | None = None) -> None:
+        now = monotonic() if now is None else now
+        stale = [
+            pair for pair in dict.fromkeys(pairs)
+            if pair not in self.books or now - self.books[pair].time >= self.ttl
+        ]
+        if not stale:
+            return
+        if self.workers > 1 and len(stale) > 1:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.workers)
+            fetched = list(self.pool.map(lambda pair: self._fetch(source, pair, now), stale))
+        else:
+            fetched = [self._fetch(source, pair, now) for pair in stale]
+        for pair, book in zip(stale, fetched):
+            if book is None:
+                self.books.pop(pair, None)
+            else:
+                self.books[pair] = book
+
+    def _fetch(self, source, pair: str, now: float) -> _BookSnapshot | None:
+        try:
+            book = source.orderbook(pair, self.depth)
+            ticker = source.ticker(pair)
+        except Exception as e:  # callbacks fall back to ``current_rate`` only
+            logger.warning("Order book snapshot failed for %s: %s", pair, e)
+            return None
+        last = ticker.get("last") if ticker else None
+        return _BookSnapshot(now, last, _book_levels(book.get("bids")),
+                             _book_levels(book.get("asks")))
+
+    def get(self, pair: str) -> _BookSnapshot | None:
+        return self.books.get(pair)
+
+    def close(self, wait: bool = False) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=wait, cancel_futures=True)
+        self.pool = None
+
+
+# ---- Снимки для колбэков --------------------------------------------
+def _atr_compressed(atr_z: np.ndarray, win: int) -> np.ndarray:
+    """Per-candle ``atr_compression`` flag: atr_z < 0 for the last 6 candles."""
+    below = np.concatenate([[0], np.cumsum(atr_z < 0)])
+    rows = np.arange(len(atr_z))
+    return (rows + 1 > max(6, win)) & (below[rows + 1] - below[np.maximum(rows - 5, 0)] == 6)
+
+
+class _CandleSnapshot:
+    """Values of one analyzed candle read by the trade callbacks."""
+
+    __slots__ = ("date", "atr_pct", "atr_compressed")
+
+    def __init__(self, date: np.datetime64, atr_pct: float, atr_compressed: bool) -> None:
+        self.date = date
+        self.atr_pct = atr_pct
+        self.atr_compressed = atr_compressed
+
+
+class _SnapshotStore:
+    """
+    Per-pair callback snapshots, captured once when the pair is analyzed.
+
+    Live and dry-run keep only the last candle.  Backtesting analyzes the whole
+    history up front, so the columns are kept and the candle closed at
+    ``current_time`` is looked up to avoid lookahead.
+    """
+
+    def __init__(self, timeframe: str) -> None:
+        self.candle = np.timedelta64(timeframe_to_seconds(timeframe), "s")
+        self.series: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self.last: dict[str, tuple[int, _CandleSnapshot]] = {}
+
+    def update(self, pair: str, df: DataFrame, win: int, last_only: bool) -> None:
+        keep = 1 if last_only else len(df)
+        self.put(
+            pair,
+            df["date"].to_numpy(dtype="datetime64[ns]")[-keep:],
+            df["atr_pct"].to_numpy(dtype=float)[-keep:],
+            _atr_compressed(df["atr_z"].to_numpy(dtype=float), win)[-keep:],
+        )
+
+    def put(self, pair: str, dates: np.ndarray, atr_pct: np.ndarray,
+            compressed: np.ndarray) -> None:
+        self.series[pair] = (dates, atr_pct, compressed)
+        self.last.pop(pair, None)
+
+    def get(self, pair: str, current_time: datetime) -> _CandleSnapshot | None:
+        series = self.series.get(pair)
+        if series is None:
+            return None
+        dates, atr_pct, compressed = series
+        row = int(np.searchsorted(dates, _utc64(current_time) - self.candle, side="right")) - 1
+        if row < 0:
+            return None
+        cached = self.last.get(pair)
+        if cached is not None and cached[0] == row:
+            return cached[1]
+        snap = _CandleSnapshot(dates[row], atr_pct[row], bool(compressed[row]))
+        self.last[pair] = (row, snap)
+        return snap
+
+
+# ---- Hyperopt: общие массивы для всех эпох -----------------------------
+def _atr_z_bank(atr_pct: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    """
+    ``atr_z`` for every ``atr_window`` in ``windows``, one column per window.
+
+    The rolling std of all windows comes from a single :func:`_rolling_std`
+    pass; the EMA is recursive and is taken from TA-Lib per window, exactly
+    as in the full path.
+    """
+    std = _rolling_std(atr_pct, windows)
+    ema = np.column_stack([talib.EMA(atr_pct, int(w)) for w in windows])
+    return (atr_pct[:, None] - ema) / (std + 1e-9)
+
+
+class _HyperoptBank:
+    """
+    Per-pair arrays shared by every hyperopt epoch.
+
+    ``atr_window`` is optimized although ``atr_z`` is built in
+    ``populate_indicators``, which hyperopt runs only once.  The bank keeps
+    ``atr_z`` for the whole window range as one 2D array, plus the
+    parameter-free parts of the entry and exit conditions, so an epoch only
+    picks a column and evaluates the threshold masks.  The mask helpers take
+    several parameter sets at once and return one row per set.
+    """
+
+    __slots__ = ("dates", "windows", "atr_pct", "atr_z", "adx", "adx_max6",
+                 "quote_volume", "vol_ma", "entry_base", "exit_base")
+
+    def __init__(self, df: DataFrame, windows) -> None:
+        self.dates = df["date"].to_numpy(dtype="datetime64[ns]")
+        self.windows = np.asarray(list(windows), dtype=np.int64)
+        self.atr_pct = df["atr_pct"].to_numpy(dtype=float)
+        self.atr_z = _atr_z_bank(self.atr_pct, self.windows)
+        self.adx = df["adx"].to_numpy(dtype=float)
+        self.adx_max6 = df["adx"].rolling(6).max().to_numpy(dtype=float)
+        self.quote_volume = df["quoteVolume"].to_numpy(dtype=float)
+        self.vol_ma = df["vol_ma"].to_numpy(dtype=float)
+
+        close = df["close"].to_numpy(dtype=float)
+        ema_200 = df["ema_200"].to_numpy(dtype=float)
+        slowk = df["slowk"].to_numpy(dtype=float)
+        slowd = df["slowd"].to_numpy(dtype=float)
+        prev_k = np.concatenate([[np.nan], slowk[:-1]])
+        prev_d = np.concatenate([[np.nan], slowd[:-1]])
+        with np.errstate(invalid="ignore"):
+            self.entry_base = (
+                (df["ema200_lrs"].to_numpy(dtype=float) > 0.0006)
+                & (close > ema_200)
+                & (close < df["sma_40"].to_numpy(dtype=float))
+                & (slowk > slowd)
+                & (prev_k <= prev_d)
+            )
+            self.exit_base = (slowk < slowd) | (close < ema_200)
+
+    def view(self, dates) -> _HyperoptBank | None:
+        """The bank restricted to ``dates``, e.g. after hyperopt trimmed the frame."""
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        if not len(dates):
+            return None
+        start = int(np.searchsorted(self.dates, dates[0]))
+        stop = start + len(dates)
+        if stop > len(self.dates) or self.dates[start] != dates[0] or self.dates[stop - 1] != dates[-1]:
+            return None
+        if start == 0 and stop == len(self.dates):
+            return self
+        part = object.__new__(_HyperoptBank)
+        for name in self.__slots__:
+            value = getattr(self, name)
+            setattr(part, name, value if name == "windows" else value[start:stop])
+        return part
+
+    def column(self, win: int) -> int:
+        idx = int(np.searchsorted(self.windows, win))
+        if idx >= len(self.windows) or self.windows[idx] != win:
+            raise KeyError(f"atr_window {win} is not in the precomputed range")
+        return idx
+
+    def entry_masks(self, adx_min, atr_z_min, vol_rel_min, windows) -> np.ndarray:
+        """Threshold part of the entry condition, shape ``(parameter sets, candles)``."""
+        adx_min, atr_z_min, vol_rel_min = (
+            np.asarray(v, dtype=float)[:, None] for v in (adx_min, atr_z_min, vol_rel_min)
+        )
+        cols = [self.column(int(w)) for w in windows]
+        with np.errstate(invalid="ignore"):
+            return (
+                (self.adx[None, :] > adx_min)
+                & (self.atr_z[:, cols].T > atr_z_min)
+                & (self.quote_volume[None, :] > self.vol_ma[None, :] * vol_rel_min)
+            )
+
+    def flat_masks(self, flat_adx_max) -> np.ndarray:
+        """``low_adx`` exit condition, shape ``(parameter sets, candles)``."""
+        with np.errstate(invalid="ignore"):
+            return self.adx_max6[None, :] < np.asarray(flat_adx_max, dtype=float)[:, None]
+
+
+class _TradeState:
+    """Trade attributes read by the callbacks, cached for one bot loop."""
+
+    __slots__ = ("key", "has_open_orders", "adjustments", "entry_price", "stake_amount",
+                 "is_short", "leverage")
+
+    def __init__(self, trade: Trade, key: tuple) -> None:
+        self.key = key
+        self.has_open_orders = trade.has_open_orders
+        self.adjustments = max(trade.nr_of_successful_entries - 1, 0)
+        self.entry_price = trade.open_rate
+        self.stake_amount = trade.stake_amount
+        self.is_short = getattr(trade, "is_short", False)
+        self.leverage = getattr(trade, "leverage", 1.0) or 1.0
+
+
+# ---- Ступенчатый стоп-лосс и ROI -----------------------------------------
+def _stoploss_from_open(open_relative_stop, current_profit, is_short: bool = False,
+                        leverage: float = 1.0) -> np.ndarray:
+    """Vectorized :func:`freqtrade.strategy.stoploss_from_open`."""
+    profit = np.asarray(current_profit, dtype=float) / leverage
+    stop = np.asarray(open_relative_stop, dtype=float) / leverage
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if is_short:
+            value = -1 + (1 - stop) / (1 - profit)
+            undefined = profit == 1
+        else:
+            value = 1 - (1 + stop) / (1 + profit)
+            undefined = profit == -1
+    return np.where(undefined, 1.0, np.maximum(value * leverage, 0.0))
+
+
+class _StoplossLadder:
+    """
+    The stepped stoploss of ``custom_stoploss``, sorted once per parameter set.
+
+    A profit uses the highest level it exceeds (the larger stop on equal
+    levels, like a reverse-sorted scan); below the first level the base stop
+    applies, ``dca_base`` once the trade was averaged down.  :meth:`stop`
+    serves one callback, :meth:`stops` whole profit paths.
+    """
+
+    def __init__(self, profits, stops, base: float, dca_base: float) -> None:
+        order = np.lexsort((stops, profits))
+        self.levels = np.asarray(profits, dtype=float)[order]
+        self.values = np.asarray(stops, dtype=float)[order]
+        self.base = base
+        self.dca_base = dca_base
+        # bisect on a short list is cheaper than a NumPy call per callback
+        self._levels = self.levels.tolist()
+        self._values = self.values.tolist()
+
+    def stop(self, profit: float, adjusted: bool, is_short: bool = False,
+             leverage: float = 1.0) -> float:
+        level = bisect_left(self._levels, profit) - 1
+        if level < 0:
+            return self.dca_base if adjusted else self.base
+        return stoploss_from_open(self._values[level], profit, is_short, leverage)
+
+    def stops(self, profit, adjusted, is_short: bool = False,
+              leverage: float = 1.0) -> np.ndarray:
+        """Stops for an array of profits; ``adjusted`` is a flag or an array of flags."""
+        profit = np.asarray(profit, dtype=float)
+        level = np.searchsorted(self.levels, profit, side="left") - 1
+        level = np.where(np.isnan(profit), -1, level)
+        stepped = _stoploss_from_open(self.values[np.maximum(level, 0)], profit, is_short, leverage)
+        return np.where(level >= 0, stepped, np.where(adjusted, self.dca_base, self.base))
+
+
+class _RoiCurve:
+    """ATR-scaled ROI target of ``custom_roi``; without ATR the floor applies."""
+
+    def __init__(self, mult: float, floor: float) -> None:
+        self.mult = mult
+        self.floor = floor
+
+    def target(self, atr_pct: float | None) -> float:
+        if atr_pct is None or atr_pct != atr_pct:
+            return self.floor
+        mult = self.mult
+        if atr_pct > 6:
+            mult = max(mult, 2.0)
+        elif atr_pct < 3:
+            mult = min(mult, 1.2)
+        return max(atr_pct * mult / 100, self.floor)
+
+    def targets(self, atr_pct) -> np.ndarray:
+        atr = np.asarray(atr_pct, dtype=float)
+        mult = np.where(atr > 6, max(self.mult, 2.0),
+                        np.where(atr < 3, min(self.mult, 1.2), self.mult))
+        with np.errstate(invalid="ignore"):
+            return np.where(np.isnan(atr), self.floor, np.maximum(atr * mult / 100, self.floor))
+
+
+# ---- Метрики ----------------------------------------------------------
+# histogram bucket bounds in seconds, Prometheus style (le=...)
+METRIC_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                  0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class _NullStage:
+    """Stage timer used while metrics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count", "max", "rows")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(METRIC_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+        self.rows: int | None = None
+
+    def observe(self, seconds: float, rows: int | None) -> None:
+        self.counts[bisect_left(METRIC_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+        if rows is not None:
+            self.rows = rows
+
+    def merge(self, other: _Histogram) -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(METRIC_BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "pair", "rows", "start")
+
+    def __init__(self, metrics: _Metrics, name: str, pair: str | None, rows: int | None) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.pair = pair
+        self.rows = rows
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(self, *exc) -> bool:
+        self.metrics.observe(self.name, self.pair, perf_counter() - self.start, self.rows)
+        return False
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metrics:
+    """
+    Opt-in per-stage and per-pair timing of the strategy's entry points.
+
+    ``stage()`` returns a shared no-op context manager while disabled, so the
+    instrumentation can stay in place in production.  Every ``log_every``
+    bot loops a summary is logged and, if ``path`` is set, the histograms are
+    written as a Prometheus text file for a local scraper.
+    """
+
+    def __init__(self, enabled: bool = False, log_every: int = 0, path: str | None = None) -> None:
+        self.enabled = enabled
+        self.log_every = log_every
+        self.path = path
+        self.loops = 0
+        self.series: dict[tuple[str, str], _Histogram] = {}
+
+    def stage(self, name: str, pair: str | None = None, rows: int | None = None):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, pair, rows)
+
+    def observe(self, name: str, pair: str | None, seconds: float, rows: int | None = None) -> None:
+        key = (name, pair or "")
+        hist = self.series.get(key)
+        if hist is None:
+            hist = self.series[key] = _Histogram()
+        hist.observe(seconds, rows)
+
+    def loop_done(self) -> None:
+        if not self.enabled:
+            return
+        self.loops += 1
+        if self.log_every > 0 and self.loops % self.log_every == 0:
+            self.log_summary()
+            if self.path:
+                self.write_prometheus(self.path)
+
+    def by_stage(self) -> dict[str, _Histogram]:
+        stages: dict[str, _Histogram] = {}
+        for (name, _), hist in self.series.items():
+            stages.setdefault(name, _Histogram()).merge(hist)
+        return stages
+
+    def log_summary(self, top: int = 3) -> None:
+        stages = self.by_stage()
+        if not stages:
+            return
+        logger.info("PhoeniX metrics after %d loops (stage: calls, total, mean, p95, max):",
+                    self.loops)
+        for name, hist in sorted(stages.items(), key=lambda item: -item[1].total):
+            logger.info(
+                "  %-28s %8d %9.3fs %9.3fms %9.3fms %9.3fms",
+                name, hist.count, hist.total, hist.total / hist.count * 1000,
+                hist.quantile(0.95) * 1000, hist.max * 1000,
+            )
+        pairs = sorted(
+            ((hist.total, name, pair) for (name, pair), hist in self.series.items() if pair),
+            reverse=True,
+        )[:top]
+        for total, name, pair in pairs:
+            logger.info("  slowest: %s %s %.3fs", pair, name, total)
+
+    def prometheus(self) -> str:
+        def labels(name: str, pair: str, **extra: str) -> str:
+            items = {"stage": name, "pair": pair, **extra}
+            text = ",".join(
+                f'{key}="{_label_value(value)}"' for key, value in items.items() if value
+            )
+            return "{" + text + "}"
+
+        lines = [
+            "# HELP phoenix_loops_total Bot loops seen by the strategy.",
+            "# TYPE phoenix_loops_total counter",
+            f"phoenix_loops_total {self.loops}",
+            "# HELP phoenix_stage_seconds Time spent in PhoeniX_V1 stages.",
+            "# TYPE phoenix_stage_seconds histogram",
+        ]
+        for (name, pair), hist in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip((*METRIC_BUCKETS, "+Inf"), hist.counts):
+                cumulative += count
+                lines.append(
+                    f"phoenix_stage_seconds_bucket{labels(name, pair, le=str(bound))} {cumulative}"
+                )
+            lines.append(f"phoenix_stage_seconds_sum{labels(name, pair)} {hist.total:.9f}")
+            lines.append(f"phoenix_stage_seconds_count{labels(name, pair)} {hist.count}")
+        lines += [
+            "# HELP phoenix_dataframe_rows Rows of the last dataframe seen by a stage.",
+            "# TYPE phoenix_dataframe_rows gauge",
+        ]
+        for (name, pair), hist in sorted(self.series.items()):
+            if hist.rows is not None:
+                lines.append(f"phoenix_dataframe_rows{labels(name, pair)} {hist.rows}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Replace ``path`` atomically so a scraper never reads a partial file."""
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.write(self.prometheus())
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("Could not write metrics to %s: %s", path, e)
+
+
 class PhoeniX_V1(IStrategy):
     """Trend‑following стратегия 2025‑26 с BTC‑dominance фильтром, stepped‑SL и DCA‑поддержкой."""
 
@@ -28,15 +2149,85 @@ class PhoeniX_V1(IStrategy):
 
     max_open_trades = 8  # новое ограничение совокупных позиций
 
+    # Live/dry-run only: update indicators from cached per-pair state instead
+    # of recomputing the whole history on every new candle.
+    use_incremental_indicators: bool = True
+
+    # Live/dry-run only: compute the per-pair indicator block of the whole
+    # whitelist in ``bot_loop_start`` on ``indicator_workers`` "thread" or
+    # "process" workers.  0 or 1 keeps Freqtrade's serial analysis.
+    indicator_workers: int = 0
+    indicator_executor: str = "thread"
+
+    # Persist the base-timeframe indicators as Feather files, so restarts and
+    # repeated backtests only compute candles that are not cached yet.
+    # ``feature_cache_dir`` defaults to ``<user_data_dir>/feature_cache``.
+    use_feature_cache: bool = False
+    feature_cache_dir: str | None = None
+
+    # Keep derived columns (indicators, informative merges) of the analyzed
+    # frame as float32, roughly halving their memory.  Exchange OHLCV stays
+    # float64; thresholds then compare at ~7 significant digits.
+    compact_features: bool = False
+
+    # Opt-in timing of every entry point.  A summary is logged every
+    # ``metrics_log_every`` bot loops (backtesting runs one loop per candle);
+    # ``metrics_file`` additionally receives the histograms in Prometheus
+    # text format at the same interval.
+    enable_metrics: bool = False
+    metrics_log_every: int = 720
+    metrics_file: str | None = None
+
+    # ``startup_candle_count`` is planned from the indicators: enough candles
+    # for every recursive one to keep less than ``warmup_tolerance`` weight on
+    # its seed.  Backtesting, hyperopt and every other offline mode
+    # (lookahead/recursive analysis, plotting, webserver backtests) load the
+    # informative timeframes over the base range, so those need base candles,
+    # at most ``max_startup_candles`` (Freqtrade allows five OHLCV calls per
+    # pair).  Live and dry-run fetch every timeframe with its own candle count, at
+    # most ``max_live_startup_candles`` (one call).  With ``bounded_history``
+    # live/dry-run analysis keeps only the planned candles per pair and
+    # timeframe; older rows of the analyzed frame are NaN.
+    warmup_tolerance: float = 0.01
+    max_startup_candles: int = 4999
+    max_live_startup_candles: int = 999
+    bounded_history: bool = False
+
+    # Build the informative frames from the 15m candles instead of downloading
+    # them, for every timeframe whose warm-up fits into ``max_startup_candles``
+    # base candles (the BTC 1h frame; the 4h EMA-200 needs more, so the 4h
+    # frames are still requested).  Each derived candle is used once it is
+    # complete.
+    derive_informative: bool = False
+
+    # Live/dry-run BTC crash monitor: besides closed candles, ``"ticker"``
+    # uses the latest BTC/USDT price and ``"1m"`` the 1m candles (price and
+    # the volume of the forming candle), once per bot loop.  None keeps to
+    # closed candles, as in backtesting.
+    btc_monitor_source: str | None = None
+
+    # Live/dry-run: fetch tickers and the top ``depth_levels`` of the order
+    # book of every open trade's pair once per loop (cached ``snapshot_ttl``
+    # seconds, ``snapshot_workers`` concurrent requests).  A DCA add is then
+    # capped at ``depth_stake_fraction`` of the ask notional within
+    # ``depth_band`` of the best ask.
+    use_depth_snapshots: bool = False
+    depth_levels: int = 20
+    depth_band: float = 0.005
+    depth_stake_fraction: float = 0.25
+    snapshot_ttl: float = 5.0
+    snapshot_workers: int = 4
+
     # BTC dominance
     # BTC dominance filter requires a BTC.D market, which Bybit lacks.
     # Disabled by default to avoid errors when data is unavailable.
     use_btcd_filter: bool = False
+    # Shared by the entry and exit filters; hyperopt spaces must be identifiers.
     btcd_dom_threshold = DecimalParameter(
         1.5,
         5.0,
         default=3.0,
-        space="sell,buy",
+        space="buy",
         optimize=True,
     )
     btcd_lookback: int = 24  # кол-во свечей informative_timeframe для расчёта изменения доминанса
@@ -54,6 +2245,8 @@ class PhoeniX_V1(IStrategy):
     # Более узкий базовый стоп‑лосс для бурного рынка 2025‑26
     base_stoploss = DecimalParameter(-0.12, -0.05, default=-0.06,
                                      space="sell", optimize=True)
+    # базовый стоп после первой дозакупки
+    dca_stoploss: float = -0.03
 
     use_custom_roi = True
     dynamic_roi_mult = DecimalParameter(1.0, 2.0, default=1.5,
@@ -69,6 +2262,245 @@ class PhoeniX_V1(IStrategy):
     # handled via ``custom_stoploss`` which references ``base_stoploss``.
     stoploss = -0.06
 
+    def __init__(self, config: dict) -> None:
+        super().__init__(config)
+        self._indicator_engine = _IncrementalIndicators(self.timeframe)
+        self._btc_features = _BtcFeatureCache(
+            "BTC/USDT", self.timeframe, self.informative_timeframe, self.btc_fast_tf
+        )
+        # a live monitor state is trusted for one throttle cycle
+        throttle = config.get("internals", {}).get("process_throttle_secs", 5)
+        self._btc_monitor = _BtcMonitor(self._btc_features, timedelta(seconds=throttle))
+        self._books = _MarketSnapshots(self.depth_levels, self.snapshot_ttl, self.snapshot_workers)
+        self._correlations = _CorrelationMatrix(self.timeframe)
+        self._snapshots = _SnapshotStore(self.timeframe)
+        self._trade_states: dict[int, _TradeState] = {}
+        self._curves_key = None
+        self._ladder: _StoplossLadder | None = None
+        self._roi: _RoiCurve | None = None
+        self._hyperopt_banks: dict[str, _HyperoptBank] = {}
+        self._metrics = _Metrics(self.enable_metrics, self.metrics_log_every, self.metrics_file)
+        self._prefetch = _IndicatorPrefetch(self.indicator_workers, self.indicator_executor)
+        self._warmup = _plan_warmup(
+            self.timeframe, self.high_tf, self.informative_timeframe, self.atr_window.high,
+            self.warmup_tolerance, self.btcd_lookback if self.use_btcd_filter else None,
+        )
+        derived = ()
+        if self.derive_informative:
+            minutes = timeframe_to_minutes(self.timeframe)
+            derived = tuple(
+                tf for tf in dict.fromkeys((self.informative_timeframe, self.high_tf, self.btc_fast_tf))
+                if tf != self.timeframe and timeframe_to_minutes(tf) % minutes == 0
+            )
+            # derived candles start with the base history: only derive what
+            # ``max_startup_candles`` base candles can warm up
+            for tf in derived:
+                if self._warmup.base_need(tf) > self.max_startup_candles:
+                    logger.info("Deriving %s needs %d base candles, more than %d; downloading it.",
+                                tf, self._warmup.base_need(tf), self.max_startup_candles)
+            derived = tuple(
+                tf for tf in derived if self._warmup.base_need(tf) <= self.max_startup_candles
+            )
+        if config.get("runmode") in TRADE_MODES:
+            self.startup_candle_count = self._warmup.timeframe_candles(self.max_live_startup_candles)
+            if derived:
+                self.startup_candle_count = min(max(
+                    self.startup_candle_count, *(self._warmup.base_need(tf) for tf in derived)
+                ), self.max_startup_candles)
+        else:
+            self.startup_candle_count = self._warmup.startup_candles(self.max_startup_candles)
+            for name, need, weight in self._warmup.unconverged(self.startup_candle_count):
+                logger.info("Warm-up of %s needs %d candles; %d leave %.2f weight on its seed.",
+                            name, need, self.startup_candle_count, weight)
+        self._history = None
+        if self.bounded_history:
+            self._history = _LiveHistory(
+                {tf: self._warmup.candles(tf) for tf in (self.timeframe, self.high_tf)}
+            )
+        self._derived = None
+        if derived:
+            self._derived = _DerivedCandles(
+                self.timeframe, derived, {tf: self._warmup.candles(tf) for tf in derived}
+            )
+        self._feature_store = None
+        if self.use_feature_cache:
+            root = self.feature_cache_dir or os.path.join(
+                str(config.get("user_data_dir", "user_data")), "feature_cache"
+            )
+            self._feature_store = _FeatureStore(root, self.timeframe)
+
+    def bot_loop_start(self, current_time: datetime, **kwargs) -> None:
+        with self._metrics.stage("bot_loop_start"):
+            self._trade_states.clear()
+            self._refresh_curves()
+        if self.use_depth_snapshots and self._trade_mode():
+            with self._metrics.stage("market_snapshots"):
+                pairs = self._open_trade_pairs()
+                if self.btc_monitor_source == "ticker":
+                    pairs.append("BTC/USDT")
+                self._books.refresh(self.dp, pairs)
+        with self._metrics.stage("btc_monitor"):
+            self._update_btc_monitor(current_time)
+        if self._prefetch.enabled and self._trade_mode():
+            with self._metrics.stage("indicators.prefetch"):
+                self._prefetch_indicators()
+        self._metrics.loop_done()
+
+    def ft_bot_cleanup(self) -> None:
+        super().ft_bot_cleanup()
+        self.bot_cleanup()
+
+    def bot_cleanup(self) -> None:
+        """Shut the worker pools down; Freqtrade cleans up on stop and before a reload."""
+        self._prefetch.close(wait=True)
+        self._books.close(wait=True)
+
+    def _update_btc_monitor(self, current_time: datetime) -> None:
+        """Publish the loop's BTC crash state for ``custom_exit``."""
+        price = volume = None
+        if self._trade_mode():
+            candles = self._candles()
+            btc_fast = candles.get_pair_dataframe(pair="BTC/USDT", timeframe=self.btc_fast_tf)
+            if btc_fast is not None and len(btc_fast):
+                self._btc_features.refresh(candles, btc_fast["date"].iloc[-1])
+            if self.btc_monitor_source == "ticker":
+                book = self._books.get("BTC/USDT")
+                if book is not None:
+                    price = book.last
+                else:
+                    try:
+                        ticker = self.dp.ticker("BTC/USDT")
+                    except Exception as e:  # closed candles only until the next loop
+                        logger.warning("BTC ticker failed: %s", e)
+                    else:
+                        price = ticker.get("last") if ticker else None
+            elif self.btc_monitor_source == "1m":
+                minute = self.dp.get_pair_dataframe(pair="BTC/USDT", timeframe="1m")
+                if minute is not None and len(minute):
+                    price = float(minute["close"].iloc[-1])
+                    # 1m candles of the forming base candle
+                    start = timeframe_to_prev_date(self.btc_fast_tf, current_time)
+                    volume = float(minute.loc[minute["date"] >= start, "volume"].sum())
+        self._btc_monitor.update(
+            current_time, self.btc_drop3h_exit.value, self.btc_drop30m_exit.value, price, volume
+        )
+
+    @staticmethod
+    def _open_trade_pairs() -> list[str]:
+        return [trade.pair for trade in Trade.get_open_trades()]
+
+    def _depth_cap(self, pair: str) -> float | None:
+        """Largest DCA add the ask side of the last order book snapshot can absorb."""
+        if not self.use_depth_snapshots or not self._trade_mode():
+            return None
+        book = self._books.get(pair)
+        if book is None:
+            return None
+        return book.depth("asks", self.depth_band) * self.depth_stake_fraction
+
+    def _prefetch_indicators(self) -> None:
+        """Fan the per-pair indicator block out before Freqtrade analyzes the pairs."""
+        win = list(self.atr_window.range)[0]
+        engine = store = None
+        if self._prefetch.executor == "thread":
+            engine, store = self._base_engine()
+        jobs = {}
+        last_date = None
+        for pair in self.dp.current_whitelist():
+            df = self._live_frame(
+                pair, self.timeframe, self.dp.get_pair_dataframe(pair=pair, timeframe=self.timeframe)
+            )
+            if df is None or df.empty:
+                continue
+            key = _frame_key(df, win)
+            last_date = key[2] if last_date is None else max(last_date, key[2])
+            if self.process_only_new_candles and self._prefetch.is_current(pair, key):
+                continue
+            htf_df = self._live_frame(
+                pair, self.high_tf, self._candles().get_pair_dataframe(pair=pair, timeframe=self.high_tf)
+            )
+            jobs[pair] = key, (df, htf_df, win, self.timeframe, self.high_tf, engine, pair, store)
+        if not jobs:
+            return
+        self._prefetch.submit(jobs)
+        # shared BTC features and correlations are built while the workers run
+        self._btc_features.refresh(self._candles(), last_date)
+        self._correlations.refresh(self.dp, self._btc_features)
+        self._prefetch.collect()
+
+    def _candles(self):
+        """Where informative candles come from: the DataProvider or frames derived from it."""
+        if self._derived is None:
+            return self.dp
+        return self._derived.bind(self.dp)
+
+    def _live_frame(self, pair: str, timeframe: str, df: DataFrame | None) -> DataFrame | None:
+        """The bounded history of ``pair`` when ``bounded_history`` applies, else ``df``."""
+        if self._history is None or not self._trade_mode():
+            return df
+        return self._history.frame(pair, timeframe, df)
+
+    def _trade_state(self, trade: Trade) -> _TradeState:
+        """Per-loop trade view; new orders or fills change the key and refresh it."""
+        key = (len(trade.orders), trade.stake_amount)
+        state = self._trade_states.get(trade.id)
+        if state is None or state.key != key:
+            state = _TradeState(trade, key)
+            self._trade_states[trade.id] = state
+        return state
+
+    def _atr_pct(self, pair: str, current_time: datetime, default: float | None) -> float | None:
+        snap = self._snapshots.get(pair, current_time)
+        if snap is None or np.isnan(snap.atr_pct):
+            return default
+        return float(snap.atr_pct)
+
+    def _trade_mode(self) -> bool:
+        return self.dp is not None and self.dp.runmode in (RunMode.LIVE, RunMode.DRY_RUN)
+
+    def _incremental_enabled(self) -> bool:
+        return self.use_incremental_indicators and self._trade_mode()
+
+    def _base_engine(self) -> tuple[_IncrementalIndicators | None, _FeatureStore | None]:
+        """Engine and feature cache for the base block; no engine means a full recompute."""
+        if self._feature_store is not None:
+            return self._indicator_engine, self._feature_store
+        if self._incremental_enabled():
+            return self._indicator_engine, None
+        return None, None
+
+    def _bank_view(self, pair: str | None, df: DataFrame) -> _HyperoptBank | None:
+        bank = self._hyperopt_banks.get(pair)
+        return bank.view(df["date"]) if bank is not None else None
+
+    def _apply_atr_window(self, pair: str, df: DataFrame) -> _HyperoptBank | None:
+        """Switch ``atr_z`` and the callback snapshots to this epoch's ``atr_window``."""
+        bank = self._bank_view(pair, df)
+        if bank is None:
+            return None
+        full = self._hyperopt_banks[pair]
+        win = self.atr_window.value
+        col = full.column(win)
+        df["atr_z"] = bank.atr_z[:, col]
+        self._snapshots.put(pair, full.dates, full.atr_pct, _atr_compressed(full.atr_z[:, col], win))
+        return bank
+
+    def _curves(self) -> tuple[_StoplossLadder, _RoiCurve]:
+        if self._ladder is None:
+            self._refresh_curves()
+        return self._ladder, self._roi
+
+    def _refresh_curves(self) -> None:
+        """Rebuild the stoploss ladder and ROI curve when their parameters changed."""
+        key = (
+            tuple(self.sl_profit_levels), tuple(self.sl_stop_values), self.base_stoploss.value,
+            self.dca_stoploss, self.dynamic_roi_mult.value, self.min_dynamic_roi.value,
+        )
+        if key != self._curves_key:
+            self._curves_key = key
+            self._ladder = _StoplossLadder(*key[:4])
+            self._roi = _RoiCurve(*key[4:])
+
     @property
     def base_stop(self) -> float:
         """Return the configured base stoploss for internal use."""
@@ -85,16 +2517,9 @@ class PhoeniX_V1(IStrategy):
         **kwargs,
     ) -> float:
         """Dynamic ROI based on recent ATR volatility."""
-        df = self.dp.get_pair_dataframe(pair=pair, timeframe=self.timeframe)
-        if df is not None and "atr_pct" in df.columns:
-            atr_pct = df["atr_pct"].iloc[-1]
-            mult = self.dynamic_roi_mult.value
-            if atr_pct > 6:
-                mult = max(mult, 2.0)
-            elif atr_pct < 3:
-                mult = min(mult, 1.2)
-            return max(atr_pct * mult / 100, self.min_dynamic_roi.value)
-        return self.min_dynamic_roi.value
+        with self._metrics.stage("custom_roi", pair):
+            _, roi = self._curves()
+            return roi.target(self._atr_pct(pair, current_time, None))
 
     trailing_stop = False  # конфликтует с custom_stoploss
 
@@ -110,6 +2535,10 @@ class PhoeniX_V1(IStrategy):
 
     # Max correlation with BTC/USDT allowed for entries
     max_btc_corr = DecimalParameter(0.5, 0.95, default=0.8, space="buy", optimize=False)
+    # Clustered exposure: reject an entry correlated above ``cluster_corr_threshold``
+    # with this many open trades already.  0 disables the check.
+    max_correlated_trades: int = 0
+    cluster_corr_threshold: float = 0.85
 
     # уровни прибыли и соответствующие им значения stoploss_from_open
     sl_profit_1 = DecimalParameter(0.005, 0.03, default=0.01,
@@ -196,150 +2625,162 @@ class PhoeniX_V1(IStrategy):
 
     # -------------------------------------------------------------------
     def informative_pairs(self):
-        wl = self.dp.current_whitelist()
-        pairs = [(pair, self.informative_timeframe) for pair in wl]
-        pairs += [(pair, self.high_tf) for pair in wl]
-        pairs += [
-            ("BTC/USDT", self.informative_timeframe),
-            ("BTC/USDT", self.btc_fast_tf),
-            ("BTC/USDT", self.high_tf),
-        ]
-        if self.use_btcd_filter:
-            if "BTC.D" in self.dp.available_pairs():
-                pairs.append(("BTC.D", self.informative_timeframe))
-            else:
-                # disable filter if pair is unavailable
-                self.use_btcd_filter = False
-        return pairs
+        with self._metrics.stage("informative_pairs"):
+            derived = self._derived.timeframes if self._derived is not None else ()
+            wl = self.dp.current_whitelist()
+            pairs = [(pair, self.high_tf) for pair in wl if self.high_tf not in derived]
+            pairs += [
+                ("BTC/USDT", tf)
+                for tf in dict.fromkeys((self.informative_timeframe, self.btc_fast_tf))
+                if tf not in derived
+            ]
+            if derived and ("BTC/USDT", self.timeframe) not in pairs:
+                pairs.append(("BTC/USDT", self.timeframe))
+            if self.btc_monitor_source == "1m":
+                pairs.append(("BTC/USDT", "1m"))
+            if self.use_btcd_filter:
+                if any(p[0] == "BTC.D" for p in self.dp.available_pairs):
+                    pairs.append(("BTC.D", self.informative_timeframe))
+                else:
+                    # disable filter if pair is unavailable
+                    self.use_btcd_filter = False
+            return pairs
 
     # ---- Индикаторы ----------------------------------------------------
     def populate_indicators(self, df: DataFrame, metadata: dict) -> DataFrame:
-        df["ema_200"] = ta.EMA(df, timeperiod=200)
-        df["sma_40"] = ta.SMA(df, timeperiod=40)
-        df["adx"] = ta.ADX(df)
+        with self._metrics.stage("populate_indicators", metadata.get("pair"), len(df)):
+            return self._populate_indicators(df, metadata)
 
-        stoch = ta.STOCH(df)
-        df["slowk"], df["slowd"] = stoch["slowk"], stoch["slowd"]
-
-        # ATR‑волатильность
-        atr_val = ta.ATR(df, timeperiod=14)
-        df["atr_pct"] = atr_val / df["close"] * 100
-        win = self.atr_window.value
-        df["atr_ema"] = ta.EMA(df["atr_pct"], timeperiod=win)
-        df["atr_ema_std"] = df["atr_pct"].rolling(win).std(ddof=0)
-        df["atr_z"] = (df["atr_pct"] - df["atr_ema"]) / (df["atr_ema_std"] + 1e-9)
-
-        # EMA‑200 линейный наклон за сутки (96 свечей)
-        df["ema200_lrs"] = ta.LINEARREG_SLOPE(df["ema_200"], timeperiod=96)
-
-        # Quote‑volume
-        if "quoteVolume" not in df.columns:
-            if "volume" in df.columns:
-                df["quoteVolume"] = df["volume"].replace(0, np.nan) * df["close"]
-            elif "baseVolume" in df.columns:
-                df["quoteVolume"] = df["baseVolume"].replace(0, np.nan) * df["close"]
-            else:
-                df["quoteVolume"] = np.nan
-        df["vol_ma"] = df["quoteVolume"].rolling(96, min_periods=30).mean()
-
-        # ---- Информативные таймфреймы (избегаем lookahead) ----
+    def _populate_indicators(self, df: DataFrame, metadata: dict) -> DataFrame:
         pair = metadata["pair"]
-        htf_df = self.dp.get_pair_dataframe(pair=pair, timeframe=self.high_tf)
-        if htf_df is not None and len(htf_df) > 20:
-            if "ema_200" not in htf_df.columns:
-                htf_df["ema_200"] = ta.EMA(htf_df, timeperiod=200)
-            df = merge_informative_pair(
-                df,
-                htf_df,
-                self.timeframe,
-                self.high_tf,
-                ffill=True,
-                append_timeframe=False,
-                suffix="4h",
-            )
+        stage = self._metrics.stage
+        # hyperopt analyzes once with the whole window range; epochs then pick
+        # their atr_z column from the bank built below
+        windows = list(self.atr_window.range)
+        win = windows[0]
+        full = df
+        df = self._live_frame(pair, self.timeframe, df)
+        bounded = df is not full
+        prefetched = None
+        if self._prefetch.enabled and self._trade_mode():
+            prefetched = self._prefetch.take(pair, _frame_key(df, win))
+        if prefetched is not None:
+            df = prefetched
+        else:
+            with stage("indicators.base", pair, len(df)):
+                engine, store = self._base_engine()
+                df = _base_indicators(
+                    _add_quote_volume(df), win, engine, pair, store, strict=not self._trade_mode()
+                )
 
-        # BTC/USDT informative data
-        btc_hour = self.dp.get_pair_dataframe(pair="BTC/USDT", timeframe=self.informative_timeframe)
-        if btc_hour is not None and len(btc_hour) > 20:
-            if "ema_200" not in btc_hour.columns:
-                btc_hour["ema_200"] = ta.EMA(btc_hour, timeperiod=200)
-            df = merge_informative_pair(
-                df,
-                btc_hour,
-                self.timeframe,
-                self.informative_timeframe,
-                ffill=True,
-                append_timeframe=False,
-                suffix="btc",
-            )
-        btc_fast = self.dp.get_pair_dataframe(pair="BTC/USDT", timeframe=self.btc_fast_tf)
-        if btc_fast is not None and len(btc_fast) > 3:
-            df = merge_informative_pair(
-                df,
-                btc_fast,
-                self.timeframe,
-                self.btc_fast_tf,
-                ffill=True,
-                append_timeframe=False,
-                suffix="btc_fast",
-            )
+            # ---- Информативные таймфреймы (избегаем lookahead) ----
+            with stage("indicators.merge_htf", pair, len(df)):
+                htf_df = self._live_frame(
+                    pair, self.high_tf, self._candles().get_pair_dataframe(pair=pair, timeframe=self.high_tf)
+                )
+                df = _merge_high_tf(df, htf_df, self.timeframe, self.high_tf)
+
+        # BTC/USDT informative data, shared by every pair
+        with stage("indicators.merge_btc", pair, len(df)):
+            btc = self._btc_features.refresh(self._candles(), df["date"].iloc[-1])
+            if btc is not None:
+                df = self._btc_features.attach(df)
         # Корреляция с BTC за сутки на том же таймфрейме
         if "close_btc_fast" in df.columns:
-            corr = (
-                df["close"].pct_change()
-                .rolling(96)
-                .corr(df["close_btc_fast"].pct_change())
-            )
-            df["corr_btc_fast"] = corr.fillna(0)
+            with stage("indicators.correlation", pair, len(df)):
+                self._correlations.refresh(self.dp, self._btc_features)
+                corr = self._correlations.column(pair, df["date"])
+                df["corr_btc_fast"] = corr if corr is not None else _btc_correlation(df)
         if self.use_btcd_filter:
-            btcd_df = self.dp.get_pair_dataframe(pair="BTC.D", timeframe=self.informative_timeframe)
-            if btcd_df is not None and len(btcd_df) > self.btcd_lookback:
-                df = merge_informative_pair(
-                    df,
-                    btcd_df,
-                    self.timeframe,
-                    self.informative_timeframe,
-                    ffill=True,
-                    append_timeframe=False,
-                    suffix="btcd",
+            with stage("indicators.merge_btcd", pair, len(df)):
+                btcd_df = self.dp.get_pair_dataframe(
+                    pair="BTC.D", timeframe=self.informative_timeframe
                 )
+                if btcd_df is not None and len(btcd_df) > self.btcd_lookback:
+                    df = _merge_informative(
+                        df, btcd_df, self.timeframe, self.informative_timeframe, "btcd"
+                    )
 
+        if self.compact_features:
+            df = _compact_features(df)
+        with stage("indicators.snapshot", pair, len(df)):
+            self._snapshots.update(pair, df, win, last_only=self._trade_mode())
+        if len(windows) > 1:
+            with stage("indicators.hyperopt_bank", pair, len(df)):
+                self._hyperopt_banks[pair] = _HyperoptBank(df, windows)
+        if bounded:
+            df = _expand_history(full, df)
         return df
 
     # ---- Entry ---------------------------------------------------------
-    def _btcd_change_ok(self, df: DataFrame) -> bool:
+    def _btcd_gates(self, df: DataFrame) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Per-row BTC.D filter: ``(entry allowed, forced exit)``.
+
+        A row compares BTC.D with ``btcd_lookback`` candles earlier and counts
+        as missing until the history up to it holds BTC.D data and is long
+        enough.  ``None`` while the filter does not apply.
+        """
         if not self.use_btcd_filter:
-            return True
-        if "BTC.D" not in self.dp.available_pairs():
-            return True
-        if "close_btcd" not in df.columns or df["close_btcd"].isna().all():
-            return False
-        if len(df) < self.btcd_lookback:
-            return False
-        change = (
-            df["close_btcd"].iloc[-1] / df["close_btcd"].iloc[-self.btcd_lookback] - 1
-        ) * 100
-        return change <= self.btcd_dom_threshold.value
+            return None
+        if not any(p[0] == "BTC.D" for p in self.dp.available_pairs):
+            return None
+        n = len(df)
+        if "close_btcd" not in df.columns:
+            return np.zeros(n, dtype=bool), np.ones(n, dtype=bool)
+        close = df["close_btcd"].to_numpy(dtype=float)
+        lag = self.btcd_lookback - 1
+        change = np.full(n, np.nan)
+        if n > lag:
+            change[lag:] = (close[lag:] / close[:n - lag] - 1) * 100
+        missing = ~np.logical_or.accumulate(~np.isnan(close))
+        missing[:lag] = True
+        threshold = self.btcd_dom_threshold.value
+        return change <= threshold, missing | (change > threshold)
+
+    def _entry_gate(self, df: DataFrame) -> np.ndarray | None:
+        """
+        Per-row market filters of the entry: 4h uptrend, BTC correlation, BTC.D.
+
+        Every row is judged on its own candle, as the bot saw it when that
+        candle closed, so backtests match live.  ``None`` without 4h data.
+        """
+        if "close_4h" not in df.columns or "ema_200_4h" not in df.columns:
+            return None
+        gate = (df["close_4h"] > df["ema_200_4h"]).to_numpy(dtype=bool)
+        if "corr_btc_fast" in df.columns:
+            gate = gate & ~(df["corr_btc_fast"].to_numpy(dtype=float) > self.max_btc_corr.value)
+        btcd = self._btcd_gates(df)
+        if btcd is not None:
+            gate = gate & btcd[0]
+        return gate
 
     def populate_entry_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
-        if not self._btcd_change_ok(df):
-            return df
+        with self._metrics.stage("populate_entry_trend", metadata.get("pair"), len(df)):
+            return self._populate_entry_trend(df, metadata)
+
+    def _populate_entry_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
         pair = metadata.get("pair")
-        if (
-            pair
-            and "corr_btc_fast" in df.columns
-            and df["corr_btc_fast"].iloc[-1] > self.max_btc_corr.value
-        ):
+        bank = self._apply_atr_window(pair, df)
+        gate = self._entry_gate(df)
+        if gate is None:
             return df
-        if "close_4h" not in df.columns or "ema_200_4h" not in df.columns:
+
+        if bank is not None:
+            entry = bank.entry_base & bank.entry_masks(
+                [self.buy_adx_min.value],
+                [self.buy_min_atr_z.value],
+                [self.buy_vol_rel_min.value],
+                [self.atr_window.value],
+            )[0]
+            df.loc[gate & entry, ["enter_long", "enter_tag"]] = (1, "trend_pullback")
             return df
-        up_trend = df["close_4h"].iloc[-1] > df["ema_200_4h"].iloc[-1]
 
-        slope_cond = ta.LINEARREG_SLOPE(df["ema_200"], timeperiod=96) > 0.0006
+        slope_cond = df["ema200_lrs"] > 0.0006
 
         df.loc[
             (
-                up_trend &
+                gate &
                 slope_cond &
                 (df["close"] > df["ema_200"]) &
                 (df["close"] < df["sma_40"]) &
@@ -353,41 +2794,57 @@ class PhoeniX_V1(IStrategy):
         ] = (1, "trend_pullback")
         return df
 
-    # ---- Exit ----------------------------------------------------------
-    def _btcd_exit(self, df: DataFrame) -> bool:
-        if not self.use_btcd_filter:
-            return False
-        if "BTC.D" not in self.dp.available_pairs():
-            return False
-        if "close_btcd" not in df.columns or df["close_btcd"].isna().all():
-            return True
-        if len(df) < self.btcd_lookback:
-            return True
-        change = (
-            df["close_btcd"].iloc[-1] / df["close_btcd"].iloc[-self.btcd_lookback] - 1
-        ) * 100
-        return change > self.btcd_dom_threshold.value
+    def confirm_trade_entry(
+        self,
+        pair: str,
+        order_type: str,
+        amount: float,
+        rate: float,
+        time_in_force: str,
+        current_time: datetime,
+        entry_tag: str | None,
+        side: str,
+        **kwargs,
+    ) -> bool:
+        """Limit clustered exposure using the whitelist correlation matrix."""
+        with self._metrics.stage("confirm_trade_entry", pair):
+            if self.max_correlated_trades <= 0:
+                return True
+            open_pairs = [t.pair for t in Trade.get_trades_proxy(is_open=True)]
+            if len(open_pairs) < self.max_correlated_trades:
+                return True
+            correlated = self._correlations.correlated_with(
+                pair, open_pairs, current_time, self.cluster_corr_threshold
+            )
+            return correlated < self.max_correlated_trades
 
-    def populate_exit_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
+    # ---- Exit ----------------------------------------------------------
+    def _exit_gate(self, df: DataFrame) -> np.ndarray:
+        """Per-row forced exits: 4h close below its EMA-200 on this and the previous candle, BTC.D."""
+        gate = np.zeros(len(df), dtype=bool)
         if "close_4h" in df.columns and "ema_200_4h" in df.columns:
-            global_bear = (df["close_4h"].iloc[-2:] < df["ema_200_4h"].iloc[-2:]).all()
-        else:
-            global_bear = False
+            bear = (df["close_4h"] < df["ema_200_4h"]).to_numpy(dtype=bool)
+            gate[:] = bear
+            gate[1:] &= bear[:-1]
+        btcd = self._btcd_gates(df)
+        if btcd is not None:
+            gate |= btcd[1]
+        return gate
 
-        low_adx = df["adx"].rolling(6).max() < self.flat_adx_max.value
+    def populate_exit_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
+        with self._metrics.stage("populate_exit_trend", metadata.get("pair"), len(df)):
+            return self._populate_exit_trend(df, metadata)
 
-        btcd_exit = self._btcd_exit(df)
+    def _populate_exit_trend(self, df: DataFrame, metadata: dict) -> DataFrame:
+        gate = self._exit_gate(df)
+        bank = self._bank_view(metadata.get("pair"), df)
+        if bank is not None:
+            signal = bank.exit_base | bank.flat_masks([self.flat_adx_max.value])[0]
+        else:
+            low_adx = df["adx"].rolling(6).max() < self.flat_adx_max.value
+            signal = (df["slowk"] < df["slowd"]) | (df["close"] < df["ema_200"]) | low_adx
 
-        df.loc[
-            (
-                global_bear |
-                btcd_exit |
-                (df["slowk"] < df["slowd"]) |
-                (df["close"] < df["ema_200"]) |
-                low_adx
-            ),
-            "exit_long",
-        ] = 1
+        df.loc[gate | signal, "exit_long"] = 1
         return df
 
     # ---- DCA -----------------------------------------------------------
@@ -406,29 +2863,31 @@ class PhoeniX_V1(IStrategy):
         current_exit_profit: float,
         **kwargs,
     ):
-        df = self.dp.get_pair_dataframe(pair=trade.pair, timeframe=self.timeframe)
-        atr_pct = 3.0
-        if df is not None and "atr_pct" in df.columns:
-            atr_pct = float(df["atr_pct"].iloc[-1])
-        max_adj_allowed = 1 if atr_pct > 8 else self.max_entry_position_adjustment
-        if trade.has_open_orders or trade.nr_of_position_adjustments >= max_adj_allowed:
-            return None
+        with self._metrics.stage("adjust_trade_position", trade.pair):
+            atr_pct = self._atr_pct(trade.pair, current_time, 3.0)
+            state = self._trade_state(trade)
+            max_adj_allowed = 1 if atr_pct > 8 else self.max_entry_position_adjustment
+            if state.has_open_orders or state.adjustments >= max_adj_allowed:
+                return None
 
-        # Минимальный шаг дозакупки адаптируется к текущей волатильности
-        gap = max(atr_pct * self.dca_gap_pct.value / 100, atr_pct / 25)
-        level_idx = trade.nr_of_position_adjustments
-        target_price = trade.entry_price * (1 - gap * (level_idx + 1))
+            # Минимальный шаг дозакупки адаптируется к текущей волатильности
+            gap = max(atr_pct * self.dca_gap_pct.value / 100, atr_pct / 25)
+            level_idx = state.adjustments
+            target_price = state.entry_price * (1 - gap * (level_idx + 1))
 
-        if current_rate <= target_price:
-            remaining = max_stake - trade.stake_amount
-            if remaining <= 0:
-                return None
-            add_factor = 1.15 ** level_idx
-            additional_stake = min(trade.stake_amount * add_factor, remaining)
-            if min_stake and additional_stake < min_stake:
-                return None
-            return additional_stake, f"dca_{int(gap * 100)}%"
-        return None
+            if current_rate <= target_price:
+                remaining = max_stake - state.stake_amount
+                if remaining <= 0:
+                    return None
+                add_factor = 1.15 ** level_idx
+                additional_stake = min(state.stake_amount * add_factor, remaining)
+                cap = self._depth_cap(trade.pair)
+                if cap is not None:
+                    additional_stake = min(additional_stake, cap)
+                if min_stake and additional_stake < min_stake:
+                    return None
+                return additional_stake, f"dca_{int(gap * 100)}%"
+            return None
 
     # ---- Stop‑loss -----------------------------------------------------
     def custom_stoploss(
@@ -442,16 +2901,13 @@ class PhoeniX_V1(IStrategy):
         **kwargs,
     ):
         """Stepped stoploss tightening as trade becomes profitable."""
-        base_sl = -0.03 if trade.nr_of_position_adjustments >= 1 else self.base_stoploss.value
-        if after_fill:
-            return base_sl
-
-        for prof, sl_val in sorted(zip(self.sl_profit_levels, self.sl_stop_values), reverse=True):
-            if current_profit > prof:
-                is_short = getattr(trade, "is_short", False)
-                leverage = getattr(trade, "leverage", 1.0)
-                return stoploss_from_open(sl_val, current_profit, is_short, leverage)
-        return base_sl
+        with self._metrics.stage("custom_stoploss", pair):
+            state = self._trade_state(trade)
+            ladder, _ = self._curves()
+            adjusted = state.adjustments >= 1
+            if after_fill:
+                return ladder.dca_base if adjusted else ladder.base
+            return ladder.stop(current_profit, adjusted, state.is_short, state.leverage)
 
     # ---- Emergency exit ------------------------------------------------
     def custom_exit(
@@ -464,48 +2920,23 @@ class PhoeniX_V1(IStrategy):
         **kwargs,
     ):
         """Emergency exits triggered by BTC weakness or trade timeout."""
-        pair_df = self.dp.get_pair_dataframe(pair=pair, timeframe=self.timeframe)
-        needed = {"close_btc", "close_btc_fast", "ema_200_btc"}
-        if (
-            pair_df is not None
-            and needed.issubset(pair_df.columns)
-            and not pair_df[list(needed)].isna().any().any()
-        ):
-            now_p = pair_df["close_btc"].iloc[-1]
-            prev3h_p = pair_df["close_btc"].shift(3).iloc[-1]
-            prev30m_p = pair_df["close_btc_fast"].shift(2).iloc[-1]
-            if np.isnan(prev3h_p) or np.isnan(prev30m_p):
-                return None
-            drop3h = now_p / prev3h_p - 1
-            drop30m = now_p / prev30m_p - 1
-            vol_ser = None
-            if "volume_btc_fast" in pair_df.columns:
-                vol_ser = pair_df["volume_btc_fast"]
-            elif "quoteVolume_btc_fast" in pair_df.columns:
-                vol_ser = pair_df["quoteVolume_btc_fast"]
-            if vol_ser is not None:
-                vol_ser = vol_ser.fillna(0)
-                vol_spike = vol_ser.iloc[-1] > vol_ser.rolling(8).mean().iloc[-1] * 3
-            else:
-                vol_spike = False
-            atr_pct = pair_df["atr_pct"].iloc[-1] if "atr_pct" in pair_df.columns else 3.0
-            dynamic_drop = -max(0.03, atr_pct / 100 * 1.2)
-            if (
-                now_p < pair_df["ema_200_btc"].iloc[-1]
-                or drop3h < max(self.btc_drop3h_exit.value, dynamic_drop)
-                or (
-                    drop30m < max(self.btc_drop30m_exit.value, dynamic_drop / 2)
-                    and vol_spike
-                )
-            ):
-                return "btc_protect"
+        with self._metrics.stage("custom_exit", pair):
+            snap = self._snapshots.get(pair, current_time)
+            btc = self._btc_monitor.get(
+                current_time, self.btc_drop3h_exit.value, self.btc_drop30m_exit.value,
+                self._trade_mode(),
+            )
+            if btc is not None:
+                if btc.crash:
+                    return "btc_protect"
+                atr_pct = self._atr_pct(pair, current_time, 3.0)
+                if btc.protects(-max(0.03, atr_pct / 100 * 1.2)):
+                    return "btc_protect"
 
-        lifespan = (current_time - trade.open_date_utc).total_seconds() / 60
-        if current_profit < 0.02 and lifespan > self.max_trade_minutes.value:
-            return "timeout"
+            lifespan = (current_time - trade.open_date_utc).total_seconds() / 60
+            if current_profit < 0.02 and lifespan > self.max_trade_minutes.value:
+                return "timeout"
 
-        df = self.dp.get_pair_dataframe(pair=pair, timeframe=self.timeframe)
-        if df is not None and len(df) > max(6, self.atr_window.value):
-            if df["atr_z"].iloc[-6:].lt(0).all():
+            if snap is not None and snap.atr_compressed:
                 return "atr_compression"
-        return None
+            return None
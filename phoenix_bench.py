@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic benchmark for PhoeniX_V1.
+
+Times ``populate_indicators``, ``populate_entry_trend``,
+``populate_exit_trend`` and the trade callbacks on generated markets, without
+an exchange or downloaded data.  Markets are deterministic for a given seed:
+every pair follows BTC/USDT with its own beta, switches between bull, bear,
+range and volatile regimes and sees occasional crash candles.
+
+Usage::
+
+    python phoenix_bench.py --pairs 6 20 100 300 --candles 1000 5000
+    python phoenix_bench.py --save bench_baseline.json
+    python phoenix_bench.py --compare bench_baseline.json --tolerance 0.25
+
+``live`` mode measures what a bot loop costs once the history is analyzed:
+each loop appends one candle, analyzes every pair and runs the callbacks for
+one open trade per pair.  ``backtest`` mode analyzes the whole history once
+and times the callbacks over evenly spaced candles.  Peak memory is measured
+in a separate pass with ``tracemalloc`` so it does not distort the timings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from freqtrade.enums import RunMode
+from freqtrade.exchange import timeframe_to_minutes
+
+from PhoeniX_V1 import PhoeniX_V1
+from phoenix_sim import make_strategy
+
+
+TIMEFRAMES = ("15m", "1h", "4h")
+BTC_PAIR = "BTC/USDT"
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# Freqtrade's default process_throttle_secs
+THROTTLE_SECS = 5.0
+
+# drift and volatility per 15m candle
+REGIMES = np.array([
+    [0.0004, 0.006],   # bull
+    [-0.0004, 0.008],  # bear
+    [0.0, 0.004],      # range
+    [0.0, 0.015],      # volatile
+])
+
+TIMING_KEYS = ("warmup_s", "indicators_s", "entry_s", "exit_s", "callbacks_s", "loop_s")
+
+
+def generate_ohlcv(candles: int, seed: int, timeframe: str = "15m", start: datetime = START,
+                   market_returns: np.ndarray | None = None, beta: float = 0.0,
+                   regime_length: int = 300, crash_rate: float = 1 / 2000) -> DataFrame:
+    """
+    Deterministic OHLCV frame with regime switches and crash candles.
+
+    ``market_returns`` (log returns of the market, usually BTC) are added
+    with weight ``beta`` so pairs are correlated with it.
+    """
+    rng = np.random.default_rng(seed)
+    switches = rng.random(candles) < 1 / regime_length
+    states = rng.integers(0, len(REGIMES), switches.sum() + 1)
+    drift, vol = REGIMES[states[np.cumsum(switches)]].T
+
+    ret = drift + vol * rng.standard_normal(candles)
+    crash = rng.random(candles) < crash_rate
+    ret[crash] -= rng.uniform(0.06, 0.15, crash.sum())
+    if market_returns is not None:
+        ret += beta * market_returns[:candles]
+
+    close = 100 * np.exp(np.cumsum(ret))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.6, candles)) * vol)
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.6, candles)) * vol)
+    low[crash] *= 1 - rng.uniform(0.0, 0.03, crash.sum())
+
+    volume = rng.lognormal(5, 0.5, candles) * (1 + 20 * np.abs(ret))
+    volume[crash] *= 5
+
+    dates = pd.date_range(start, periods=candles, freq=f"{timeframe_to_minutes(timeframe)}min")
+    return DataFrame({"date": dates, "open": open_, "high": high, "low": low,
+                      "close": close, "volume": volume})
+
+
+def resample_ohlcv(df: DataFrame, timeframe: str) -> DataFrame:
+    """Aggregate a frame to a higher timeframe, candles labelled by their open."""
+    rule = f"{timeframe_to_minutes(timeframe)}min"
+    grouped = df.set_index("date").resample(rule, label="left", closed="left")
+    agg = grouped.agg({"open": "first", "high": "max", "low": "min", "close": "last",
+                       "volume": "sum"})
+    return agg.dropna().reset_index()
+
+
+def generate_market(pairs: int, candles: int, seed: int = 0) -> dict[tuple[str, str], DataFrame]:
+    """BTC/USDT plus ``pairs`` correlated pairs on every timeframe of the strategy."""
+    btc = generate_ohlcv(candles, seed)
+    btc_returns = np.diff(np.log(btc["close"].to_numpy()), prepend=np.log(100.0))
+    rng = np.random.default_rng(seed + 1)
+    frames = {BTC_PAIR: btc}
+    for i in range(pairs):
+        frames[f"P{i:03d}/USDT"] = generate_ohlcv(
+            candles, seed + 10 + i, market_returns=btc_returns, beta=rng.uniform(0.3, 1.2)
+        )
+    return {
+        (pair, tf): df if tf == "15m" else resample_ohlcv(df, tf)
+        for pair, df in frames.items()
+        for tf in TIMEFRAMES
+    }
+
+
+class StubDataProvider:
+    """
+    The parts of Freqtrade's DataProvider the strategy uses.
+
+    ``now`` limits every frame to candles closed at that time, as the bot sees
+    them; ``limit`` keeps only the newest candles, like the exchange's candle
+    limit in live mode.  ``ticker`` and ``orderbook`` act as a local exchange:
+    a book of evenly spaced levels around the last close, each call taking
+    ``latency`` seconds like a REST round trip.
+    """
+
+    def __init__(self, frames: dict[tuple[str, str], DataFrame], runmode: RunMode,
+                 limit: int | None = None, latency: float = 0.0) -> None:
+        self.frames = frames
+        self.runmode = runmode
+        self.limit = limit
+        self.latency = latency
+        self.now: datetime | None = None
+        self._whitelist = sorted({pair for pair, _ in frames if pair != BTC_PAIR})
+
+    def get_pair_dataframe(self, pair: str, timeframe: str | None = None,
+                           candle_type: str = "") -> DataFrame:
+        df = self.frames.get((pair, timeframe or "15m"))
+        if df is None:
+            return DataFrame()
+        if self.now is not None:
+            closed = df["date"] + timedelta(minutes=timeframe_to_minutes(timeframe or "15m"))
+            df = df[closed <= self.now]
+        if self.limit is not None:
+            df = df.iloc[-self.limit:]
+        return df.reset_index(drop=True)
+
+    def _last(self, pair: str) -> tuple[float, float]:
+        df = self.get_pair_dataframe(pair, "15m")
+        return float(df["close"].iloc[-1]), float(df["volume"].iloc[-1])
+
+    def ticker(self, pair: str) -> dict:
+        time.sleep(self.latency)
+        close, volume = self._last(pair)
+        return {"symbol": pair, "last": close, "bid": close * 0.99975, "ask": close * 1.00025,
+                "baseVolume": volume * 96}
+
+    def orderbook(self, pair: str, maximum: int) -> dict:
+        time.sleep(self.latency)
+        close, volume = self._last(pair)
+        # 0.05% spread, one level every 0.02%, deeper levels hold more
+        steps = np.arange(maximum)
+        offsets = 0.00025 + steps * 0.0002
+        amounts = volume / 50 * (1 + steps * 0.5)
+        return {
+            "bids": [[close * (1 - o), a] for o, a in zip(offsets, amounts)],
+            "asks": [[close * (1 + o), a] for o, a in zip(offsets, amounts)],
+        }
+
+    def current_whitelist(self) -> list[str]:
+        return list(self._whitelist)
+
+    @property
+    def available_pairs(self) -> list[tuple[str, str]]:
+        return list(self.frames)
+
+
+class StubTrade:
+    """Open spot trade with the attributes read by the callbacks."""
+
+    def __init__(self, trade_id: int, pair: str, open_rate: float, open_date: datetime,
+                 stake_amount: float = 10.0) -> None:
+        self.id = trade_id
+        self.pair = pair
+        self.open_rate = open_rate
+        self.open_date = open_date
+        self.open_date_utc = open_date
+        self.stake_amount = stake_amount
+        self.amount = stake_amount / open_rate
+        self.orders = [object()]
+        self.has_open_orders = False
+        self.nr_of_successful_entries = 1
+        self.is_short = False
+        self.leverage = 1.0
+        self.enter_tag = "trend_pullback"
+
+    def calc_profit_ratio(self, rate: float) -> float:
+        return rate / self.open_rate - 1
+
+
+def _analyze(strategy: PhoeniX_V1, dp: StubDataProvider, timings: dict) -> dict[str, DataFrame]:
+    analyzed = {}
+    for pair in dp.current_whitelist():
+        metadata = {"pair": pair}
+        df = dp.get_pair_dataframe(pair, strategy.timeframe)
+        t0 = time.perf_counter()
+        df = strategy.populate_indicators(df, metadata)
+        t1 = time.perf_counter()
+        df = strategy.populate_entry_trend(df, metadata)
+        t2 = time.perf_counter()
+        df = strategy.populate_exit_trend(df, metadata)
+        t3 = time.perf_counter()
+        timings["indicators_s"] += t1 - t0
+        timings["entry_s"] += t2 - t1
+        timings["exit_s"] += t3 - t2
+        analyzed[pair] = df
+    return analyzed
+
+
+def _callbacks(strategy: PhoeniX_V1, trade: StubTrade, current_time: datetime,
+               rate: float) -> None:
+    profit = trade.calc_profit_ratio(rate)
+    minutes = int((current_time - trade.open_date_utc).total_seconds() // 60)
+    strategy.custom_roi(trade.pair, trade, current_time, minutes, trade.enter_tag, "long")
+    strategy.custom_stoploss(trade.pair, trade, current_time, rate, profit)
+    strategy.custom_exit(trade.pair, trade, current_time, rate, profit)
+    strategy.adjust_trade_position(trade, current_time, rate, profit, None, 1000.0,
+                                   rate, rate, profit, profit)
+
+
+def _new_timings() -> dict:
+    return {key: 0.0 for key in TIMING_KEYS}
+
+
+def bench_live(pairs: int, candles: int, loops: int = 3, seed: int = 0, workers: int = 0,
+               executor: str = "thread") -> dict:
+    """
+    One warm-up analysis, then ``loops`` bot loops with one new candle each.
+
+    ``workers`` > 1 enables the indicator prefetch in ``bot_loop_start``.
+    """
+    frames = generate_market(pairs, candles + loops, seed)
+    dp = StubDataProvider(frames, RunMode.DRY_RUN, limit=candles)
+    strategy = make_strategy(dp, indicator_workers=workers, indicator_executor=executor)
+    dates = frames[(BTC_PAIR, "15m")]["date"]
+    candle = timedelta(minutes=15)
+
+    timings = _new_timings()
+    dp.now = dates.iloc[candles - 1].to_pydatetime() + candle
+    t0 = time.perf_counter()
+    analyzed = _analyze(strategy, dp, _new_timings())
+    timings["warmup_s"] = time.perf_counter() - t0
+    trades = [
+        StubTrade(i, pair, float(df["close"].iloc[-1]), dp.now)
+        for i, (pair, df) in enumerate(analyzed.items())
+    ]
+
+    for step in range(loops):
+        dp.now = dates.iloc[candles + step].to_pydatetime() + candle
+        t0 = time.perf_counter()
+        strategy.bot_loop_start(current_time=dp.now)
+        analyzed = _analyze(strategy, dp, timings)
+        t1 = time.perf_counter()
+        for trade in trades:
+            _callbacks(strategy, trade, dp.now, float(analyzed[trade.pair]["close"].iloc[-1]))
+        t2 = time.perf_counter()
+        timings["callbacks_s"] += t2 - t1
+        timings["loop_s"] += t2 - t0
+    strategy.bot_cleanup()
+
+    for key in TIMING_KEYS[1:]:
+        timings[key] /= loops
+    return timings
+
+
+def bench_backtest(pairs: int, candles: int, calls: int = 200, seed: int = 0) -> dict:
+    """Full-history analysis, then ``calls`` callback rounds per pair."""
+    frames = generate_market(pairs, candles, seed)
+    dp = StubDataProvider(frames, RunMode.BACKTEST)
+    strategy = make_strategy(dp)
+
+    timings = _new_timings()
+    t0 = time.perf_counter()
+    analyzed = _analyze(strategy, dp, timings)
+    t1 = time.perf_counter()
+    for i, (pair, df) in enumerate(analyzed.items()):
+        dates = df["date"]
+        closes = df["close"].to_numpy()
+        start = min(len(df) - 1, 300)
+        trade = StubTrade(i, pair, float(closes[start]), dates.iloc[start].to_pydatetime())
+        for row in np.linspace(start, len(df) - 1, calls).astype(int):
+            strategy.bot_loop_start(current_time=dates.iloc[row].to_pydatetime())
+            _callbacks(strategy, trade, dates.iloc[row].to_pydatetime(), float(closes[row]))
+    t2 = time.perf_counter()
+    timings["callbacks_s"] = t2 - t1
+    timings["loop_s"] = t2 - t0
+    return timings
+
+
+BENCHES = {"live": bench_live, "backtest": bench_backtest}
+
+
+def bench_case(mode: str, pairs: int, candles: int, memory: bool = True, **kwargs) -> dict:
+    result = {"mode": mode, "pairs": pairs, "candles": candles}
+    result.update(BENCHES[mode](pairs, candles, **kwargs))
+    if memory:
+        tracemalloc.start()
+        try:
+            BENCHES[mode](pairs, candles, **kwargs)
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    if mode == "live":
+        result["fits_throttle"] = result["loop_s"] < THROTTLE_SECS
+    return result
+
+
+def run_grid(modes, pairs, candles, memory: bool = True, loops: int = 3, calls: int = 200,
+             seed: int = 0, workers: int = 0, executor: str = "thread") -> list[dict]:
+    options = {
+        "live": {"loops": loops, "seed": seed, "workers": workers, "executor": executor},
+        "backtest": {"calls": calls, "seed": seed},
+    }
+    results = []
+    for mode in modes:
+        for n_pairs in pairs:
+            for n_candles in candles:
+                result = bench_case(mode, n_pairs, n_candles, memory, **options[mode])
+                print(f"{mode:8} pairs={n_pairs:<4} candles={n_candles:<6} "
+                      f"loop={result['loop_s']:.3f}s", flush=True)
+                results.append(result)
+    return results
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float,
+            min_seconds: float = 0.005) -> list[str]:
+    """Regressions of ``results`` against a saved baseline, as readable lines."""
+    known = {(r["mode"], r["pairs"], r["candles"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        ref = known.get((result["mode"], result["pairs"], result["candles"]))
+        if ref is None:
+            continue
+        for key in (*TIMING_KEYS, "peak_mb"):
+            new, old = result.get(key), ref.get(key)
+            if new is None or old is None:
+                continue
+            if key != "peak_mb" and max(new, old) < min_seconds:
+                continue
+            if new > old * (1 + tolerance):
+                regressions.append(
+                    f"{result['mode']} pairs={result['pairs']} candles={result['candles']} "
+                    f"{key}: {old:.4f} -> {new:.4f} (+{(new / old - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def _environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--modes", nargs="+", choices=sorted(BENCHES), default=["live", "backtest"])
+    parser.add_argument("--pairs", nargs="+", type=int, default=[6, 20, 100, 300])
+    parser.add_argument("--candles", nargs="+", type=int, default=[1000, 5000])
+    parser.add_argument("--loops", type=int, default=3, help="bot loops per live case")
+    parser.add_argument("--calls", type=int, default=200, help="callback rounds per pair in backtest")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="indicator prefetch workers in live mode (0 = serial)")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="fail on regressions against a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a regression is reported (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run_grid(args.modes, args.pairs, args.candles, memory=not args.no_memory,
+                       loops=args.loops, calls=args.calls, seed=args.seed,
+                       workers=args.workers, executor=args.executor)
+    print(DataFrame(results).to_string(index=False, float_format="{:.4f}".format))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": _environment(), "results": results}, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Prefix lookahead check for PhoeniX_V1's entry and exit signals.
+
+Freqtrade's ``lookahead-analysis`` reruns a full backtest per checked signal.
+This check replays the history candle by candle instead: a dry-run strategy
+is fed every growing prefix, as the bot would see it when that candle
+closed, and analyzes it through its incremental indicator engine, so each
+step only processes the new candle.  Its last-row signals are compared with
+the same rows of one full-history backtest-mode analysis; any difference
+means the full run used data that was not available yet.
+
+Usage::
+
+    python phoenix_lookahead.py --datadir user_data/data/bybit \\
+        --pairs ETH/USDT SOL/USDT --every 4
+
+Every timeframe is served as the prefix of the history that had closed at
+the step, from its first candle on.  The first checked step is therefore
+seeded exactly like the full run, and a merge that reads an informative
+candle before it closed shows up as a difference like any other lookahead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import timedelta
+from typing import Callable
+
+import numpy as np
+from pandas import DataFrame, Timestamp
+
+from freqtrade.enums import RunMode
+from freqtrade.exchange import timeframe_to_seconds
+
+from PhoeniX_V1 import PhoeniX_V1
+from phoenix_sim import FeatherData, make_strategy
+
+
+SIGNALS = ("enter_long", "exit_long", "enter_tag")
+
+
+class PrefixData:
+    """
+    ``source`` as the bot sees it at ``now``: every timeframe from its first
+    candle up to the last one closed at that time.
+    """
+
+    runmode = RunMode.DRY_RUN
+
+    def __init__(self, source, timeframe: str) -> None:
+        self.source = source
+        self.timeframe = timeframe
+        self.now: Timestamp | None = None
+        self.frames: dict[tuple[str, str], tuple[DataFrame, np.ndarray]] = {}
+
+    def _frame(self, pair: str, timeframe: str) -> tuple[DataFrame, np.ndarray]:
+        key = (pair, timeframe)
+        if key not in self.frames:
+            df = self.source.get_pair_dataframe(pair=pair, timeframe=timeframe)
+            if df is None:
+                df = DataFrame()
+            closes = np.array([], dtype="datetime64[ns]")
+            if len(df):
+                df = df.reset_index(drop=True)
+                closes = (
+                    df["date"].to_numpy(dtype="datetime64[ns]")
+                    + np.timedelta64(timeframe_to_seconds(timeframe), "s")
+                )
+            self.frames[key] = (df, closes)
+        return self.frames[key]
+
+    def get_pair_dataframe(self, pair: str, timeframe: str | None = None,
+                           candle_type: str = "") -> DataFrame:
+        timeframe = timeframe or self.timeframe
+        df, closes = self._frame(pair, timeframe)
+        if self.now is None or df.empty:
+            return df.copy()
+        stop = int(np.searchsorted(closes, self.now.to_datetime64(), side="right"))
+        return df.iloc[:stop]
+
+    def current_whitelist(self) -> list[str]:
+        return self.source.current_whitelist()
+
+    @property
+    def available_pairs(self) -> list[tuple[str, str]]:
+        return getattr(self.source, "available_pairs", [])
+
+
+def _analyze(strategy: PhoeniX_V1, df: DataFrame, pair: str) -> DataFrame:
+    metadata = {"pair": pair}
+    df = strategy.populate_indicators(df, metadata)
+    df = strategy.populate_entry_trend(df, metadata)
+    df = strategy.populate_exit_trend(df, metadata)
+    out = DataFrame({"date": df["date"]})
+    for col in ("enter_long", "exit_long"):
+        out[col] = df[col].eq(1) if col in df.columns else False
+    out["enter_tag"] = df["enter_tag"].fillna("") if "enter_tag" in df.columns else ""
+    return out
+
+
+def check_lookahead(source, pairs: list[str],
+                    make: Callable[..., PhoeniX_V1] = make_strategy,
+                    start: int | None = None, every: int = 1) -> tuple[DataFrame, int]:
+    """
+    Compare prefix and full-history signals of ``pairs``.
+
+    ``source`` serves the whole history in backtest mode; ``make(dp)`` builds
+    the strategy on a data provider.  Rows before ``start`` (default: the
+    startup candles backtesting drops) are not checked, after that every
+    ``every``-th candle is.  Returns the differing rows (pair, date, signal,
+    full and prefix value) and the number of rows checked.
+    """
+    full = make(source)
+    timeframe = full.timeframe
+    start = full.startup_candle_count if start is None else start
+    signals = {}
+    for pair in pairs:
+        df = source.get_pair_dataframe(pair=pair, timeframe=timeframe)
+        if df is not None and len(df):
+            signals[pair] = _analyze(full, df, pair).set_index("date")
+
+    dp = PrefixData(source, timeframe)
+    prefix = make(dp)
+    candle = timedelta(seconds=timeframe_to_seconds(timeframe))
+    timeline = sorted(set().union(*(s.index[start::every] for s in signals.values())))
+    rows = []
+    checked = 0
+    for date in timeline:
+        dp.now = date + candle
+        for pair, expected in signals.items():
+            df = dp.get_pair_dataframe(pair, timeframe)
+            if df.empty or df["date"].iloc[-1] != date:
+                continue
+            last = _analyze(prefix, df, pair).iloc[-1]
+            checked += 1
+            for col in SIGNALS:
+                if last[col] != expected.at[date, col]:
+                    rows.append((pair, date, col, expected.at[date, col], last[col]))
+    diffs = DataFrame(rows, columns=["pair", "date", "signal", "full", "prefix"])
+    return diffs, checked
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--datadir", required=True, help="Freqtrade data directory")
+    parser.add_argument("--data-format", default="feather")
+    parser.add_argument("--pairs", nargs="+", required=True)
+    parser.add_argument("--start", type=int, default=None,
+                        help="first checked candle (default: after the startup candles)")
+    parser.add_argument("--every", type=int, default=1, help="check every n-th candle")
+    args = parser.parse_args(argv)
+
+    source = FeatherData(args.datadir, args.pairs, args.data_format)
+    diffs, checked = check_lookahead(source, args.pairs, start=args.start, every=args.every)
+    print(f"{checked} candles checked, {diffs[['pair', 'date']].drop_duplicates().shape[0]} differ")
+    if not diffs.empty:
+        print(diffs.to_string(index=False))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,573 @@
+# -*- coding: utf-8 -*-
+"""
+NumPy simulator of the PhoeniX_V1 trade lifecycle.
+
+Replays entries, DCA adds and exits of the strategy over whole history arrays
+without going through Freqtrade's per-candle callbacks, so parameter sweeps
+run orders of magnitude faster.  Candidates should still be confirmed with a
+real ``freqtrade backtesting`` run; :func:`compare_with_backtest` lines both
+trade lists up.
+
+Usage::
+
+    strategy = make_strategy(dataprovider)
+    markets = [SimMarket.from_strategy(strategy, pair, ohlcv) for pair, ohlcv in data.items()]
+    trades = simulate(markets, SimParams.from_strategy(strategy))
+    print(summarize(trades))
+
+Semantics follow Freqtrade's backtesting for spot longs: signals are acted on
+at the next candle open, DCA is evaluated at the open before exits, then the
+exit signal / ``custom_exit``, the stoploss (candle low), ROI (candle high) and
+finally a trailed stoploss are checked in that order.  Pairs are simulated
+independently, so ``max_open_trades``, wallet limits and protections are not
+applied.  Exit orders always fill; Freqtrade can leave an exit priced exactly
+at the candle low unfilled after price rounding, which shifts that trade by a
+candle or more.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+
+import numpy as np
+from pandas import DataFrame, DatetimeIndex, to_datetime
+
+from freqtrade.enums import CandleType, RunMode, TradingMode
+
+from PhoeniX_V1 import PhoeniX_V1, _RoiCurve, _StoplossLadder, _atr_compressed
+
+
+EXIT_REASONS = (
+    "exit_signal",
+    "btc_protect",
+    "timeout",
+    "atr_compression",
+    "stop_loss",
+    "trailing_stop_loss",
+    "roi",
+    "force_exit",
+)
+
+
+@dataclass(frozen=True)
+class SimParams:
+    """Strategy parameters used by the simulator."""
+
+    base_stoploss: float = -0.06
+    dca_stoploss: float = -0.03
+    sl_profit: tuple = (0.01, 0.02, 0.04, 0.07, 0.12)
+    sl_stop: tuple = (0.0, 0.015, 0.03, 0.05, 0.10)
+    dynamic_roi_mult: float = 1.5
+    min_dynamic_roi: float = 0.03
+    dca_gap_pct: float = 0.6
+    max_entry_position_adjustment: int = 3
+    max_trade_minutes: int = 480
+    btc_drop3h_exit: float = -0.05
+    btc_drop30m_exit: float = -0.015
+    stake_amount: float = 1.0
+    max_stake: float = np.inf
+    fee: float = 0.001
+
+    @classmethod
+    def from_strategy(cls, strategy, **overrides) -> "SimParams":
+        """Current parameter values of a ``PhoeniX_V1`` instance."""
+        values = {
+            "base_stoploss": strategy.base_stoploss.value,
+            "dca_stoploss": strategy.dca_stoploss,
+            "sl_profit": tuple(strategy.sl_profit_levels),
+            "sl_stop": tuple(strategy.sl_stop_values),
+            "dynamic_roi_mult": strategy.dynamic_roi_mult.value,
+            "min_dynamic_roi": strategy.min_dynamic_roi.value,
+            "dca_gap_pct": strategy.dca_gap_pct.value,
+            "max_entry_position_adjustment": strategy.max_entry_position_adjustment,
+            "max_trade_minutes": strategy.max_trade_minutes.value,
+            "btc_drop3h_exit": strategy.btc_drop3h_exit.value,
+            "btc_drop30m_exit": strategy.btc_drop30m_exit.value,
+        }
+        values.update(overrides)
+        return cls(**values)
+
+    def with_values(self, **values) -> "SimParams":
+        return replace(self, **values)
+
+
+@dataclass
+class SimMarket:
+    """Analyzed history of one pair, as plain arrays."""
+
+    pair: str
+    dates: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    enter: np.ndarray
+    exit: np.ndarray
+    atr_pct: np.ndarray
+    atr_compressed: np.ndarray
+    btc_close: np.ndarray
+    btc_ema: np.ndarray
+    btc_fast_close: np.ndarray
+    btc_drop3h: np.ndarray
+    btc_drop30m: np.ndarray
+    btc_vol_spike: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def from_frame(cls, pair: str, df: DataFrame, btc: DataFrame | None, win: int) -> "SimMarket":
+        """
+        Build from an analyzed frame (indicators, ``enter_long``/``exit_long``).
+
+        ``btc`` holds BTC features on the base timeframe: ``date``,
+        ``close_btc``, ``ema_200_btc``, ``close_btc_fast``, ``btc_drop3h``,
+        ``btc_drop30m`` and ``btc_vol_spike``.
+        """
+        dates = df["date"].to_numpy(dtype="datetime64[ns]")
+        n = len(df)
+
+        def column(name: str) -> np.ndarray:
+            if name not in df.columns:
+                return np.zeros(n, dtype=bool)
+            return df[name].fillna(0).to_numpy(dtype=float) > 0
+
+        btc_cols = ("close_btc", "ema_200_btc", "close_btc_fast", "btc_drop3h",
+                    "btc_drop30m", "btc_vol_spike")
+        aligned = {col: np.full(n, np.nan) for col in btc_cols}
+        if btc is not None and len(btc):
+            btc_dates = btc["date"].to_numpy(dtype="datetime64[ns]")
+            pos = np.searchsorted(btc_dates, dates)
+            hit = pos < len(btc_dates)
+            hit[hit] = btc_dates[pos[hit]] == dates[hit]
+            for col in btc_cols:
+                if col in btc.columns:
+                    aligned[col][hit] = btc[col].to_numpy(dtype=float)[pos[hit]]
+
+        return cls(
+            pair=pair,
+            dates=dates,
+            open=df["open"].to_numpy(dtype=float),
+            high=df["high"].to_numpy(dtype=float),
+            low=df["low"].to_numpy(dtype=float),
+            close=df["close"].to_numpy(dtype=float),
+            enter=column("enter_long"),
+            exit=column("exit_long"),
+            atr_pct=df["atr_pct"].to_numpy(dtype=float),
+            atr_compressed=_atr_compressed(df["atr_z"].to_numpy(dtype=float), win),
+            btc_close=aligned["close_btc"],
+            btc_ema=aligned["ema_200_btc"],
+            btc_fast_close=aligned["close_btc_fast"],
+            btc_drop3h=aligned["btc_drop3h"],
+            btc_drop30m=aligned["btc_drop30m"],
+            btc_vol_spike=np.nan_to_num(aligned["btc_vol_spike"]) > 0,
+        )
+
+    @classmethod
+    def from_strategy(cls, strategy, pair: str, ohlcv: DataFrame,
+                      startup: int | None = None) -> "SimMarket":
+        """
+        Analyze ``ohlcv`` with ``strategy`` (its ``dp`` must be set) and wrap it.
+
+        The first ``startup`` candles (default: the strategy's
+        ``startup_candle_count``) only warm the indicators up and are dropped,
+        as Freqtrade's backtesting does.
+        """
+        metadata = {"pair": pair}
+        df = strategy.populate_indicators(ohlcv.copy(), metadata)
+        df = strategy.populate_entry_trend(df, metadata)
+        df = strategy.populate_exit_trend(df, metadata)
+        cache = strategy._btc_features
+        btc = None
+        if cache.values:
+            btc = DataFrame({"date": cache.dates, **cache.values})
+        market = cls.from_frame(pair, df, btc, strategy.atr_window.value)
+        if startup is None:
+            startup = strategy.startup_candle_count
+        return market.tail(len(market) - startup)
+
+    def tail(self, candles: int) -> "SimMarket":
+        """The last ``candles`` candles (views, no copy)."""
+        return self._rows(max(len(self) - max(candles, 0), 0), len(self))
+
+    def between(self, start, end) -> "SimMarket":
+        """Candles opened in ``[start, end)`` (views, no copy)."""
+        bounds = np.searchsorted(self.dates, _naive_utc([start, end]))
+        return self._rows(int(bounds[0]), int(bounds[1]))
+
+    def _rows(self, start: int, stop: int) -> "SimMarket":
+        return replace(self, **{
+            item.name: getattr(self, item.name)[start:stop]
+            for item in fields(self) if item.name != "pair"
+        })
+
+
+def _prev(values: np.ndarray, fill) -> np.ndarray:
+    """Values of the previous candle, as seen by callbacks at the current open."""
+    out = np.empty_like(values)
+    out[:1] = fill
+    out[1:] = values[:-1]
+    return out
+
+
+class _Prepared:
+    """Per-candle arrays that only depend on the market and the parameters."""
+
+    def __init__(self, m: SimMarket, p: SimParams) -> None:
+        atr = _prev(m.atr_pct, np.nan)
+        atr_cb = np.where(np.isnan(atr), 3.0, atr)
+
+        self.roi = _RoiCurve(p.dynamic_roi_mult, p.min_dynamic_roi).targets(atr)
+
+        btc = {name: _prev(getattr(m, name), np.nan) for name in
+               ("btc_close", "btc_ema", "btc_fast_close", "btc_drop3h", "btc_drop30m")}
+        spike = _prev(m.btc_vol_spike, False)
+        valid = ~np.isnan(np.column_stack(list(btc.values()))).any(axis=1)
+        dynamic_drop = -np.maximum(0.03, atr_cb / 100 * 1.2)
+        with np.errstate(invalid="ignore"):
+            self.btc_protect = valid & (
+                (btc["btc_close"] < btc["btc_ema"])
+                | (btc["btc_drop3h"] < np.maximum(p.btc_drop3h_exit, dynamic_drop))
+                | ((btc["btc_drop30m"] < np.maximum(p.btc_drop30m_exit, dynamic_drop / 2)) & spike)
+            )
+
+        self.compressed = _prev(m.atr_compressed, False)
+        enter = _prev(m.enter, False)
+        exit_ = _prev(m.exit, False)
+        self.exit_signal = exit_ & ~enter
+        # a candle carrying both signals opens nothing; no entries on the last candle
+        entries = enter & ~exit_
+        entries[-1:] = False
+        self.entries = np.flatnonzero(entries)
+        self.max_adj = np.where(atr_cb > 8, 1, p.max_entry_position_adjustment)
+        self.gap = np.maximum(atr_cb * p.dca_gap_pct / 100, atr_cb / 25)
+
+        self.ladder = _StoplossLadder(p.sl_profit, p.sl_stop, p.base_stoploss, p.dca_stoploss)
+
+
+class _Position:
+    """Mutable state of the open trade."""
+
+    __slots__ = ("open_idx", "open_rate", "stake", "amount", "adjustments", "stop",
+                 "stop_pct", "trailing")
+
+    def __init__(self, idx: int, rate: float, stake: float, stoploss: float) -> None:
+        self.open_idx = idx
+        self.open_rate = rate
+        self.stake = stake
+        self.amount = stake / rate
+        self.adjustments = 0
+        self.trailing = False
+        self.refresh_stop(rate, stoploss)
+
+    def refresh_stop(self, rate: float, stoploss: float) -> None:
+        self.stop = rate * (1 - abs(stoploss))
+        self.stop_pct = abs(stoploss)
+
+
+def _first(mask: np.ndarray) -> int:
+    idx = int(np.argmax(mask))
+    return idx if mask[idx] else -1
+
+
+def _run_trade(m: SimMarket, p: SimParams, pre: _Prepared, j: int, chunk: int) -> dict:
+    n = len(m)
+    fee = p.fee
+    pos = _Position(j, m.open[j], p.stake_amount, p.base_stoploss)
+    max_minutes = np.timedelta64(int(p.max_trade_minutes * 60), "s")
+    seg, after_dca = j, False
+    while True:
+        end = min(n, seg + chunk)
+        o, h, lo = m.open[seg:end], m.high[seg:end], m.low[seg:end]
+        open_value = pos.open_rate * (1 + fee)
+        profit_open = o * (1 - fee) / open_value - 1
+        profit_high = h * (1 - fee) / open_value - 1
+
+        values = pre.ladder.stops(profit_high, pos.adjustments >= 1)
+        candidate = np.where(values != 0, h * (1 - np.abs(values)), -np.inf)
+        stops = np.maximum.accumulate(np.maximum(candidate, pos.stop))
+        before = np.concatenate([[pos.stop], stops[:-1]])
+        raised = stops > before
+
+        signal = pre.exit_signal[seg:end]
+        timeout = (profit_open < 0.02) & ((m.dates[seg:end] - m.dates[j]) > max_minutes)
+        custom = ~signal & (pre.btc_protect[seg:end] | timeout | pre.compressed[seg:end])
+        stop_hit = stops >= lo
+        roi_hit = profit_high > pre.roi[seg:end]
+        first_exit = _first(signal | custom | stop_hit | roi_hit)
+
+        first_dca = -1
+        if (pos.adjustments < p.max_entry_position_adjustment
+                and p.max_stake - pos.stake > 0):
+            target = pos.open_rate * (1 - pre.gap[seg:end] * (pos.adjustments + 1))
+            dca = (pos.adjustments < pre.max_adj[seg:end]) & (o <= target)
+            if after_dca:
+                dca[0] = False
+            first_dca = _first(dca)
+
+        if first_dca >= 0 and (first_exit < 0 or first_dca <= first_exit):
+            d = seg + first_dca
+            lifted = np.flatnonzero(raised[:first_dca])
+            if len(lifted):
+                pos.trailing = True
+                pos.stop_pct = abs(values[lifted[-1]])
+            pos.stop = before[first_dca]
+            add = min(pos.stake * 1.15 ** pos.adjustments, p.max_stake - pos.stake)
+            pos.amount += add / m.open[d]
+            pos.stake += add
+            pos.open_rate = pos.stake / pos.amount
+            pos.adjustments += 1
+            # after_fill: custom_stoploss returns the DCA base stop, allowed to move down,
+            # unless the stop is already above the fill price (Freqtrade skips the call);
+            # then recalculating the trade raises it against the new average open rate
+            if pos.stop < m.open[d]:
+                pos.refresh_stop(m.open[d], p.dca_stoploss)
+            averaged = pos.open_rate * (1 - pos.stop_pct)
+            if averaged > pos.stop:
+                pos.stop = averaged
+                pos.trailing = True
+            seg, after_dca = d, True
+            continue
+
+        if first_exit >= 0:
+            e = seg + first_exit
+            k = first_exit
+            if signal[k]:
+                return _close(m, p, pos, e, m.open[e], "exit_signal")
+            if custom[k]:
+                if pre.btc_protect[e]:
+                    reason = "btc_protect"
+                elif timeout[k]:
+                    reason = "timeout"
+                else:
+                    reason = "atr_compression"
+                return _close(m, p, pos, e, m.open[e], reason)
+            adjusted = before[k] < lo[k]
+            trailing = pos.trailing or bool(raised[:k].any()) or bool(adjusted and raised[k])
+            # a trailing stop ranks after ROI, a plain stoploss before it
+            if stop_hit[k] and not (trailing and roi_hit[k]):
+                stop = stops[k] if adjusted else before[k]
+                pos.trailing = trailing
+                if adjusted and raised[k]:
+                    pos.stop_pct = abs(values[k])
+                if stop > h[k]:
+                    rate = o[k]
+                elif pos.trailing and e == j:
+                    rate = max(lo[k], o[k] * (1 - pos.stop_pct))
+                else:
+                    rate = stop
+                return _close(m, p, pos, e, rate,
+                              "trailing_stop_loss" if pos.trailing else "stop_loss")
+            roi_rate = open_value * (1 + pre.roi[e]) / (1 - fee)
+            if e > j and o[k] > roi_rate:
+                rate = o[k]
+            else:
+                rate = min(max(roi_rate, lo[k]), h[k])
+            return _close(m, p, pos, e, rate, "roi")
+
+        pos.trailing |= bool(raised.any())
+        pos.stop = stops[-1]
+        if end == n:
+            return _close(m, p, pos, n - 1, m.open[n - 1], "force_exit")
+        seg, after_dca = end, False
+
+
+def _close(m: SimMarket, p: SimParams, pos: _Position, idx: int, rate: float,
+           reason: str) -> dict:
+    close_value = pos.amount * rate * (1 - p.fee)
+    open_value = pos.amount * pos.open_rate * (1 + p.fee)
+    return {
+        "pair": m.pair,
+        "open_date": m.dates[pos.open_idx],
+        "close_date": m.dates[idx],
+        "open_idx": pos.open_idx,
+        "close_idx": idx,
+        "open_rate": pos.open_rate,
+        "close_rate": rate,
+        "amount": pos.amount,
+        "stake_amount": pos.stake,
+        "profit_abs": close_value - open_value,
+        "profit_ratio": close_value / open_value - 1,
+        "adjustments": pos.adjustments,
+        "exit_reason": reason,
+    }
+
+
+def simulate_pair(market: SimMarket, params: SimParams, chunk: int = 256) -> list[dict]:
+    """All trades of one pair; at most one trade is open at a time."""
+    pre = _Prepared(market, params)
+    trades: list[dict] = []
+    start = 0
+    while True:
+        k = int(np.searchsorted(pre.entries, start))
+        if k >= len(pre.entries):
+            break
+        trade = _run_trade(market, params, pre, int(pre.entries[k]), chunk)
+        trades.append(trade)
+        # entries are processed before exits, so the next trade opens a candle later
+        start = trade["close_idx"] + 1
+    return trades
+
+
+TRADE_COLUMNS = ("pair", "open_date", "close_date", "open_idx", "close_idx", "open_rate",
+                 "close_rate", "amount", "stake_amount", "profit_abs", "profit_ratio",
+                 "adjustments", "exit_reason")
+
+
+def simulate(markets: list[SimMarket], params: SimParams) -> DataFrame:
+    """Trades of every market, sorted by open date."""
+    rows = [t for market in markets for t in simulate_pair(market, params)]
+    trades = DataFrame(rows, columns=list(TRADE_COLUMNS))
+    return trades.sort_values(["open_date", "pair"], ignore_index=True)
+
+
+def summarize(trades: DataFrame) -> dict:
+    """Headline metrics of a trade list."""
+    result = {
+        "trades": len(trades),
+        "profit_abs": 0.0,
+        "profit_mean": 0.0,
+        "winrate": 0.0,
+        "max_drawdown_abs": 0.0,
+    }
+    result.update({f"exit_{reason}": 0 for reason in EXIT_REASONS})
+    if len(trades) == 0:
+        return result
+    ordered = trades.sort_values("close_date")
+    equity = ordered["profit_abs"].cumsum().to_numpy()
+    peak = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:]
+    result.update({
+        "profit_abs": float(equity[-1]),
+        "profit_mean": float(trades["profit_ratio"].mean()),
+        "winrate": float((trades["profit_abs"] > 0).mean()),
+        "max_drawdown_abs": float((peak - equity).max()),
+    })
+    for reason, count in trades["exit_reason"].value_counts().items():
+        result[f"exit_{reason}"] = int(count)
+    return result
+
+
+def check_grid(grid: list[dict]) -> None:
+    """Reject override sets naming parameters the simulator does not know."""
+    known = {f.name for f in fields(SimParams)}
+    for overrides in grid:
+        unknown = set(overrides) - known
+        if unknown:
+            raise ValueError(f"Unknown simulator parameters: {sorted(unknown)}")
+
+
+def sweep(markets: list[SimMarket], base: SimParams, grid: list[dict]) -> DataFrame:
+    """Simulate every override set in ``grid`` on top of ``base``."""
+    check_grid(grid)
+    rows = []
+    for overrides in grid:
+        rows.append({**overrides, **summarize(simulate(markets, base.with_values(**overrides)))})
+    return DataFrame(rows)
+
+
+def _naive_utc(dates) -> np.ndarray:
+    """Dates as naive UTC ``datetime64[ns]``, whatever their input form."""
+    return DatetimeIndex(to_datetime(dates, utc=True)).tz_convert(None).to_numpy("datetime64[ns]")
+
+
+def compare_with_backtest(sim_trades: DataFrame, bt_trades: DataFrame,
+                          rtol: float = 1e-6, atol: float = 1e-8) -> DataFrame:
+    """
+    Match simulated trades with a Freqtrade backtest export.
+
+    ``bt_trades`` is the frame returned by
+    ``freqtrade.data.btanalysis.load_backtest_data``.  Returns one row per
+    trade found in either list with a ``status`` of ``match``, ``mismatch``,
+    ``sim_only`` or ``backtest_only``.  Close rates must agree within
+    ``rtol``, profit ratios within ``rtol`` and ``atol``.
+    """
+    sim = sim_trades.assign(open_date=_naive_utc(sim_trades["open_date"]),
+                            close_date=_naive_utc(sim_trades["close_date"]))
+    bt = bt_trades.assign(open_date=_naive_utc(bt_trades["open_date"]),
+                          close_date=_naive_utc(bt_trades["close_date"]))
+    cols = ["pair", "open_date", "close_date", "open_rate", "close_rate", "profit_ratio",
+            "exit_reason"]
+    merged = sim[cols].merge(bt[cols], on=["pair", "open_date"], how="outer",
+                             suffixes=("_sim", "_bt"), indicator=True)
+    same = (
+        (merged["close_date_sim"] == merged["close_date_bt"])
+        & (merged["exit_reason_sim"] == merged["exit_reason_bt"])
+        & np.isclose(merged["close_rate_sim"], merged["close_rate_bt"], rtol=rtol)
+        & np.isclose(merged["profit_ratio_sim"], merged["profit_ratio_bt"], rtol=rtol, atol=atol)
+    )
+    merged["status"] = np.select(
+        [merged["_merge"] == "left_only", merged["_merge"] == "right_only", same],
+        ["sim_only", "backtest_only", "match"],
+        "mismatch",
+    )
+    return merged.drop(columns="_merge")
+
+
+# ---- The strategy outside the bot ------------------------------------
+def make_strategy(dp, **attributes) -> PhoeniX_V1:
+    """
+    PhoeniX_V1 set up on ``dp`` the way the bot does it: a minimal config
+    for ``dp.runmode``, the data provider attached, then ``ft_bot_start``.
+    ``attributes`` override class attributes such as ``indicator_workers``.
+    """
+    config = {
+        "timeframe": "15m",
+        "stake_currency": "USDT",
+        "dry_run": dp.runmode != RunMode.LIVE,
+        "runmode": dp.runmode,
+        "exchange": {"name": "bybit"},
+        "stoploss": -0.06,
+        "minimal_roi": {},
+        "spaces": ["default"],
+    }
+    cls = type(PhoeniX_V1.__name__, (PhoeniX_V1,), attributes) if attributes else PhoeniX_V1
+    strategy = cls(config)
+    strategy.dp = dp
+    strategy.ft_bot_start()
+    return strategy
+
+
+class FeatherData:
+    """
+    The parts of Freqtrade's DataProvider the strategy reads, served from a
+    Freqtrade data directory (``freqtrade download-data`` output).
+    """
+
+    runmode = RunMode.BACKTEST
+    # read besides the whitelist; data file names do not tell "BTC.D" from "BTC/D"
+    informative = ("BTC/USDT", "BTC.D")
+
+    def __init__(self, datadir: str | Path, pairs: list[str], data_format: str = "feather") -> None:
+        from freqtrade.data.history import get_datahandler
+
+        self.datadir = Path(datadir)
+        self.handler = get_datahandler(self.datadir, data_format)
+        self.pairs = list(pairs)
+        self.cache: dict[tuple[str, str], DataFrame] = {}
+
+    def get_pair_dataframe(self, pair: str, timeframe: str | None = None,
+                           candle_type: str = "") -> DataFrame:
+        key = (pair, timeframe)
+        if key not in self.cache:
+            self.cache[key] = self.handler.ohlcv_load(
+                pair, timeframe, timerange=None, fill_missing=True, drop_incomplete=False,
+                candle_type=CandleType.SPOT,
+            )
+        return self.cache[key].copy()
+
+    def current_whitelist(self) -> list[str]:
+        return list(self.pairs)
+
+    @property
+    def available_pairs(self) -> list[tuple[str, str]]:
+        """``(pair, timeframe)`` of every spot history in the data directory."""
+        from freqtrade.misc import pair_to_filename
+
+        names = {pair_to_filename(pair): pair for pair in (*self.pairs, *self.informative)}
+        return [
+            (names.get(pair_to_filename(pair), pair), timeframe)
+            for pair, timeframe, candle_type in self.handler.ohlcv_get_available_data(
+                self.datadir, TradingMode.SPOT)
+            if candle_type == CandleType.SPOT
+        ]
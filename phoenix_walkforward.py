@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Walk-forward validation of PhoeniX_V1 on the NumPy simulator.
+
+The history is loaded and analyzed once.  The simulator arrays of every pair
+are then copied into one shared-memory block that the workers of a process
+pool map without copying, so no worker reloads OHLCV or recomputes
+indicators.  Every (window, segment, parameter set) is a separate task and
+wall time grows with ``windows x parameter sets / cores``.
+
+Usage::
+
+    python phoenix_walkforward.py --datadir user_data/data/bybit \\
+        --pairs ETH/USDT SOL/USDT --train-days 60 --test-days 14 \\
+        --grid grid.json --workers 8
+
+``grid.json`` holds a list of :class:`phoenix_sim.SimParams` overrides.  For
+every rolling window the parameter set with the best ``--objective`` on the
+train segment is reported with its metrics on the following test segment.
+The same limits as :mod:`phoenix_sim` apply: pairs are simulated
+independently and indicators come from the whole history, so confirm the
+chosen parameters with a regular backtest.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import numpy as np
+from pandas import DataFrame, Timestamp
+
+from PhoeniX_V1 import PhoeniX_V1
+from phoenix_sim import (
+    EXIT_REASONS, FeatherData, SimMarket, SimParams, check_grid, make_strategy, simulate,
+    summarize,
+)
+
+
+_ARRAYS = tuple(item.name for item in fields(SimMarket) if item.name != "pair")
+
+
+def load_markets(strategy: PhoeniX_V1, pairs: list[str]) -> list[SimMarket]:
+    """Analyze every pair once with ``strategy`` (its ``dp`` must be set)."""
+    markets = []
+    for pair in pairs:
+        ohlcv = strategy.dp.get_pair_dataframe(pair=pair, timeframe=strategy.timeframe)
+        if ohlcv is None or ohlcv.empty:
+            continue
+        markets.append(SimMarket.from_strategy(strategy, pair, ohlcv))
+    return markets
+
+
+@dataclass(frozen=True)
+class Window:
+    """One walk-forward step: train on ``[train_start, test_start)``, test until ``test_end``."""
+
+    train_start: datetime
+    test_start: datetime
+    test_end: datetime
+
+
+def rolling_windows(start: datetime, end: datetime, train: timedelta, test: timedelta,
+                    step: timedelta | None = None) -> list[Window]:
+    """Consecutive windows over ``[start, end)``; ``step`` defaults to ``test``."""
+    step = step or test
+    windows = []
+    train_start = start
+    while train_start + train + test <= end:
+        windows.append(Window(train_start, train_start + train, train_start + train + test))
+        train_start += step
+    return windows
+
+
+# ---- Shared memory ---------------------------------------------------
+class SharedMarkets:
+    """
+    The arrays of ``markets`` in one shared-memory block.
+
+    ``layout`` is what a worker needs to map them back: per market its pair
+    and, per array, ``(offset, dtype, length)``.  The creating process owns
+    the block and must ``close()`` it.
+    """
+
+    def __init__(self, markets: list[SimMarket]) -> None:
+        self.layout: list[tuple[str, dict[str, tuple[int, str, int]]]] = []
+        offset = 0
+        for market in markets:
+            spec = {}
+            for name in _ARRAYS:
+                values = getattr(market, name)
+                spec[name] = (offset, values.dtype.str, len(values))
+                # keep every array 8-byte aligned
+                offset += -(-values.nbytes // 8) * 8
+            self.layout.append((market.pair, spec))
+        self.shm = SharedMemory(create=True, size=max(offset, 8))
+        for market, mapped in zip(markets, _map_markets(self.shm, self.layout)):
+            for name in _ARRAYS:
+                getattr(mapped, name)[:] = getattr(market, name)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> SharedMarkets:
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False
+
+
+def _map_markets(shm: SharedMemory, layout) -> list[SimMarket]:
+    markets = []
+    for pair, spec in layout:
+        arrays = {
+            name: np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, (offset, dtype, length) in spec.items()
+        }
+        markets.append(SimMarket(pair=pair, **arrays))
+    return markets
+
+
+# per worker process: the attached block and the markets mapped onto it
+_WORKER: dict = {}
+
+
+def _attach(name: str, layout) -> None:
+    shm = SharedMemory(name=name)
+    _WORKER["shm"] = shm
+    _WORKER["markets"] = _map_markets(shm, layout)
+
+
+def _evaluate(task: tuple) -> dict:
+    window, segment, start, end, index, params = task
+    markets = [market.between(start, end) for market in _WORKER["markets"]]
+    return {"window": window, "segment": segment, "params": index,
+            **summarize(simulate(markets, params))}
+
+
+# ---- Runner -----------------------------------------------------------
+def run(markets: list[SimMarket], base: SimParams, grid: list[dict], windows: list[Window],
+        workers: int | None = None) -> DataFrame:
+    """
+    Metrics of every parameter set on the train and test segment of every window.
+
+    ``workers`` processes (default: one per core) map the markets from shared
+    memory; 0 or 1 evaluates in this process.
+    """
+    check_grid(grid)
+    grid = grid or [{}]
+    tasks = [
+        (w, segment, start, end, i, base.with_values(**overrides))
+        for w, window in enumerate(windows)
+        for segment, start, end in (
+            ("train", window.train_start, window.test_start),
+            ("test", window.test_start, window.test_end),
+        )
+        for i, overrides in enumerate(grid)
+    ]
+    workers = os.cpu_count() or 1 if workers is None else workers
+    with SharedMarkets(markets) as shared:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                     initargs=(shared.name, shared.layout)) as pool:
+                chunk = max(1, len(tasks) // (workers * 4))
+                rows = list(pool.map(_evaluate, tasks, chunksize=chunk))
+        else:
+            _attach(shared.name, shared.layout)
+            try:
+                rows = [_evaluate(task) for task in tasks]
+            finally:
+                _WORKER.pop("markets", None)
+                _WORKER.pop("shm").close()
+
+    results = DataFrame(rows)
+    overrides = DataFrame(grid).add_prefix("param_")
+    results = results.join(overrides, on="params")
+    dates = DataFrame(
+        [(w.train_start, w.test_start, w.test_end) for w in windows],
+        columns=["train_start", "test_start", "test_end"],
+    )
+    return results.join(dates, on="window")
+
+
+def select(results: DataFrame, objective: str = "profit_abs") -> DataFrame:
+    """Per window, the test metrics of the parameter set that scored best on train."""
+    train = results[results["segment"] == "train"]
+    best = train.loc[train.groupby("window")[objective].idxmax(), ["window", "params"]]
+    test = results[results["segment"] == "test"]
+    return test.merge(best, on=["window", "params"]).sort_values("window", ignore_index=True)
+
+
+def aggregate(selected: DataFrame) -> dict:
+    """Out-of-sample totals over all windows of :func:`select`."""
+    exits = [f"exit_{reason}" for reason in EXIT_REASONS]
+    if selected.empty:
+        return {"windows": 0, "trades": 0, "profit_abs": 0.0, "max_drawdown_abs": 0.0,
+                **{col: 0 for col in exits}}
+    return {
+        "windows": len(selected),
+        "trades": int(selected["trades"].sum()),
+        "profit_abs": float(selected["profit_abs"].sum()),
+        "profitable_windows": int((selected["profit_abs"] > 0).sum()),
+        "max_drawdown_abs": float(selected["max_drawdown_abs"].max()),
+        **{col: int(selected[col].sum()) for col in exits},
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--datadir", required=True, help="Freqtrade data directory")
+    parser.add_argument("--data-format", default="feather")
+    parser.add_argument("--pairs", nargs="+", required=True)
+    parser.add_argument("--train-days", type=float, default=60)
+    parser.add_argument("--test-days", type=float, default=14)
+    parser.add_argument("--step-days", type=float, default=None)
+    parser.add_argument("--grid", metavar="PATH", help="JSON list of SimParams overrides")
+    parser.add_argument("--objective", default="profit_abs")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--stake-amount", type=float, default=100.0)
+    parser.add_argument("--fee", type=float, default=0.001)
+    parser.add_argument("--save", metavar="PATH", help="write every evaluation as CSV")
+    args = parser.parse_args(argv)
+
+    grid = json.loads(Path(args.grid).read_text()) if args.grid else [{}]
+    dp = FeatherData(args.datadir, args.pairs, args.data_format)
+    strategy = make_strategy(dp)
+    markets = load_markets(strategy, args.pairs)
+    if not markets:
+        parser.error("no data for the requested pairs")
+    start = min(Timestamp(m.dates[0], tz=timezone.utc) for m in markets).to_pydatetime()
+    end = max(Timestamp(m.dates[-1], tz=timezone.utc) for m in markets).to_pydatetime()
+    step = timedelta(days=args.step_days) if args.step_days else None
+    windows = rolling_windows(start, end, timedelta(days=args.train_days),
+                              timedelta(days=args.test_days), step)
+    if not windows:
+        parser.error("history is shorter than one train + test window")
+
+    base = SimParams.from_strategy(strategy, stake_amount=args.stake_amount, fee=args.fee)
+    results = run(markets, base, grid, windows, args.workers)
+    if args.save:
+        results.to_csv(args.save, index=False)
+    selected = select(results, args.objective)
+    columns = ["window", "test_start", "params", "trades", "profit_abs", "max_drawdown_abs",
+               "exit_btc_protect", "exit_timeout", "exit_atr_compression"]
+    print(selected[columns].to_string(index=False))
+    print(json.dumps(aggregate(selected), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
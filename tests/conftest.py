@@ -0,0 +1,14 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from phoenix_bench import generate_ohlcv  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def ohlcv():
+    """2000 deterministic 15m candles with regime switches and crashes."""
+    return generate_ohlcv(2000, seed=3)
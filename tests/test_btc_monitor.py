@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+import pytest
+
+from freqtrade.enums import RunMode
+
+from phoenix_bench import BTC_PAIR, StubDataProvider, generate_market
+from phoenix_sim import make_strategy
+
+
+class Exchange(StubDataProvider):
+    """Stub exchange whose BTC ticker fails or prints ``factor`` times the last close."""
+
+    factor: float | None = None
+
+    def ticker(self, pair: str) -> dict:
+        if self.factor is None:
+            raise RuntimeError("ticker unavailable")
+        ticker = super().ticker(pair)
+        return {**ticker, "last": ticker["last"] * self.factor}
+
+
+def make(btc_monitor_source):
+    frames = generate_market(1, 1200, seed=2)
+    dp = Exchange(frames, RunMode.DRY_RUN)
+    last = frames[(BTC_PAIR, "15m")]["date"].iloc[-1].to_pydatetime()
+    # a few seconds into the forming candle
+    dp.now = last + timedelta(minutes=15, seconds=3)
+    return make_strategy(dp, btc_monitor_source=btc_monitor_source)
+
+
+def monitor_row(strategy, current_time):
+    return strategy._btc_monitor.get(
+        current_time, strategy.btc_drop3h_exit.value, strategy.btc_drop30m_exit.value, True
+    )
+
+
+@pytest.fixture
+def candles_only():
+    strategy = make(None)
+    strategy.bot_loop_start(current_time=strategy.dp.now)
+    return strategy._btc_monitor.row
+
+
+def test_failing_ticker_falls_back_to_candles(candles_only):
+    strategy = make("ticker")
+    strategy.bot_loop_start(current_time=strategy.dp.now)
+    row = strategy._btc_monitor.row
+    assert row is not None
+    assert (row.drop3h, row.drop30m, row.close) == (
+        candles_only.drop3h, candles_only.drop30m, candles_only.close)
+
+
+def test_stale_forming_state_is_rebuilt_from_candles(candles_only):
+    strategy = make("ticker")
+    strategy.dp.factor = 0.8
+    now = strategy.dp.now
+    strategy.bot_loop_start(current_time=now)
+    crashed = monitor_row(strategy, now + timedelta(seconds=2))
+    assert crashed.crash and crashed.drop3h < candles_only.drop3h
+
+    # older than one throttle cycle
+    assert monitor_row(strategy, now + timedelta(seconds=10)).drop3h == candles_only.drop3h
+
+    # within the throttle cycle, but the base candle has closed
+    strategy.bot_loop_start(current_time=now)
+    strategy._btc_monitor.max_age = timedelta(hours=1)
+    assert monitor_row(strategy, now + timedelta(minutes=5)).drop3h == crashed.drop3h
+    later = now + timedelta(minutes=15)
+    reference = make(None)
+    reference.bot_loop_start(current_time=later)
+    assert monitor_row(strategy, later).drop3h == reference._btc_monitor.row.drop3h
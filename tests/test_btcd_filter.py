@@ -0,0 +1,24 @@
+import pytest
+
+from freqtrade.data.history import get_datahandler
+from freqtrade.enums import CandleType
+
+from phoenix_bench import BTC_PAIR, generate_market, generate_ohlcv
+from phoenix_sim import FeatherData, make_strategy
+
+
+@pytest.mark.parametrize("with_btcd", [True, False])
+def test_btcd_filter_follows_available_data(tmp_path, with_btcd):
+    handler = get_datahandler(tmp_path, "feather")
+    frames = generate_market(1, 200, seed=3)
+    if with_btcd:
+        frames[("BTC.D", "1h")] = generate_ohlcv(50, 4, "1h")
+    for (pair, timeframe), df in frames.items():
+        handler.ohlcv_store(pair, timeframe, df, CandleType.SPOT)
+
+    whitelist = list(dict.fromkeys(pair for pair, _ in frames if pair not in (BTC_PAIR, "BTC.D")))
+    dp = FeatherData(tmp_path, whitelist)
+    strategy = make_strategy(dp, use_btcd_filter=True)
+    pairs = strategy.informative_pairs()
+    assert (("BTC.D", strategy.informative_timeframe) in pairs) is with_btcd
+    assert strategy.use_btcd_filter is with_btcd
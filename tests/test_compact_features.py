@@ -0,0 +1,53 @@
+from copy import deepcopy
+
+import numpy as np
+import pytest
+from pandas.testing import assert_series_equal
+
+from freqtrade.enums import RunMode
+
+from PhoeniX_V1 import PhoeniX_V1, _RAW_COLUMNS
+from phoenix_bench import StubDataProvider, generate_market
+from phoenix_sim import make_strategy
+
+
+SIGNALS = ("enter_long", "exit_long", "enter_tag")
+# loose entry thresholds, so the synthetic market produces entries to compare
+LOOSE = dict(buy_adx_min=10, buy_min_atr_z=0.0, buy_vol_rel_min=0.5)
+
+
+def parameters(**values):
+    """Copies of the strategy's parameters set to ``values``, leaving the class untouched."""
+    out = {}
+    for name, value in values.items():
+        out[name] = deepcopy(getattr(PhoeniX_V1, name))
+        out[name].value = value
+    return out
+
+
+def analyze(frames, pair, **attributes):
+    strategy = make_strategy(StubDataProvider(frames, RunMode.BACKTEST),
+                             **parameters(**LOOSE), **attributes)
+    metadata = {"pair": pair}
+    df = strategy.populate_indicators(frames[(pair, "15m")].copy(), metadata)
+    df = strategy.populate_entry_trend(df, metadata)
+    return strategy.populate_exit_trend(df, metadata)
+
+
+@pytest.fixture(scope="module")
+def frames():
+    # enough history for the 4h EMA-200 of the entry gate
+    return generate_market(2, 6000, seed=4)
+
+
+@pytest.mark.parametrize("pair", ["P000/USDT", "P001/USDT"])
+def test_compact_frames_give_the_same_signals(frames, pair):
+    full = analyze(frames, pair)
+    compact = analyze(frames, pair, compact_features=True)
+    assert full["enter_long"].sum() > 0
+    for col in SIGNALS:
+        assert_series_equal(compact[col], full[col], check_dtype=False)
+    for col in _RAW_COLUMNS:
+        assert compact[col].dtype == np.float64
+    assert (compact.dtypes == np.float32).any()
+    assert compact.memory_usage(deep=True).sum() < full.memory_usage(deep=True).sum()
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from freqtrade.enums import RunMode
+
+from PhoeniX_V1 import CORR_PERIOD, _BtcFeatureCache, _CorrelationMatrix
+from phoenix_bench import BTC_PAIR, StubDataProvider, generate_market
+
+
+CANDLE = timedelta(minutes=15)
+
+
+@pytest.fixture
+def market():
+    frames = generate_market(4, 700, seed=11)
+    # a pair with missing candles
+    pair = frames[("P002/USDT", "15m")]
+    frames[("P002/USDT", "15m")] = pair.drop(index=[520, 610, 611]).reset_index(drop=True)
+    dp = StubDataProvider(frames, RunMode.DRY_RUN, limit=400)
+    return frames, dp
+
+
+def refresh(matrix, dp, btc, now):
+    dp.now = now
+    btc.refresh(dp, dp.get_pair_dataframe(BTC_PAIR, "15m")["date"].iloc[-1])
+    matrix.refresh(dp, btc)
+
+
+def rebuilt(dp):
+    btc = _BtcFeatureCache(BTC_PAIR, "15m", "1h", "15m")
+    matrix = _CorrelationMatrix("15m")
+    refresh(matrix, dp, btc, dp.now)
+    return matrix
+
+
+def assert_recent_rows_match(matrix, reference, dp):
+    # rows whose window starts after the first BTC return of the sliced frames
+    first = dp.get_pair_dataframe(BTC_PAIR, "15m")["date"].iloc[CORR_PERIOD + 1]
+    for pair in dp.current_whitelist():
+        dates = dp.get_pair_dataframe(pair, "15m")["date"]
+        recent = (dates >= first).to_numpy()
+        np.testing.assert_allclose(matrix.column(pair, dates)[recent],
+                                   reference.column(pair, dates)[recent], atol=1e-9, err_msg=pair)
+    _, corr = matrix.pair_matrix(dp.now)
+    _, expected = reference.pair_matrix(dp.now)
+    np.testing.assert_allclose(corr, expected, atol=1e-9)
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    matrix = _CorrelationMatrix("15m")
+    matrix.rebuilds = 0
+    rebuild = matrix._rebuild
+
+    def counting(*args):
+        matrix.rebuilds += 1
+        return rebuild(*args)
+
+    monkeypatch.setattr(matrix, "_rebuild", counting)
+    return matrix
+
+
+def test_new_candles_advance_the_window_sums(market, counted):
+    frames, dp = market
+    dates = frames[(BTC_PAIR, "15m")]["date"]
+    btc = _BtcFeatureCache(BTC_PAIR, "15m", "1h", "15m")
+    for row in range(420, 700, 7):
+        # one or several candles per loop
+        for step in (row, row + 1, row + 3):
+            refresh(counted, dp, btc, dates.iloc[step].to_pydatetime() + CANDLE)
+        assert_recent_rows_match(counted, rebuilt(dp), dp)
+    assert counted.rebuilds == 1
+
+
+def test_whitelist_change_rebuilds(market, counted):
+    frames, dp = market
+    now = frames[(BTC_PAIR, "15m")]["date"].iloc[500].to_pydatetime() + CANDLE
+    btc = _BtcFeatureCache(BTC_PAIR, "15m", "1h", "15m")
+    refresh(counted, dp, btc, now)
+    dp._whitelist = dp._whitelist[1:]
+    refresh(counted, dp, btc, now + CANDLE)
+    assert counted.rebuilds == 2
+    assert list(counted.pairs) == dp.current_whitelist()
+    assert_recent_rows_match(counted, rebuilt(dp), dp)
+
+
+def test_rewritten_candle_rebuilds(market, counted):
+    frames, dp = market
+    now = frames[(BTC_PAIR, "15m")]["date"].iloc[500].to_pydatetime() + CANDLE
+    btc = _BtcFeatureCache(BTC_PAIR, "15m", "1h", "15m")
+    refresh(counted, dp, btc, now)
+    frames[("P001/USDT", "15m")].loc[500, "close"] *= 1.02
+    refresh(counted, dp, btc, now + CANDLE)
+    assert counted.rebuilds == 2
+    assert_recent_rows_match(counted, rebuilt(dp), dp)
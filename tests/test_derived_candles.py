@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from freqtrade.enums import RunMode
+
+from phoenix_bench import BTC_PAIR, StubDataProvider, generate_market
+from phoenix_sim import make_strategy
+
+
+PAIR = "P000/USDT"
+INFORMATIVE = ("close_btc", "ema_200_btc", "close_4h", "ema_200_4h")
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return generate_market(1, 6000, seed=6)
+
+
+def analyze(frames, **attributes):
+    """The last analyzed row, with the exchange serving ``startup_candle_count`` candles."""
+    dp = StubDataProvider(frames, RunMode.DRY_RUN)
+    dp.now = frames[(BTC_PAIR, "15m")]["date"].iloc[-1].to_pydatetime() + timedelta(minutes=15)
+    strategy = make_strategy(dp, **attributes)
+    dp.limit = strategy.startup_candle_count
+    strategy.bot_loop_start(current_time=dp.now)
+    df = strategy.populate_indicators(dp.get_pair_dataframe(PAIR, "15m"), {"pair": PAIR})
+    return strategy, df.iloc[-1]
+
+
+def test_derived_informative_matches_downloaded_at_last_row(frames):
+    derived, row = analyze(frames, derive_informative=True)
+    _, expected = analyze(frames)
+    # the 4h EMA-200 cannot warm up from five calls of 15m candles
+    assert derived._derived.timeframes == ("1h",)
+    assert derived.startup_candle_count <= derived.max_startup_candles
+    for col in INFORMATIVE:
+        assert not np.isnan(row[col]), col
+        assert row[col] == pytest.approx(expected[col], rel=1e-3), col
+
+
+def test_derived_informative_pairs_are_unique(frames):
+    strategy = make_strategy(StubDataProvider(frames, RunMode.DRY_RUN), derive_informative=True)
+    pairs = strategy.informative_pairs()
+    assert len(pairs) == len(set(pairs))
+    assert (PAIR, "4h") in pairs and (BTC_PAIR, "15m") in pairs
+    assert (BTC_PAIR, "1h") not in pairs
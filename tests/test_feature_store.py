@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+import pytest
+
+from PhoeniX_V1 import (
+    BASE_INDICATOR_COLUMNS,
+    FEATURE_CACHE_SEGMENTS,
+    _add_quote_volume,
+    _base_indicators,
+    _FeatureStore,
+    _IncrementalIndicators,
+    _populate_base_indicators,
+)
+
+
+WIN = 50
+PAIR = "ETH/USDT"
+
+
+def assert_matches(actual, expected):
+    for col in BASE_INDICATOR_COLUMNS:
+        np.testing.assert_allclose(
+            actual[col].to_numpy(), expected[col].to_numpy(),
+            rtol=1e-6, atol=1e-6, equal_nan=True, err_msg=col,
+        )
+
+
+def counted_engine():
+    engine = _IncrementalIndicators("15m")
+    engine.full_recomputes = 0
+    full = engine._full
+
+    def counted(*args):
+        engine.full_recomputes += 1
+        return full(*args)
+
+    engine._full = counted
+    return engine
+
+
+def segments(store):
+    return [n for n in os.listdir(store._path(PAIR, WIN)) if n.endswith(".feather")]
+
+
+@pytest.fixture
+def frame(ohlcv):
+    return _add_quote_volume(ohlcv.copy())
+
+
+def run(frame, root, end, strict, start=0):
+    """One process: a fresh engine and store analyzing ``frame[start:end]``."""
+    engine = counted_engine()
+    store = _FeatureStore(str(root), "15m")
+    df = frame.iloc[start:end].reset_index(drop=True)
+    return _base_indicators(df, WIN, engine, PAIR, store, strict), engine, store
+
+
+def test_backtest_rerun_reuses_cache(frame, tmp_path):
+    _, first, _ = run(frame, tmp_path, 1500, strict=True)
+    assert first.full_recomputes == 1
+    out, engine, store = run(frame, tmp_path, 2000, strict=True)
+    assert engine.full_recomputes == 0
+    assert_matches(out, _populate_base_indicators(frame.iloc[:2000].reset_index(drop=True), WIN))
+    # strict runs keep nothing in memory, the file holds the extended history
+    assert PAIR not in engine.states
+    assert len(segments(store)) == 2
+
+
+def test_shorter_backtest_rerun_ignores_later_candles(frame, tmp_path):
+    run(frame, tmp_path, 2000, strict=True)
+    out, _, _ = run(frame, tmp_path, 1200, strict=True)
+    assert_matches(out, _populate_base_indicators(frame.iloc[:1200].reset_index(drop=True), WIN))
+
+
+def test_backtest_rerun_from_later_start_ignores_cache(frame, tmp_path):
+    run(frame, tmp_path, 1500, strict=True)
+    out, engine, _ = run(frame, tmp_path, 2000, strict=True, start=200)
+    assert engine.full_recomputes == 1
+    assert_matches(out, _populate_base_indicators(frame.iloc[200:2000].reset_index(drop=True), WIN))
+
+
+def test_sliding_live_window_across_restarts(frame, tmp_path):
+    # live keeps a fixed-size window; the bot restarts every 25 candles
+    full = _populate_base_indicators(frame, WIN)
+    size = 1000
+    counts = []
+    engine = store = None
+    for start in range(0, 2 * FEATURE_CACHE_SEGMENTS + 40):
+        if start % 25 == 0:
+            engine = counted_engine()
+            store = _FeatureStore(str(tmp_path), "15m")
+        window = slice(start, start + size)
+        out = _base_indicators(frame.iloc[window].reset_index(drop=True), WIN, engine, PAIR, store)
+        assert_matches(out, full.iloc[window].reset_index(drop=True))
+        # only the very first process computes the whole window
+        assert engine.full_recomputes == (1 if start < 25 else 0)
+        counts.append(len(segments(store)))
+    assert max(counts) <= FEATURE_CACHE_SEGMENTS
+    # compaction happened and the directory kept growing afterwards
+    assert counts.count(1) >= 2
+    assert counts[-1] > 1
@@ -0,0 +1,96 @@
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from freqtrade.enums import HyperoptState, RunMode
+from freqtrade.optimize.hyperopt_tools import HyperoptStateContainer
+
+from PhoeniX_V1 import PhoeniX_V1, _HyperoptBank, _add_quote_volume, _populate_base_indicators
+from phoenix_bench import StubDataProvider, generate_market
+from phoenix_sim import make_strategy
+
+
+WINDOWS = range(42, 61)
+PAIR = "P000/USDT"
+
+
+def test_bank_columns_match_full_recompute(ohlcv):
+    df = _populate_base_indicators(_add_quote_volume(ohlcv.copy()), WINDOWS[0])
+    bank = _HyperoptBank(df, WINDOWS)
+    for col, win in enumerate(WINDOWS):
+        expected = _populate_base_indicators(df, win)["atr_z"].to_numpy(dtype=float)
+        np.testing.assert_array_equal(np.isnan(bank.atr_z[:, col]), np.isnan(expected))
+        np.testing.assert_allclose(bank.atr_z[:, col], expected, rtol=1e-9, atol=1e-12,
+                                   equal_nan=True, err_msg=f"atr_window={win}")
+
+
+def parameters(**values):
+    """Copies of the strategy's parameters set to ``values``, leaving the class untouched."""
+    out = {}
+    for name, value in values.items():
+        out[name] = deepcopy(getattr(PhoeniX_V1, name))
+        out[name].value = value
+    return out
+
+
+def analyze(runmode, frames, params):
+    strategy = make_strategy(StubDataProvider(frames, runmode), **params)
+    metadata = {"pair": PAIR}
+    # hyperopt analyzes once over the whole parameter range, then runs epochs
+    HyperoptStateContainer.set_state(HyperoptState.INDICATORS)
+    try:
+        df = strategy.populate_indicators(frames[(PAIR, "15m")].copy(), metadata)
+    finally:
+        HyperoptStateContainer.set_state(HyperoptState.OPTIMIZE)
+    df = strategy.populate_entry_trend(df, metadata)
+    return strategy, strategy.populate_exit_trend(df, metadata)
+
+
+def sample(rng):
+    return dict(
+        atr_window=int(rng.integers(42, 61)),
+        buy_adx_min=int(rng.integers(22, 39)),
+        buy_min_atr_z=round(float(rng.uniform(1.2, 3.5)), 1),
+        buy_vol_rel_min=round(float(rng.uniform(1.2, 2.0)), 1),
+        flat_adx_max=int(rng.integers(12, 19)),
+    )
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return generate_market(1, 3000, seed=4)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_bank_masks_match_direct_populate(frames, seed):
+    values = sample(np.random.default_rng(seed))
+    hyperopt, banked = analyze(RunMode.HYPEROPT, frames, parameters(**values))
+    _, direct = analyze(RunMode.BACKTEST, frames, parameters(**values))
+    bank = hyperopt._hyperopt_banks[PAIR]
+    assert list(bank.windows) == list(WINDOWS)
+
+    adx = direct["adx"].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        entry = (
+            (adx > values["buy_adx_min"])
+            & (direct["atr_z"].to_numpy(dtype=float) > values["buy_min_atr_z"])
+            & (direct["quoteVolume"].to_numpy(dtype=float)
+               > direct["vol_ma"].to_numpy(dtype=float) * values["buy_vol_rel_min"])
+        )
+        flat = direct["adx"].rolling(6).max().to_numpy(dtype=float) < values["flat_adx_max"]
+    # the set under test, between two others evaluated in the same call
+    other = sample(np.random.default_rng(seed + 100))
+    masks = bank.entry_masks(
+        *([other[k], values[k], other[k]] for k in ("buy_adx_min", "buy_min_atr_z",
+                                                    "buy_vol_rel_min", "atr_window"))
+    )
+    assert entry.any()
+    np.testing.assert_array_equal(masks[1], entry)
+    np.testing.assert_array_equal(bank.flat_masks([values["flat_adx_max"]])[0], flat)
+
+    for col in ("enter_long", "exit_long"):
+        np.testing.assert_array_equal(banked[col].fillna(0).to_numpy(),
+                                      direct[col].fillna(0).to_numpy(), err_msg=col)
+    np.testing.assert_array_equal(banked["atr_z"].to_numpy(dtype=float),
+                                  direct["atr_z"].to_numpy(dtype=float))
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from PhoeniX_V1 import (
+    BASE_INDICATOR_COLUMNS,
+    _IncrementalIndicators,
+    _add_quote_volume,
+    _populate_base_indicators,
+)
+
+
+WIN = 50
+
+
+def assert_matches(actual, expected):
+    for col in BASE_INDICATOR_COLUMNS:
+        np.testing.assert_allclose(
+            actual[col].to_numpy(), expected[col].to_numpy(),
+            rtol=1e-6, atol=1e-6, equal_nan=True, err_msg=col,
+        )
+
+
+@pytest.fixture
+def frame(ohlcv):
+    return _add_quote_volume(ohlcv.copy())
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = _IncrementalIndicators("15m")
+    engine.full_recomputes = 0
+    full = engine._full
+
+    def counted(*args):
+        engine.full_recomputes += 1
+        return full(*args)
+
+    monkeypatch.setattr(engine, "_full", counted)
+    return engine
+
+
+def test_growing_frames_match_full_recompute(frame, engine):
+    full = _populate_base_indicators(frame, WIN)
+    for end in range(1500, 1540):
+        out = engine.update("ETH/USDT", frame.iloc[:end].reset_index(drop=True), WIN)
+        assert_matches(out, full.iloc[:end].reset_index(drop=True))
+    assert engine.full_recomputes == 1
+
+
+def test_sliding_frames_match_full_history(frame, engine):
+    # live keeps a fixed-size window: every new candle drops the oldest one
+    full = _populate_base_indicators(frame, WIN)
+    size = 1000
+    for start in range(0, 60, 3):
+        window = slice(start, start + size)
+        out = engine.update("ETH/USDT", frame.iloc[window].reset_index(drop=True), WIN)
+        assert_matches(out, full.iloc[window].reset_index(drop=True))
+    assert engine.full_recomputes == 1
+
+
+def test_gap_falls_back_to_full_recompute(frame, engine):
+    engine.update("ETH/USDT", frame.iloc[:1500].reset_index(drop=True), WIN)
+    gapped = frame.drop(index=1500).iloc[:1510].reset_index(drop=True)
+    out = engine.update("ETH/USDT", gapped, WIN)
+    assert_matches(out, _populate_base_indicators(gapped, WIN))
+    assert engine.full_recomputes == 2
+    # the recomputed state keeps extending from the gapped history
+    grown = frame.drop(index=1500).iloc[:1515].reset_index(drop=True)
+    assert_matches(engine.update("ETH/USDT", grown, WIN), _populate_base_indicators(grown, WIN))
+    assert engine.full_recomputes == 2
+
+
+def test_rewritten_candle_falls_back_to_full_recompute(frame, engine):
+    engine.update("ETH/USDT", frame.iloc[:1500].reset_index(drop=True), WIN)
+    rewritten = frame.iloc[:1501].reset_index(drop=True)
+    rewritten.loc[1490, ["close", "high"]] *= 1.05
+    out = engine.update("ETH/USDT", rewritten, WIN)
+    assert_matches(out, _populate_base_indicators(rewritten, WIN))
+    assert engine.full_recomputes == 2
+
+
+def test_atr_window_change_falls_back_to_full_recompute(frame, engine):
+    engine.update("ETH/USDT", frame.iloc[:1500].reset_index(drop=True), WIN)
+    df = frame.iloc[:1501].reset_index(drop=True)
+    out = engine.update("ETH/USDT", df, 42)
+    assert_matches(out, _populate_base_indicators(df, 42))
+    assert engine.full_recomputes == 2
+    assert engine.states["ETH/USDT"].window == 42
+
+
+def test_pairs_keep_separate_state(frame, engine):
+    other = frame.assign(close=frame["close"] * 2, high=frame["high"] * 2, low=frame["low"] * 2)
+    for end in (1500, 1501, 1502):
+        a = engine.update("ETH/USDT", frame.iloc[:end].reset_index(drop=True), WIN)
+        b = engine.update("SOL/USDT", other.iloc[:end].reset_index(drop=True), WIN)
+    assert_matches(a, _populate_base_indicators(frame.iloc[:1502].reset_index(drop=True), WIN))
+    assert_matches(b, _populate_base_indicators(other.iloc[:1502].reset_index(drop=True), WIN))
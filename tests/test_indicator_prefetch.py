@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+from freqtrade.enums import RunMode
+
+from phoenix_bench import BTC_PAIR, StubDataProvider, generate_market
+from phoenix_sim import make_strategy
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_prefetched_frames_match_serial_analysis(executor):
+    frames = generate_market(3, 1500, seed=6)
+    dates = frames[(BTC_PAIR, "15m")]["date"]
+    dp = StubDataProvider(frames, RunMode.DRY_RUN)
+    pooled = make_strategy(dp, indicator_workers=3, indicator_executor=executor)
+    serial = make_strategy(dp)
+    pairs = dp.current_whitelist()
+    try:
+        # two loops: the second one extends the engine state by one candle
+        for end in (1400, 1401):
+            dp.now = dates.iloc[end - 1].to_pydatetime() + timedelta(minutes=15)
+            pooled.bot_loop_start(current_time=dp.now)
+            assert set(pooled._prefetch.frames) == set(pairs)
+            for pair in pairs:
+                df = dp.get_pair_dataframe(pair, "15m")
+                actual = pooled.populate_indicators(df.copy(), {"pair": pair})
+                expected = serial._populate_indicators(df.copy(), {"pair": pair})
+                assert_frame_equal(actual, expected, check_exact=False, rtol=1e-9)
+            # every prefetched frame was used
+            assert not pooled._prefetch.frames
+    finally:
+        pooled.bot_cleanup()
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from pandas import concat, date_range
+
+from freqtrade.enums import RunMode
+from freqtrade.strategy import merge_informative_pair
+
+from PhoeniX_V1 import _BtcFeatureCache, _merge_informative
+from phoenix_bench import BTC_PAIR, START, StubDataProvider, generate_market, generate_ohlcv
+
+
+def test_btc_features_forward_fill_missing_candles():
+    frames = generate_market(1, 600, seed=5)
+    btc = frames[(BTC_PAIR, "15m")]
+    frames[(BTC_PAIR, "15m")] = btc.drop(index=[300, 301, 450]).reset_index(drop=True)
+    dp = StubDataProvider(frames, RunMode.BACKTEST)
+    pair = dp.get_pair_dataframe("P000/USDT", "15m")
+
+    cache = _BtcFeatureCache(BTC_PAIR, "15m", "1h", "15m")
+    cache.refresh(dp, pair["date"].iloc[-1])
+    out = cache.attach(pair)
+
+    expected = merge_informative_pair(
+        pair, frames[(BTC_PAIR, "15m")], "15m", "15m",
+        ffill=True, append_timeframe=False, suffix="btc_fast",
+    )
+    np.testing.assert_array_equal(out["close_btc_fast"].to_numpy(),
+                                  expected["close_btc_fast"].to_numpy())
+    for col in cache.frame.columns.drop("date"):
+        values = out[col].to_numpy(dtype=float)
+        np.testing.assert_array_equal(values[300:302], values[299], err_msg=col)
+        assert values[450] == values[449] or np.isnan(values[449])
+
+
+def _informative(seed: int, timeframe: str, start, candles: int):
+    frame = generate_ohlcv(candles, seed, timeframe, start=start)
+    return frame.assign(ema_200=frame["close"].ewm(span=20).mean())
+
+
+def _assert_same_merge(df, informative, timeframe, timeframe_inf):
+    out = _merge_informative(df, informative, timeframe, timeframe_inf, "4h")
+    expected = merge_informative_pair(
+        df, informative[["date", "close", "ema_200"]], timeframe, timeframe_inf,
+        ffill=True, append_timeframe=False, suffix="4h",
+    )
+    for col in ("close_4h", "ema_200_4h"):
+        np.testing.assert_array_equal(out[col].to_numpy(dtype=float),
+                                      expected[col].to_numpy(dtype=float), err_msg=col)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_alignment_matches_freqtrade_on_random_ranges(seed):
+    rng = np.random.default_rng(seed)
+    timeframe_inf = ("1h", "4h", "1d")[seed % 3]
+    df = generate_ohlcv(int(rng.integers(50, 800)), seed,
+                        start=START + timedelta(minutes=15 * int(rng.integers(0, 200))))
+    informative = _informative(seed + 100, timeframe_inf,
+                               START + timedelta(hours=int(rng.integers(-48, 48))),
+                               int(rng.integers(5, 200)))
+    gaps = rng.choice(len(informative), size=len(informative) // 10, replace=False)
+    informative = informative.drop(index=gaps).reset_index(drop=True)
+    _assert_same_merge(df, informative, "15m", timeframe_inf)
+    # the second merge is served from the cache
+    _assert_same_merge(df, informative, "15m", timeframe_inf)
+
+
+def test_alignment_matches_freqtrade_on_unsorted_dates():
+    df = generate_ohlcv(400, 1)
+    informative = _informative(2, "1h", START, 120)
+    shuffled = informative.sample(frac=1.0, random_state=3).reset_index(drop=True)
+    _assert_same_merge(df, shuffled, "15m", "1h")
+    duplicated = concat([informative, informative.iloc[10:20]]).sort_values(
+        "date", kind="stable").reset_index(drop=True)
+    _assert_same_merge(df, duplicated, "15m", "1h")
+
+
+def test_alignment_matches_freqtrade_on_monthly_timeframe():
+    df = generate_ohlcv(300, 4, "1d", start=START - timedelta(days=150))
+    informative = _informative(5, "1d", START, 14).assign(
+        date=date_range(START - timedelta(days=365), periods=14, freq="MS"))
+    _assert_same_merge(df, informative, "1d", "1M")
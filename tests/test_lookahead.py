@@ -0,0 +1,39 @@
+import pytest
+
+from freqtrade.enums import RunMode
+
+from PhoeniX_V1 import PhoeniX_V1
+from phoenix_bench import StubDataProvider, generate_market
+from phoenix_lookahead import check_lookahead
+from phoenix_sim import make_strategy
+
+
+PAIR = "P000/USDT"
+
+
+def leaky_entry(self, df, metadata):
+    """Enters on the close of the 4h candle a row belongs to, before it has closed."""
+    df = PhoeniX_V1.populate_entry_trend(self, df, metadata)
+    h4 = self.dp.get_pair_dataframe(metadata["pair"], "4h").set_index("date")["close"]
+    close_4h = h4.reindex(df["date"].dt.floor("4h")).to_numpy()
+    df["enter_long"] = (close_4h > df["close"].to_numpy()).astype(int)
+    return df
+
+
+@pytest.fixture(scope="module")
+def source():
+    return StubDataProvider(generate_market(1, 1600, seed=8), RunMode.BACKTEST)
+
+
+def test_strategy_has_no_lookahead(source):
+    diffs, checked = check_lookahead(source, [PAIR], start=1000, every=25)
+    assert checked == 24
+    assert diffs.empty, diffs.to_string()
+
+
+def test_lookahead_through_informative_merge_is_reported(source):
+    make = lambda dp: make_strategy(dp, populate_entry_trend=leaky_entry)  # noqa: E731
+    diffs, checked = check_lookahead(source, [PAIR], make=make, start=1000, every=25)
+    assert checked == 24
+    assert set(diffs["signal"]) == {"enter_long"}
+    assert diffs["full"].all() and not diffs["prefix"].any()
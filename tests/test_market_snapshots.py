@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+import pytest
+
+from freqtrade.enums import RunMode
+
+from phoenix_bench import BTC_PAIR, StubDataProvider, StubTrade, generate_market
+from phoenix_sim import make_strategy
+
+
+DOWN = "P001/USDT"
+
+
+class FailingBooks(StubDataProvider):
+    """Stub exchange whose order book endpoint fails for one pair."""
+
+    def orderbook(self, pair: str, maximum: int) -> dict:
+        if pair == DOWN:
+            raise RuntimeError("order book unavailable")
+        return super().orderbook(pair, maximum)
+
+
+@pytest.fixture
+def strategy(monkeypatch):
+    frames = generate_market(2, 400, seed=4)
+    dp = FailingBooks(frames, RunMode.DRY_RUN)
+    dp.now = frames[(BTC_PAIR, "15m")]["date"].iloc[-1].to_pydatetime() + timedelta(minutes=15)
+    strategy = make_strategy(dp, use_depth_snapshots=True, snapshot_workers=2)
+    monkeypatch.setattr(strategy, "_open_trade_pairs", lambda: ["P000/USDT", DOWN])
+    strategy.bot_loop_start(current_time=dp.now)
+    yield strategy
+    strategy.bot_cleanup()
+
+
+def dca(strategy, pair: str, stake: float):
+    dp = strategy.dp
+    trade = StubTrade(1, pair, 100.0, dp.now - timedelta(hours=1), stake_amount=stake)
+    # far below every DCA level
+    rate = 50.0
+    profit = trade.calc_profit_ratio(rate)
+    return strategy.adjust_trade_position(trade, dp.now, rate, profit, None, 1e9,
+                                          rate, rate, profit, profit)
+
+
+def test_dca_add_is_capped_by_ask_depth(strategy):
+    asks = strategy.dp.orderbook("P000/USDT", strategy.depth_levels)["asks"]
+    limit = asks[0][0] * (1 + strategy.depth_band)
+    cap = sum(price * amount for price, amount in asks if price <= limit)
+    cap *= strategy.depth_stake_fraction
+
+    stake, tag = dca(strategy, "P000/USDT", cap * 4)
+    assert stake == pytest.approx(cap)
+    assert tag.startswith("dca_")
+    # a small add fits into the book
+    assert dca(strategy, "P000/USDT", cap / 4)[0] == pytest.approx(cap / 4)
+
+
+def test_failed_snapshot_falls_back_to_uncapped_add(strategy):
+    assert strategy._books.get(DOWN) is None
+    assert dca(strategy, DOWN, 1e6)[0] == pytest.approx(1e6)
+
+
+def test_cleanup_closes_snapshot_pool(strategy):
+    assert strategy._books.pool is not None
+    strategy.bot_cleanup()
+    assert strategy._books.pool is None
@@ -0,0 +1,70 @@
+import logging
+
+from freqtrade.enums import RunMode
+
+from PhoeniX_V1 import METRIC_BUCKETS, _NULL_STAGE, _Metrics
+from phoenix_bench import START, StubDataProvider, generate_market
+from phoenix_sim import make_strategy
+
+
+PAIR = "P000/USDT"
+
+
+def run_loops(strategy, loops):
+    frames = strategy.dp.frames
+    metadata = {"pair": PAIR}
+    for _ in range(loops):
+        strategy.bot_loop_start(current_time=START)
+        df = strategy.populate_indicators(frames[(PAIR, "15m")].copy(), metadata)
+        df = strategy.populate_entry_trend(df, metadata)
+        strategy.populate_exit_trend(df, metadata)
+
+
+def test_disabled_metrics_record_nothing():
+    strategy = make_strategy(StubDataProvider(generate_market(1, 400, seed=2), RunMode.BACKTEST))
+    assert strategy._metrics.stage("populate_indicators", PAIR, 10) is _NULL_STAGE
+    run_loops(strategy, 2)
+    assert strategy._metrics.series == {}
+    assert strategy._metrics.loops == 0
+
+
+def test_stages_are_logged_and_exported(tmp_path, caplog):
+    path = tmp_path / "phoenix.prom"
+    strategy = make_strategy(
+        StubDataProvider(generate_market(1, 400, seed=2), RunMode.BACKTEST),
+        enable_metrics=True, metrics_log_every=2, metrics_file=str(path),
+    )
+    with caplog.at_level(logging.INFO, logger="PhoeniX_V1"):
+        run_loops(strategy, 3)
+    metrics = strategy._metrics
+    assert metrics.loops == 3
+    assert "PhoeniX metrics after 2 loops" in caplog.text
+    stages = metrics.by_stage()
+    for name in ("bot_loop_start", "populate_indicators", "indicators.base",
+                 "populate_entry_trend", "populate_exit_trend"):
+        assert stages[name].count == 3, name
+    assert metrics.series[("populate_indicators", PAIR)].rows == 400
+
+    # written when the second loop started, after one analysis
+    text = path.read_text()
+    assert "phoenix_loops_total 2\n" in text
+    labels = f'stage="populate_indicators",pair="{PAIR}"'
+    buckets = [
+        int(line.rsplit(" ", 1)[1]) for line in text.splitlines()
+        if line.startswith(f"phoenix_stage_seconds_bucket{{{labels},")
+    ]
+    assert len(buckets) == len(METRIC_BUCKETS) + 1
+    assert buckets == sorted(buckets) and buckets[-1] == 1
+    assert f"phoenix_stage_seconds_count{{{labels}}} 1\n" in text
+    assert f"phoenix_dataframe_rows{{{labels}}} 400\n" in text
+    assert not (tmp_path / "phoenix.prom.tmp").exists()
+
+
+def test_histogram_quantile_and_label_escaping():
+    metrics = _Metrics(enabled=True)
+    for seconds in (0.0001,) * 19 + (METRIC_BUCKETS[-1] * 2,):
+        metrics.observe("stage", 'odd"pair', seconds)
+    hist = metrics.series[("stage", 'odd"pair')]
+    assert hist.quantile(0.5) == 0.0001
+    assert hist.quantile(1.0) == hist.max
+    assert 'pair="odd\\"pair"' in metrics.prometheus()
@@ -0,0 +1,112 @@
+from pathlib import Path
+from unittest.mock import MagicMock, PropertyMock, patch
+
+import pytest
+
+from freqtrade.data.history import get_datahandler
+from freqtrade.enums import CandleType, RunMode
+from freqtrade.exchange import Exchange
+
+from phoenix_bench import BTC_PAIR, generate_market
+from phoenix_sim import SimMarket, SimParams, compare_with_backtest, simulate
+
+
+PAIRS = ["P000/USDT", "P001/USDT"]
+
+# PhoeniX_V1 with frequent signals, so a short history yields enough trades
+STRATEGY = '''
+from PhoeniX_V1 import PhoeniX_V1
+
+
+class CrossCheck(PhoeniX_V1):
+    max_startup_candles = 1000
+
+    def populate_entry_trend(self, df, metadata):
+        cross = (df["slowk"] > df["slowd"]) & (df["slowk"].shift() <= df["slowd"].shift())
+        df.loc[cross & (df["adx"] > 20), ["enter_long", "enter_tag"]] = (1, "x")
+        return df
+
+    def populate_exit_trend(self, df, metadata):
+        df.loc[df["close"] < df["ema_200"] * 0.97, "exit_long"] = 1
+        return df
+'''
+
+
+def _market(pair: str) -> dict:
+    base, quote = pair.split("/")
+    return {
+        "id": base + quote, "symbol": pair, "base": base, "quote": quote, "active": True,
+        "spot": True, "type": "spot", "linear": None, "inverse": None, "contractSize": None,
+        "precision": {"price": None, "amount": None, "base": None, "quote": None},
+        "limits": {key: {"min": None, "max": None}
+                   for key in ("amount", "cost", "price", "leverage")},
+        "info": {},
+    }
+
+
+@pytest.fixture(scope="module")
+def backtest(tmp_path_factory):
+    root = tmp_path_factory.mktemp("crosscheck")
+    (root / "strategies").mkdir()
+    (root / "strategies" / "CrossCheck.py").write_text(STRATEGY)
+    handler = get_datahandler(root / "data", "feather")
+    frames = generate_market(len(PAIRS), 4000, seed=1)
+    for (pair, timeframe), df in frames.items():
+        # exchange-like prices: Freqtrade rounds exit rates to the data's tick size
+        df[["open", "high", "low", "close"]] = df[["open", "high", "low", "close"]].round(4)
+        handler.ohlcv_store(pair, timeframe, df, CandleType.SPOT)
+
+    config = {
+        "strategy": "CrossCheck", "strategy_path": str(root / "strategies"),
+        "max_open_trades": 100, "stake_currency": "USDT", "stake_amount": 10,
+        "dry_run_wallet": 1e9, "tradable_balance_ratio": 1.0, "timeframe": "15m",
+        "dry_run": True, "trading_mode": "spot", "margin_mode": "",
+        "entry_pricing": {"price_side": "same", "use_order_book": False, "order_book_top": 1,
+                          "price_last_balance": 0.0},
+        "exit_pricing": {"price_side": "same", "use_order_book": False, "order_book_top": 1},
+        "exchange": {"name": "binance", "key": "", "secret": "", "pair_whitelist": PAIRS,
+                     "pair_blacklist": []},
+        "pairlists": [{"method": "StaticPairList"}],
+        "datadir": root / "data", "dataformat_ohlcv": "feather", "user_data_dir": root,
+        "export": "none", "fee": 0.001, "runmode": RunMode.BACKTEST, "internals": {},
+        "cache": "none", "timerange": None,
+    }
+    markets = {pair: _market(pair) for pair in (BTC_PAIR, *PAIRS)}
+    with patch.object(Exchange, "_init_ccxt", return_value=MagicMock()), \
+            patch.object(Exchange, "reload_markets"), \
+            patch.object(Exchange, "validate_config"), \
+            patch.object(Exchange, "_load_async_markets"), \
+            patch.object(Exchange, "markets", new_callable=PropertyMock, return_value=markets), \
+            patch.object(Exchange, "precision_mode_price", new_callable=PropertyMock,
+                         return_value=4), \
+            patch.object(Exchange, "get_fee", return_value=0.001), \
+            patch.object(Exchange, "get_min_pair_stake_amount", return_value=None), \
+            patch.object(Exchange, "get_max_pair_stake_amount", return_value=float("inf")):
+        from freqtrade.optimize.backtesting import Backtesting
+
+        bt = Backtesting(config)
+        data, timerange = bt.load_bt_data()
+        strategy = bt.strategylist[0]
+        bt.backtest_one_strategy(strategy, data, timerange)
+        trades = bt.all_bt_content[strategy.get_strategy_name()]["results"]
+
+        # a fresh instance on the same data provider for the simulator
+        sim_strategy = type(strategy)(config)
+        sim_strategy.dp = bt.dataprovider
+        sim_markets = [
+            SimMarket.from_strategy(sim_strategy, pair, bt.dataprovider.get_pair_dataframe(pair, "15m"))
+            for pair in PAIRS
+        ]
+        params = SimParams.from_strategy(sim_strategy, stake_amount=10, fee=0.001)
+    return trades, simulate(sim_markets, params)
+
+
+def test_simulator_matches_freqtrade_backtest(backtest):
+    bt_trades, sim_trades = backtest
+    assert len(bt_trades) >= 100
+    assert bt_trades["exit_reason"].nunique() >= 5
+    assert (sim_trades["adjustments"] > 0).any()
+    # Freqtrade rounds stop prices up to the tick size, the simulator does not
+    compared = compare_with_backtest(sim_trades, bt_trades, rtol=1e-4, atol=1e-5)
+    mismatches = compared[compared["status"] != "match"]
+    assert mismatches.empty, mismatches.to_string()
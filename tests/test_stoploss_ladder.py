@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from freqtrade.strategy import stoploss_from_open
+
+from PhoeniX_V1 import _RoiCurve, _StoplossLadder
+
+
+def loop_stop(profits, stops, base, dca_base, profit, adjusted, is_short=False, leverage=1.0):
+    """The per-call scan ``custom_stoploss`` used before the ladder."""
+    for prof, sl_val in sorted(zip(profits, stops), reverse=True):
+        if profit > prof:
+            return stoploss_from_open(sl_val, profit, is_short, leverage)
+    return dca_base if adjusted else base
+
+
+def loop_roi(mult, floor, atr_pct):
+    """The per-call branch ``custom_roi`` used before the curve."""
+    if atr_pct is None or np.isnan(atr_pct):
+        return floor
+    if atr_pct > 6:
+        mult = max(mult, 2.0)
+    elif atr_pct < 3:
+        mult = min(mult, 1.2)
+    return max(atr_pct * mult / 100, floor)
+
+
+def ladders():
+    yield (0.01, 0.02, 0.04, 0.07, 0.12), (0.0, 0.015, 0.03, 0.05, 0.10)
+    # unsorted levels, and equal levels with different stops
+    yield (0.04, 0.01, 0.04, 0.2, 0.01), (0.01, 0.0, 0.03, 0.1, 0.005)
+    rng = np.random.default_rng(11)
+    for _ in range(20):
+        profits = np.round(rng.uniform(0.005, 0.2, 5), 2)
+        yield tuple(profits), tuple(np.round(rng.uniform(0.0, 0.1, 5), 3))
+
+
+@pytest.mark.parametrize("is_short, leverage", [(False, 1.0), (True, 1.0), (False, 3.0)])
+def test_ladder_matches_per_call_scan(is_short, leverage):
+    for profits, stops in ladders():
+        ladder = _StoplossLadder(profits, stops, -0.06, -0.03)
+        # every level exactly, and just around it
+        grid = np.concatenate([np.linspace(-0.1, 0.3, 401), profits,
+                               np.nextafter(profits, 1), np.nextafter(profits, -1)])
+        for adjusted in (False, True):
+            expected = [loop_stop(profits, stops, -0.06, -0.03, p, adjusted, is_short, leverage)
+                        for p in grid]
+            single = [ladder.stop(p, adjusted, is_short, leverage) for p in grid]
+            np.testing.assert_allclose(single, expected, rtol=1e-12, atol=0)
+            np.testing.assert_allclose(ladder.stops(grid, adjusted, is_short, leverage),
+                                       expected, rtol=1e-12, atol=0)
+
+
+def test_ladder_stops_take_per_row_dca_flags():
+    profits, stops = next(ladders())
+    ladder = _StoplossLadder(profits, stops, -0.06, -0.03)
+    grid = np.array([np.nan, -0.05, 0.0, 0.01, 0.015, 0.05, 0.25])
+    adjusted = np.array([True, False, True, True, False, True, False])
+    expected = [loop_stop(profits, stops, -0.06, -0.03, p, a) for p, a in zip(grid, adjusted)]
+    np.testing.assert_allclose(ladder.stops(grid, adjusted), expected, rtol=1e-12, atol=0)
+
+
+@pytest.mark.parametrize("mult, floor", [(1.5, 0.03), (1.0, 0.02), (2.0, 0.05), (1.1, 0.0)])
+def test_roi_curve_matches_per_call_branch(mult, floor):
+    curve = _RoiCurve(mult, floor)
+    atr = np.concatenate([np.linspace(0.0, 12.0, 1201), [3.0, 6.0, np.nan]])
+    expected = [loop_roi(mult, floor, a) for a in atr]
+    assert [curve.target(a) for a in atr] == pytest.approx(expected, rel=1e-12)
+    np.testing.assert_allclose(curve.targets(atr), expected, rtol=1e-12, atol=0)
+    assert curve.target(None) == floor
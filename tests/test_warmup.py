@@ -0,0 +1,30 @@
+import logging
+
+import pytest
+
+from freqtrade.enums import RunMode
+
+from phoenix_bench import StubDataProvider, generate_market
+from phoenix_sim import make_strategy
+
+
+@pytest.mark.parametrize("runmode", [RunMode.LIVE, RunMode.DRY_RUN])
+def test_live_startup_fits_one_call(runmode, caplog):
+    with caplog.at_level(logging.INFO, logger="PhoeniX_V1"):
+        strategy = make_strategy(StubDataProvider(generate_market(1, 50, seed=1), runmode))
+    plan = strategy._warmup
+    assert strategy.startup_candle_count <= 999
+    # every timeframe gets its own converged history, plus the merge shift
+    for tf in plan.timeframes():
+        extra = 0 if tf == strategy.timeframe else 1
+        assert plan.candles(tf) + extra <= strategy.startup_candle_count
+    assert "Warm-up of" not in caplog.text
+
+
+@pytest.mark.parametrize("runmode", [RunMode.BACKTEST, RunMode.HYPEROPT,
+                                     RunMode.UTIL_NO_EXCHANGE, RunMode.PLOT, RunMode.WEBSERVER])
+def test_offline_startup_covers_informative_history(runmode, caplog):
+    with caplog.at_level(logging.INFO, logger="PhoeniX_V1"):
+        strategy = make_strategy(StubDataProvider(generate_market(1, 50, seed=1), runmode))
+    assert strategy.startup_candle_count == strategy.max_startup_candles
+    assert "Warm-up of ema_200_4h" in caplog.text